@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+# Compares the previous direct-download write path (1 KB chunks into a system temp file, then shutil.move)
+# with DownloadWriter (large chunks into a part file in the destination directory, then os.replace).
+# Usage: python benchmarks/bench_download_write.py [size_mb] [destination_dir]
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from download_writer import DownloadWriter
+
+
+def iter_chunks(payload, chunk_size):
+    view = memoryview(payload)
+    for start in range(0, len(view), chunk_size):
+        yield bytes(view[start:start + chunk_size])
+
+
+def legacy_write(payload, file_path, progress_callback=lambda percent_completion: None):
+    downloaded_size = 0
+    chunk_counter = 0
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        for chunk in iter_chunks(payload, 1024):
+            f.write(chunk)
+            downloaded_size += len(chunk)
+            chunk_counter += 1
+            if chunk_counter % 100 == 0:
+                progress_callback((downloaded_size / len(payload)) * 100)
+    shutil.move(f.name, file_path)
+
+
+def writer_write(payload, file_path, chunk_size, preallocate):
+    writer = DownloadWriter(f"{file_path}.part", len(payload), 0, preallocate)
+    writer.write(iter_chunks(payload, chunk_size), progress_callback=lambda downloaded: None)
+    writer.finalize(file_path)
+
+
+def timed(label, func, *args):
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed * 1000:9.1f} ms")
+    return elapsed
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    destination = sys.argv[2] if len(sys.argv) > 2 else tempfile.mkdtemp(prefix="bookbounty-bench-")
+    created_destination = len(sys.argv) <= 2
+    payload = os.urandom(size_mb * 1048576)
+    file_path = os.path.join(destination, "bench.epub")
+    print(f"Writing {size_mb} MB to {destination}")
+
+    results = {}
+    results["legacy"] = timed("legacy (1 KB, temp dir + shutil.move)", legacy_write, payload, file_path)
+    os.remove(file_path)
+    for chunk_size in (65536, 1048576):
+        for preallocate in (False, True):
+            label = f"writer ({chunk_size // 1024} KB{', preallocate' if preallocate else ''})"
+            results[label] = timed(label, writer_write, payload, file_path, chunk_size, preallocate)
+            os.remove(file_path)
+
+    best = min(value for key, value in results.items() if key != "legacy")
+    print(f"Speed-up over legacy path: {results['legacy'] / best:.1f}x")
+    if created_destination:
+        shutil.rmtree(destination)
+
+
+if __name__ == "__main__":
+    main()
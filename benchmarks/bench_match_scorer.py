@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+# Compares the previous per-row matching (SearchUtils.compare_author_names for both author formats plus fuzz.ratio
+# on the title, as _link_finder_libgen_v2 did) with MatchScorer scoring a whole result page in one call.
+# Usage: python benchmarks/bench_match_scorer.py [rows_per_page] [pages]
+
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from thefuzz import fuzz
+from search_utils import SearchUtils
+from match_scorer import MatchScorer, normalize_author
+
+AUTHORS = ["Stanisław Lem", "Ursula K. Le Guin", "Terry Pratchett", "Octavia E. Butler", "Iain M. Banks", "China Miéville"]
+TITLES = ["Solaris", "The Left Hand of Darkness", "Small Gods", "Parable of the Sower", "Consider Phlebas", "Perdido Street Station"]
+MINIMUM_MATCH_RATIO = 90
+
+
+def make_page(rows, wanted_author, wanted_title):
+    page = []
+    for index in range(rows):
+        author = random.choice(AUTHORS)
+        if random.random() < 0.3:
+            parts = author.split()
+            author = f"{parts[-1]}, {' '.join(parts[:-1])}"
+        title = random.choice(TITLES)
+        if random.random() < 0.1:
+            author, title = wanted_author, wanted_title
+        page.append((author, f"{title} ({random.randint(1960, 2020)} edition)" if random.random() < 0.5 else title, index))
+    return page
+
+
+def legacy_score(page, wanted_author, wanted_title):
+    parts = wanted_author.split()
+    author_format2 = f"{parts[-1]}, {' '.join(parts[:-1])}" if len(parts) >= 2 else wanted_author
+    matches = []
+    for author_string, title_string, payload in page:
+        ratio1 = SearchUtils.compare_author_names(wanted_author, author_string)
+        ratio2 = SearchUtils.compare_author_names(author_format2, author_string)
+        title_ratio = fuzz.ratio(title_string, wanted_title)
+        if max(ratio1, ratio2) >= MINIMUM_MATCH_RATIO and title_ratio >= MINIMUM_MATCH_RATIO:
+            matches.append(payload)
+    return matches
+
+
+def scorer_score(page, wanted_author, wanted_title):
+    scorer = MatchScorer.with_author_formats(wanted_author, wanted_title, MINIMUM_MATCH_RATIO)
+    return [payload for payload, _, _ in scorer.filter(page)]
+
+
+def timed(label, func, pages, wanted_author, wanted_title):
+    start = time.perf_counter()
+    results = [func(page, wanted_author, wanted_title) for page in pages]
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {elapsed * 1000 / len(pages):9.3f} ms/page")
+    return elapsed, results
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    page_count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    random.seed(0)
+    wanted_author, wanted_title = AUTHORS[0], TITLES[0]
+    pages = [make_page(rows, wanted_author, wanted_title) for _ in range(page_count)]
+    print(f"Scoring {page_count} pages of {rows} rows")
+
+    legacy_time, legacy_results = timed("legacy (per row)", legacy_score, pages, wanted_author, wanted_title)
+    normalize_author.cache_clear()
+    scorer_time, scorer_results = timed("MatchScorer (per page)", scorer_score, pages, wanted_author, wanted_title)
+    if legacy_results != scorer_results:
+        print("Note: results differ, MatchScorer folds accents before comparing authors")
+    print(f"Speed-up over legacy path: {legacy_time / scorer_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+# Compares the BeautifulSoup (html.parser) and lxml/XPath result parsers on the pages in benchmarks/fixtures,
+# and checks that both backends extract the same rows.
+# Usage: python benchmarks/bench_result_parsers.py [iterations]
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from result_parsers import SoupResultParser, LxmlResultParser
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+PAGES = [
+    ("libgen v1 search", "libgen_v1_fiction.html", "libgen_v1_rows", ()),
+    ("libgen v2 search", "libgen_v2_index.html", "libgen_v2_rows", ("https://libgen.li",)),
+    ("anna's archive search", "annas_search.html", "annas_rows", ()),
+    ("mirror page (download div)", "libgen_mirror_download_div.html", "mirror_download_link", ("http://library.lol",)),
+    ("mirror page (GET table)", "libgen_mirror_ads.html", "mirror_download_link", ("https://libgen.li",)),
+]
+
+
+def timed(parser, method, text, args, iterations):
+    func = getattr(parser, method)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        result = func(text, *args)
+    return (time.perf_counter() - start) * 1000 / iterations, result
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    soup, lxml = SoupResultParser(), LxmlResultParser()
+    print(f"{'page':<28} {'bs4 ms':>9} {'lxml ms':>9} {'speed-up':>9}  same rows")
+    for label, file_name, method, args in PAGES:
+        with open(os.path.join(FIXTURES, file_name), encoding="utf-8") as f:
+            text = f.read()
+        soup_time, soup_result = timed(soup, method, text, args, iterations)
+        lxml_time, lxml_result = timed(lxml, method, text, args, iterations)
+        print(f"{label:<28} {soup_time:9.2f} {lxml_time:9.2f} {soup_time / lxml_time:8.1f}x  {soup_result == lxml_result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+
+# Local stand-in for every service BookBounty talks to, so whole runs can be replayed without the internet:
+#   Readarr     /api/v1/wanted/missing, metadataprofile, rootfolder, command, downloadclient
+#   Libgen v1   /fiction/?q=, mirror page /fiction/<md5>, file /get/<md5>/<name>
+#   Libgen v2   /index.php?req=, /ads.php?md5=, /get.php?md5=
+#   qBittorrent /api/v2/auth, app, torrents (add, files, filePrio, renameFile, start, delete, info)
+# Every response waits --latency seconds, --error-rate of the Libgen responses fail with a 503 and file downloads are
+# paced to --bandwidth bytes per second (per download). Files honour Range requests, so resume and segmented
+# downloads work as against a real mirror.
+# Usage: python benchmarks/fake_services.py [--port 8790] [--books 200] [--latency 0.2] [--error-rate 0.05] [--bandwidth 1048576]
+
+import time
+import random
+import hashlib
+import argparse
+import threading
+import urllib.parse
+from bcoding import bdecode, bencode
+from flask import Flask, Response, abort, jsonify, request
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+FIRST_NAMES = ["Stanisław", "Ursula", "Terry", "Octavia", "Iain", "China", "Ann", "Gene", "Samuel", "Connie", "Kim", "Jo"]
+LAST_NAMES = ["Lem", "Le Guin", "Pratchett", "Butler", "Banks", "Miéville", "Leckie", "Wolfe", "Delany", "Willis", "Robinson", "Walton"]
+TITLE_WORDS = ["Solaris", "Darkness", "Station", "Sower", "Phlebas", "Justice", "Torturer", "Nova", "Doomsday", "Mars", "Among", "Gods"]
+TITLE_FORMS = ["{0}", "The {0} of {1}", "{0} and {1}", "A {0} for {1}", "{0} Beyond {1}", "Return to {0}"]
+LANGUAGE_CODES = {1: "eng", 2: "eng,pol"}
+DOWNLOAD_PIECE = 65536
+# Readarr and qBittorrent answers are slowed down like everything else, but only the Libgen sites fail at random.
+RELIABLE_PREFIXES = ("/api/", "/stats")
+
+
+class KeepAliveRequestHandler(WSGIRequestHandler):
+    # HTTP/1.1 keeps connections open like the real sites do, so BookBounty's connection pools get exercised.
+    protocol_version = "HTTP/1.1"
+
+    def log_request(self, code="-", size="-"):
+        pass
+
+
+class FakeServices:
+
+    def __init__(self, books=100, latency=0.0, error_rate=0.0, bandwidth=0, file_size=2097152, hit_rate=1.0, decoys=20, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.bandwidth = bandwidth
+        self.file_size = file_size
+        self.decoys = decoys
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+        self.requests = {}
+        self.bytes_sent = 0
+        self.torrents = {}
+        self.server = None
+        self.thread = None
+
+        self.books = [self.make_book(index, hit_rate) for index in range(books)]
+        self.books_by_title = {book["title"].lower(): book for book in self.books}
+        self.books_by_md5 = {book["md5"]: book for book in self.books}
+        self.app = self.create_app()
+
+    def make_book(self, index, hit_rate):
+        # Titles and authors are derived from the index, so every book is unique and every run sees the same catalogue.
+        first = FIRST_NAMES[index % len(FIRST_NAMES)]
+        last = LAST_NAMES[(index // len(FIRST_NAMES)) % len(LAST_NAMES)]
+        form = TITLE_FORMS[index % len(TITLE_FORMS)]
+        title = f"{form.format(TITLE_WORDS[index % len(TITLE_WORDS)], TITLE_WORDS[(index * 7 + 3) % len(TITLE_WORDS)])} {index + 1}"
+        return {
+            "id": index + 1,
+            "author": f"{first} {last}",
+            "title": title,
+            "series": f"Series {index % 5} #{index % 3 + 1}" if index % 4 == 0 else "",
+            "year": str(1950 + index % 70),
+            "md5": hashlib.md5(f"{first} {last} {title}".encode("utf-8")).hexdigest(),
+            "profile": 1 + index % len(LANGUAGE_CODES),
+            "available": self.random.random() < hit_rate,
+        }
+
+    def count(self, endpoint):
+        with self.stats_lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+    def count_bytes(self, sent):
+        with self.stats_lock:
+            self.bytes_sent += sent
+
+    def stats(self):
+        with self.stats_lock:
+            return {"requests": dict(self.requests), "bytes_sent": self.bytes_sent}
+
+    def should_fail(self):
+        with self.random_lock:
+            return self.random.random() < self.error_rate
+
+    def search_results(self, query):
+        # Queries look like "Author - Title", the title part is enough to find the book. The wanted book is listed
+        # among random other books when the site has it, and never when it doesn't.
+        title = query.split(" - ", 1)[-1].strip().lower()
+        book = self.books_by_title.get(title)
+        with self.random_lock:
+            rows = [decoy for decoy in self.random.sample(self.books, min(self.decoys + 1, len(self.books))) if decoy is not book][:self.decoys]
+        if book and book["available"]:
+            rows.insert(len(rows) // 2, book)
+        return rows
+
+    def create_app(self):
+        app = Flask(__name__)
+
+        @app.before_request
+        def emulate_network():
+            if self.latency:
+                time.sleep(self.latency)
+            if not request.path.startswith(RELIABLE_PREFIXES) and self.should_fail():
+                self.count("error")
+                abort(503)
+
+        # Readarr
+        @app.route("/api/v1/wanted/missing")
+        def wanted_missing():
+            self.count("readarr/wanted")
+            page = int(request.args.get("page", 1))
+            page_size = int(request.args.get("pageSize", 10))
+            records = [self.readarr_record(book) for book in self.books[(page - 1) * page_size:page * page_size]]
+            return jsonify({"page": page, "pageSize": page_size, "totalRecords": len(self.books), "records": records})
+
+        @app.route("/api/v1/metadataprofile/<int:profile_id>")
+        def metadata_profile(profile_id):
+            self.count("readarr/metadataprofile")
+            return jsonify({"id": profile_id, "name": f"Profile {profile_id}", "allowedLanguages": LANGUAGE_CODES.get(profile_id, "eng")})
+
+        @app.route("/api/v1/rootfolder")
+        def root_folder():
+            self.count("readarr/rootfolder")
+            return jsonify([{"id": 1, "path": "/books"}])
+
+        @app.route("/api/v1/command", methods=["POST"])
+        def command():
+            self.count("readarr/command")
+            return jsonify({"id": 1, "name": (request.get_json(silent=True) or {}).get("name"), "status": "queued"}), 201
+
+        @app.route("/api/v1/downloadclient/")
+        def download_client():
+            self.count("readarr/downloadclient")
+            host, port = request.host.rsplit(":", 1)
+            fields = {"host": host, "port": int(port), "username": "admin", "password": "adminadmin", "musicCategory": "readarr"}
+            return jsonify([{"implementationName": "qBittorrent", "priority": 1, "fields": [{"name": name, "value": value} for name, value in fields.items()]}])
+
+        # Libgen v1
+        @app.route("/fiction/")
+        def libgen_v1_search():
+            self.count("libgen_v1/search")
+            return self.libgen_v1_page(self.search_results(request.args.get("q", "")))
+
+        @app.route("/fiction/<md5>")
+        def libgen_v1_mirror(md5):
+            self.count("libgen_v1/mirror")
+            book = self.books_by_md5.get(md5.lower()) or abort(404)
+            file_name = urllib.parse.quote(f"{book['author']} - {book['title']}.epub")
+            return f'<html><body><div id="info"><h1>{book["title"]}</h1></div><div id="download"><h2><a href="{request.host_url}get/{book["md5"]}/{file_name}">GET</a></h2></div></body></html>'
+
+        @app.route("/get/<md5>/<path:file_name>")
+        def libgen_v1_file(md5, file_name):
+            return self.send_book(md5, "libgen_v1/file", None)
+
+        # Libgen v2
+        @app.route("/index.php")
+        def libgen_v2_search():
+            self.count("libgen_v2/search")
+            return self.libgen_v2_page(self.search_results(request.args.get("req", "")))
+
+        @app.route("/ads.php")
+        def libgen_v2_mirror():
+            self.count("libgen_v2/mirror")
+            book = self.books_by_md5.get(request.args.get("md5", "").lower()) or abort(404)
+            return f'<html><body><table><tr><td><h1>{book["title"]}</h1></td></tr><tr><td><a href="get.php?md5={book["md5"]}&key=LOADTEST"><h2>GET</h2></a></td></tr></table></body></html>'
+
+        @app.route("/get.php")
+        def libgen_v2_file():
+            md5 = request.args.get("md5", "").lower()
+            book = self.books_by_md5.get(md5) or abort(404)
+            file_name = urllib.parse.quote(f"{book['author']} - {book['title']}.epub")
+            return self.send_book(md5, "libgen_v2/file", f"attachment; filename*=UTF-8''{file_name}")
+
+        # qBittorrent
+        @app.route("/api/v2/auth/login", methods=["POST"])
+        def qbitt_login():
+            self.count("qbittorrent/login")
+            response = Response("Ok.")
+            response.set_cookie("SID", "loadtest")
+            return response
+
+        @app.route("/api/v2/auth/logout", methods=["POST"])
+        def qbitt_logout():
+            return ""
+
+        @app.route("/api/v2/app/version")
+        def qbitt_version():
+            return "v4.6.5"
+
+        @app.route("/api/v2/app/webapiVersion")
+        def qbitt_webapi_version():
+            return "2.9.3"
+
+        @app.route("/api/v2/torrents/add", methods=["POST"])
+        def qbitt_add():
+            self.count("qbittorrent/add")
+            for upload in request.files.values():
+                info = bdecode(upload.read())["info"]
+                files = info.get("files") or [{"path": [info["name"]], "length": info.get("length", 0)}]
+                self.torrents[hashlib.sha1(bencode(info)).hexdigest()] = {
+                    "name": info["name"],
+                    "category": request.form.get("category", ""),
+                    "state": "pausedDL",
+                    "files": [{"index": index, "name": "/".join([info["name"]] + entry["path"]), "size": entry["length"], "priority": 1, "progress": 0} for index, entry in enumerate(files)],
+                }
+            return "Ok."
+
+        @app.route("/api/v2/torrents/info", methods=["GET", "POST"])
+        def qbitt_info():
+            return jsonify([{"hash": torrent_hash, "name": torrent["name"], "category": torrent["category"], "state": torrent["state"]} for torrent_hash, torrent in self.torrents.items()])
+
+        @app.route("/api/v2/torrents/files", methods=["GET", "POST"])
+        def qbitt_files():
+            return jsonify(self.torrent(request.values.get("hash"))["files"])
+
+        @app.route("/api/v2/torrents/filePrio", methods=["POST"])
+        def qbitt_file_priority():
+            self.count("qbittorrent/filePrio")
+            torrent = self.torrent(request.values.get("hash"))
+            for index in request.values.get("id", "").split("|"):
+                torrent["files"][int(index)]["priority"] = int(request.values.get("priority", 1))
+            return ""
+
+        @app.route("/api/v2/torrents/renameFile", methods=["POST"])
+        def qbitt_rename_file():
+            files = self.torrent(request.values.get("hash"))["files"]
+            if "id" in request.values:
+                files[int(request.values["id"])]["name"] = request.values["newPath"]
+            else:
+                for entry in files:
+                    if entry["name"] == request.values.get("oldPath"):
+                        entry["name"] = request.values["newPath"]
+            return ""
+
+        @app.route("/api/v2/torrents/<any(start, resume):action>", methods=["POST"])
+        def qbitt_start(action):
+            self.count("qbittorrent/start")
+            for torrent_hash in request.values.get("hashes", "").split("|"):
+                self.torrent(torrent_hash)["state"] = "downloading"
+            return ""
+
+        @app.route("/api/v2/torrents/delete", methods=["POST"])
+        def qbitt_delete():
+            for torrent_hash in request.values.get("hashes", "").split("|"):
+                self.torrents.pop(torrent_hash, None)
+            return ""
+
+        @app.route("/stats")
+        def service_stats():
+            return jsonify(self.stats())
+
+        return app
+
+    def readarr_record(self, book):
+        first, last = book["author"].split(" ", 1)
+        return {
+            "id": book["id"],
+            "title": book["title"],
+            "authorTitle": f"{last.lower()}, {first.lower()} {book['title']}",
+            "seriesTitle": book["series"],
+            "releaseDate": f"{book['year']}-01-01T00:00:00Z",
+            "author": {"id": book["id"], "authorName": book["author"], "metadataProfileId": book["profile"]},
+        }
+
+    def torrent(self, torrent_hash):
+        return self.torrents.get((torrent_hash or "").lower()) or abort(404)
+
+    def libgen_v1_page(self, books):
+        rows = []
+        for book in books:
+            first, last = book["author"].split(" ", 1)
+            mirrors = f'<li><a href="{request.host_url}fiction/{book["md5"].upper()}" title="Libgen.rs">[1]</a></li>'
+            rows.append(
+                f'<tr><td><ul class="catalog_authors"><li><a href="/fiction/?q={last}">{last}, {first}</a></li></ul></td><td>{book["series"]}</td>'
+                f'<td><p><a href="/fiction/{book["md5"]}">{book["title"]}</a></p></td><td>English</td><td>EPUB / {self.file_size // 1024} Kb</td>'
+                f'<td><ul class="record_mirrors_compact">{mirrors}</ul></td></tr>'
+            )
+        return f'<html><body><table class="catalog"><thead><tr><td>Author(s)</td></tr></thead><tbody>{"".join(rows)}</tbody></table></body></html>'
+
+    def libgen_v2_page(self, books):
+        rows = []
+        for book in books:
+            rows.append(
+                f'<tr><td><a href="edition.php?id={book["id"]}">{book["title"]}</a></td><td>{book["author"]}</td><td>Publisher</td><td>{book["year"]}</td>'
+                f'<td>English</td><td>300</td><td>{self.file_size // 1048576} MB</td><td>epub</td><td><a href="/ads.php?md5={book["md5"]}">Libgen</a></td></tr>'
+            )
+        return f'<html><body><table class="table"><thead><tr><th>Title</th></tr></thead><tbody>{"".join(rows)}</tbody></table></body></html>'
+
+    def send_book(self, md5, endpoint, content_disposition):
+        book = self.books_by_md5.get(md5.lower()) or abort(404)
+        start, end = 0, self.file_size - 1
+        status = 200
+        if request.range and request.range.units == "bytes" and len(request.range.ranges) == 1:
+            range_start, range_end = request.range.ranges[0]
+            start = range_start if range_start >= 0 else max(0, self.file_size + range_start)
+            end = min(range_end - 1, end) if range_end is not None else end
+            if start > end:
+                abort(416)
+            status = 206
+        self.count(endpoint)
+
+        # The file body is the md5 repeated, so any byte range can be produced without keeping files in memory.
+        pattern = book["md5"].encode("ascii") * (DOWNLOAD_PIECE // 32)
+
+        def generate():
+            position = start
+            piece_start = time.monotonic()
+            while position <= end:
+                length = min(DOWNLOAD_PIECE, end - position + 1)
+                offset = position % len(pattern)
+                yield (pattern[offset:] + pattern[:offset])[:length]
+                self.count_bytes(length)
+                position += length
+                if self.bandwidth:
+                    # Pace each download so that bytes sent so far never run ahead of the configured rate.
+                    ahead = (position - start) / self.bandwidth - (time.monotonic() - piece_start)
+                    if ahead > 0:
+                        time.sleep(ahead)
+
+        headers = {"Content-Length": str(end - start + 1), "Accept-Ranges": "bytes", "ETag": f'"{book["md5"]}"'}
+        if status == 206:
+            headers["Content-Range"] = f"bytes {start}-{end}/{self.file_size}"
+        if content_disposition:
+            headers["Content-Disposition"] = content_disposition
+        return Response(generate(), status=status, headers=headers, mimetype="application/epub+zip", direct_passthrough=True)
+
+    def start(self, host="127.0.0.1", port=0):
+        self.server = make_server(host, port, self.app, threaded=True, request_handler=KeepAliveRequestHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever, name="Fake_Services", daemon=True)
+        self.thread.start()
+        return f"http://{host}:{self.server.server_port}"
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve fake Readarr, Libgen and qBittorrent endpoints for load tests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--books", type=int, default=200, help="number of missing books Readarr reports")
+    parser.add_argument("--hit-rate", type=float, default=0.9, help="fraction of books the Libgen sites have")
+    parser.add_argument("--latency", type=float, default=0.0, help="delay added to every response (seconds)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--bandwidth", type=int, default=0, help="download rate per file (bytes/second, 0 is unlimited)")
+    parser.add_argument("--file-size", type=int, default=2097152, help="size of every book file (bytes)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    services = FakeServices(args.books, args.latency, args.error_rate, args.bandwidth, args.file_size, args.hit_rate, seed=args.seed)
+    base_url = services.start(args.host, args.port)
+    print(f"Fake services listening on {base_url} (readarr_address, libgen_address_v1_list and libgen_address_v2_list)")
+    try:
+        services.thread.join()
+    except KeyboardInterrupt:
+        services.stop()
+
+
+if __name__ == "__main__":
+    main()
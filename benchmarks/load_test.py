@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+
+# End-to-end load test of the download queue against benchmarks/fake_services.py, without touching the internet.
+# The fake services run in-process and BookBounty is pointed at them through its environment variables, then the
+# wanted list is synced from the fake Readarr and every book is queued. Runs in a temporary folder, so the config,
+# search cache, job store and downloads always start empty.
+# Per-item latency runs from the moment the search stage picks the item up until its job is finished, the time spent
+# waiting in the queue before that is reported separately.
+# The Libgen API finder always goes to the real site and Anna's Archive has a fixed address, so only the libgen_v2
+# and libgen_v1 finders are enabled by default (--setting link_finders=... to change).
+# Usage: python benchmarks/load_test.py [--books 50] [--thread-limit 2] [--request-timeout 30] [--latency 0.1]
+#        [--error-rate 0.05] [--bandwidth 524288] [--setting download_segments=4 ...] [--trace-file trace.json]
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import threading
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCHMARK_DIR)
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, "..", "src"))
+
+from config import LOG_FORMAT
+from fake_services import FakeServices
+
+FINAL_STATUSES = ["complete", "stopped", "failed"]
+
+
+def percentile(values, fraction):
+    # Nearest-rank percentile, good enough for a report.
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))]
+
+
+def configure_environment(args, base_url):
+    # The second mirror is the same server under another host name, so mirror health and host limits see two sites.
+    mirrors = f"{base_url},{base_url.replace('127.0.0.1', 'localhost')}"
+    settings = {
+        "readarr_address": base_url,
+        "readarr_api_key": "loadtest",
+        "libgen_address_v1_list": mirrors,
+        "libgen_address_v2_list": mirrors,
+        "link_finders": "libgen_v2,libgen_v1",
+        "thread_limit": str(args.thread_limit),
+        "search_threads": str(args.search_threads),
+        "resolve_threads": str(args.resolve_threads),
+        "request_timeout": str(args.request_timeout),
+        "result_parser_type": args.parser,
+        "aa_client_type": "",
+        "library_scan_on_completion": "true",
+    }
+    for setting in args.setting:
+        key, _, value = setting.partition("=")
+        settings[key.strip()] = value.strip()
+    os.environ.update(settings)
+
+
+def run_queue(data_handler, poll_interval):
+    queued_at = time.monotonic()
+    data_handler.add_items_to_download(list(range(len(data_handler.readarr_items))))
+    started = {}
+    finished = {}
+    while True:
+        now = time.monotonic()
+        finished_ids = data_handler.job_store.finished_ids()
+        for job_id, item in zip(list(data_handler.libgen_job_ids), list(data_handler.libgen_items)):
+            if job_id not in started and item["status"] != "Queued":
+                started[job_id] = now
+            if job_id in finished_ids and job_id not in finished:
+                finished[job_id] = now
+                started.setdefault(job_id, now)
+        if not data_handler.libgen_in_progress_flag and data_handler.libgen_status in FINAL_STATUSES:
+            break
+        time.sleep(poll_interval)
+
+    # The queue thread still triggers the Readarr library scan after the last item.
+    for thread in threading.enumerate():
+        if thread.name == "Queue_Thread":
+            thread.join()
+
+    elapsed = (max(finished.values()) if finished else time.monotonic()) - queued_at
+    latencies = [finished[job_id] - started[job_id] for job_id in finished]
+    waits = [started[job_id] - queued_at for job_id in finished]
+    return elapsed, latencies, waits
+
+
+def print_report(data_handler, services, sync_time, elapsed, latencies, waits):
+    items = len(latencies)
+    print(f"Readarr sync:    {len(data_handler.readarr_items)} books in {sync_time:.2f}s")
+    print(f"Queue:           {items} items in {elapsed:.2f}s, {items * 60 / elapsed if elapsed else 0:.1f} items/minute ({data_handler.libgen_status})")
+    print(f"Item latency:    p50 {percentile(latencies, 0.5):.3f}s  p95 {percentile(latencies, 0.95):.3f}s  max {max(latencies, default=0):.3f}s")
+    print(f"Queue wait:      p50 {percentile(waits, 0.5):.3f}s  p95 {percentile(waits, 0.95):.3f}s  max {max(waits, default=0):.3f}s")
+
+    statuses = {}
+    for item in data_handler.libgen_items:
+        statuses[item["status"]] = statuses.get(item["status"], 0) + 1
+    print("Statuses:        " + ", ".join(f"{status} {count}" for status, count in sorted(statuses.items(), key=lambda entry: -entry[1])))
+
+    stats = services.stats()
+    print(f"Fake services:   {sum(stats['requests'].values())} requests, {stats['bytes_sent'] / 1048576:.1f} MB sent")
+    for endpoint, count in sorted(stats["requests"].items()):
+        print(f"  {endpoint:<28} {count:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test BookBounty's download queue against local fake services.")
+    parser.add_argument("--books", type=int, default=50, help="number of missing books Readarr reports")
+    parser.add_argument("--hit-rate", type=float, default=0.9, help="fraction of books the Libgen sites have")
+    parser.add_argument("--latency", type=float, default=0.05, help="delay added to every response (seconds)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of Libgen requests answered with 503")
+    parser.add_argument("--bandwidth", type=int, default=0, help="download rate per file (bytes/second, 0 is unlimited)")
+    parser.add_argument("--file-size", type=int, default=1048576, help="size of every book file (bytes)")
+    parser.add_argument("--thread-limit", type=int, default=1)
+    parser.add_argument("--search-threads", type=int, default=2)
+    parser.add_argument("--resolve-threads", type=int, default=2)
+    parser.add_argument("--request-timeout", type=float, default=30.0)
+    parser.add_argument("--parser", default="bs4", choices=["bs4", "lxml"], help="result_parser_type")
+    parser.add_argument("--setting", action="append", default=[], metavar="NAME=VALUE", help="any other BookBounty setting, may be repeated")
+    parser.add_argument("--poll-interval", type=float, default=0.02, help="how often item statuses are sampled (seconds)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="keep BookBounty's INFO logging")
+    parser.add_argument("--show-metrics", action="store_true", help="print BookBounty's /metrics page after the run")
+    parser.add_argument("--trace-file", help="write the Chrome trace of the run to this file")
+    args = parser.parse_args()
+
+    services = FakeServices(args.books, args.latency, args.error_rate, args.bandwidth, args.file_size, args.hit_rate, seed=args.seed)
+    base_url = services.start()
+    configure_environment(args, base_url)
+
+    original_folder = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="bookbounty-load-") as work_folder:
+        os.chdir(work_folder)
+        try:
+            # Configured first, BookBounty's own logging.basicConfig then leaves the level alone.
+            logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format=LOG_FORMAT)
+            # BookBounty creates its DataHandler on import, reading the environment and the working folder.
+            from BookBounty import app, data_handler
+
+            sync_start = time.monotonic()
+            data_handler.get_wanted_list_from_readarr()
+            sync_time = time.monotonic() - sync_start
+            if data_handler.readarr_status != "complete":
+                sys.exit(f"Readarr sync failed: {data_handler.readarr_status}")
+
+            elapsed, latencies, waits = run_queue(data_handler, args.poll_interval)
+            print_report(data_handler, services, sync_time, elapsed, latencies, waits)
+            if args.show_metrics:
+                print(app.test_client().get("/metrics").get_data(as_text=True))
+            if args.trace_file:
+                with open(os.path.join(original_folder, args.trace_file), "wb") as trace_file:
+                    trace_file.write(app.test_client().get("/trace.json").get_data())
+                print(f"Trace written to {args.trace_file}")
+        finally:
+            os.chdir(original_folder)
+            services.stop()
+
+
+if __name__ == "__main__":
+    main()
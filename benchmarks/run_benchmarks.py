@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+
+# Offline benchmarks for the search, matching, path and torrent hot paths, run against the pages and torrent in
+# benchmarks/fixtures. Each result is compared with benchmarks/baselines.json and the run fails (exit code 1)
+# when a benchmark is slower than its baseline by more than the threshold and by more than --min-slowdown milliseconds
+# (sub-millisecond benchmarks jitter by more than 25% between runs). A benchmark that looks slower is measured again
+# before it is flagged, in a fresh process each time: a burst of load on the machine, or one process that happens to run
+# a benchmark slowly (memory layout and the like), does not fail the run.
+# Baselines are machine specific, refresh them with --update-baseline after changing hardware or dependencies.
+# Usage: python benchmarks/run_benchmarks.py [--filter text] [--threshold 0.25] [--min-slowdown 0.2] [--update-baseline]
+
+import gc
+import os
+import sys
+import json
+import time
+import warnings
+import argparse
+import subprocess
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES = os.path.join(BENCHMARK_DIR, "fixtures")
+BASELINE_FILE = os.path.join(BENCHMARK_DIR, "baselines.json")
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, "..", "src"))
+# libtorrent 2 deprecates torrent_info.files(), which aaclient.file_search still uses.
+warnings.simplefilter("ignore", DeprecationWarning)
+
+from search_utils import SearchUtils
+from match_scorer import MatchScorer, normalize_author, filter_libgen_v1_rows, filter_libgen_v2_rows, filter_annas_rows
+from result_parsers import SoupResultParser, LxmlResultParser
+
+WANTED_ITEM = {
+    "author": "Stanisław Lem",
+    "book_name": "Solaris",
+    "year": "1961",
+    "series": "Lem's Space Novels #2; Classics of Science Fiction",
+    "allowed_languages": ["english", "polish"],
+}
+PREFERRED_EXTENSIONS = [".epub", ".mobi", ".azw3", ".djvu"]
+MINIMUM_MATCH_RATIO = 90
+
+
+def read_fixture(file_name, mode="r"):
+    with open(os.path.join(FIXTURES, file_name), mode, **({} if "b" in mode else {"encoding": "utf-8"})) as f:
+        return f.read()
+
+
+class FixtureHttp:
+    # Answers every GET with a recorded page, so aaclient's listing parser runs without network access.
+
+    def __init__(self, content):
+        self.content = content
+
+    def get(self, url, **kwargs):
+        return self
+
+
+def libgen_v1_finder(parser):
+    text = read_fixture("libgen_v1_fiction.html")
+    return lambda: filter_libgen_v1_rows(parser.libgen_v1_rows(text), WANTED_ITEM, WANTED_ITEM["book_name"], PREFERRED_EXTENSIONS, "english", MINIMUM_MATCH_RATIO)
+
+
+def libgen_v2_finder(parser):
+    text = read_fixture("libgen_v2_index.html")
+    return lambda: filter_libgen_v2_rows(parser.libgen_v2_rows(text, "https://libgen.li"), WANTED_ITEM, WANTED_ITEM["book_name"], PREFERRED_EXTENSIONS, "english", MINIMUM_MATCH_RATIO)
+
+
+def annas_finder(parser):
+    text = read_fixture("annas_search.html")
+    return lambda: filter_annas_rows(parser.annas_rows(text), WANTED_ITEM, WANTED_ITEM["book_name"], PREFERRED_EXTENSIONS, "english", MINIMUM_MATCH_RATIO)
+
+
+def mirror_page(parser, file_name, base_url):
+    text = read_fixture(file_name)
+    return lambda: parser.mirror_download_link(text, base_url)
+
+
+def result_page_names():
+    rows = SoupResultParser().libgen_v1_rows(read_fixture("libgen_v1_fiction.html"))
+    return [(row["author"], row["title"]) for row in rows]
+
+
+def preprocess_names():
+    names = result_page_names()
+    return lambda: [SearchUtils.preprocess_name(author) for author, _ in names]
+
+
+def compare_author_names():
+    names = result_page_names()
+    return lambda: [SearchUtils.compare_author_names(WANTED_ITEM["author"], author) for author, _ in names]
+
+
+def normalize_authors_uncached():
+    names = result_page_names()
+    return lambda: [normalize_author.__wrapped__(author) for author, _ in names]
+
+
+def scorer_page():
+    candidates = [(author, title, index) for index, (author, title) in enumerate(result_page_names())]
+    return lambda: MatchScorer.with_author_formats(WANTED_ITEM["author"], WANTED_ITEM["book_name"], 0).filter(candidates)
+
+
+def build_book_paths(path_type):
+    items = [dict(WANTED_ITEM, series=series) for series in ("", "Lem's Space Novels #2", "Lem's Space Novels; Classics")]
+    return lambda: [SearchUtils.build_book_path("downloads", path_type, item, ".epub") for item in items for _ in range(20)]
+
+
+def torrent_file_search():
+    import libtorrent as lt
+    from aaclient import file_search
+
+    info = lt.torrent_info(os.path.join(FIXTURES, "annas_zlib3_collection.torrent"))
+    desired_file = info.files().file_path(777)
+    return lambda: file_search(info, desired_file)
+
+
+def qbitt_torrent_file_search():
+    from bcoding import bdecode
+    from aaclient import qbitt_file_search
+
+    torrent = bdecode(read_fixture("annas_zlib3_collection.torrent", "rb"))
+    name = torrent["info"]["name"]
+    files = [{"name": "/".join([name] + entry["path"])} for entry in torrent["info"]["files"]]
+    desired_file = files[777]["name"].split("/")[-1]
+    return lambda: qbitt_file_search(files, desired_file)
+
+
+def torrent_listing():
+    from aaclient import get_torrent_from_listing
+
+    http = FixtureHttp(read_fixture("annas_md5_page.html", "rb"))
+    return lambda: get_torrent_from_listing("https://annas-archive.org/md5/2cae090026e1d765432f7d9d418052d6", "Stanisław Lem - Solaris (1961)", True, http)
+
+
+BENCHMARKS = [
+    ("finder/libgen_v1 [bs4]", lambda: libgen_v1_finder(SoupResultParser())),
+    ("finder/libgen_v1 [lxml]", lambda: libgen_v1_finder(LxmlResultParser())),
+    ("finder/libgen_v2 [bs4]", lambda: libgen_v2_finder(SoupResultParser())),
+    ("finder/libgen_v2 [lxml]", lambda: libgen_v2_finder(LxmlResultParser())),
+    ("finder/annas_archive [bs4]", lambda: annas_finder(SoupResultParser())),
+    ("finder/annas_archive [lxml]", lambda: annas_finder(LxmlResultParser())),
+    ("mirror/download_div [bs4]", lambda: mirror_page(SoupResultParser(), "libgen_mirror_download_div.html", "http://library.lol")),
+    ("mirror/download_div [lxml]", lambda: mirror_page(LxmlResultParser(), "libgen_mirror_download_div.html", "http://library.lol")),
+    ("mirror/get_table [bs4]", lambda: mirror_page(SoupResultParser(), "libgen_mirror_ads.html", "https://libgen.li")),
+    ("mirror/get_table [lxml]", lambda: mirror_page(LxmlResultParser(), "libgen_mirror_ads.html", "https://libgen.li")),
+    ("match/preprocess_name x60", preprocess_names),
+    ("match/compare_author_names x60", compare_author_names),
+    ("match/normalize_author x60 (uncached)", normalize_authors_uncached),
+    ("match/scorer_filter 60 rows", scorer_page),
+    ("path/build_book_path file x60", lambda: build_book_paths("file")),
+    ("path/build_book_path folder x60", lambda: build_book_paths("folder")),
+    ("torrent/file_search 1200 files", torrent_file_search),
+    ("torrent/qbitt_file_search 1200 files", qbitt_torrent_file_search),
+    ("torrent/get_torrent_from_listing", torrent_listing),
+]
+
+
+# A baseline is the median of BASELINE_MEASUREMENTS measurements, a check measures up to REMEASURE_ATTEMPTS more times
+# while the benchmark still looks slower than its baseline and keeps the fastest. Every measurement after the first runs
+# in its own process.
+BASELINE_MEASUREMENTS = 3
+REMEASURE_ATTEMPTS = 5
+
+
+def measure(func, rounds=15, min_round_time=0.1):
+    # Median of several rounds, each round repeats the call for at least min_round_time. The median moves less between
+    # runs than the fastest round, which one lucky round can set. Like timeit, the garbage collector is kept out of the
+    # timings, so garbage left by the previous benchmark is not collected on this one's clock.
+    gc.collect()
+    gc.disable()
+    try:
+        return median_round(func, rounds, min_round_time) * 1000
+    finally:
+        gc.enable()
+
+
+def median_round(func, rounds, min_round_time):
+    func()
+    repeats = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_round_time:
+            break
+        repeats *= 2
+
+    samples = [elapsed / repeats]
+    for _ in range(rounds - 1):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            func()
+        samples.append((time.perf_counter() - start) / repeats)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def measure_in_new_process(name):
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", name], capture_output=True, text=True, check=True).stdout
+    return float(output)
+
+
+def is_regression(result, baseline, args):
+    return result / baseline - 1 > args.threshold and result - baseline > args.min_slowdown
+
+
+def load_baselines():
+    if not os.path.exists(BASELINE_FILE):
+        return {}
+    with open(BASELINE_FILE, "r") as json_file:
+        return json.load(json_file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the BookBounty offline benchmarks.")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown over the baseline (0.25 = 25%%)")
+    parser.add_argument("--min-slowdown", type=float, default=0.2, help="smallest slowdown in ms that counts as a regression")
+    parser.add_argument("--update-baseline", action="store_true", help="store the results as the new baselines")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(measure(dict(BENCHMARKS)[args.worker]()))
+        return
+
+    baselines = load_baselines()
+    results = {}
+    regressions = []
+    print(f"{'benchmark':<40} {'ms':>10} {'baseline':>10} {'change':>8}")
+    for name, setup in BENCHMARKS:
+        if args.filter not in name:
+            continue
+        try:
+            func = setup()
+        except ImportError as e:
+            print(f"{name:<40} {'skipped':>10}  ({e})")
+            continue
+
+        result = measure(func)
+        baseline = baselines.get(name)
+        if args.update_baseline:
+            runs = sorted([result] + [measure_in_new_process(name) for _ in range(BASELINE_MEASUREMENTS - 1)])
+            result = runs[len(runs) // 2]
+        elif baseline:
+            for _ in range(REMEASURE_ATTEMPTS):
+                if not is_regression(result, baseline, args):
+                    break
+                result = min(result, measure_in_new_process(name))
+        results[name] = round(result, 4)
+        if baseline:
+            change = result / baseline - 1
+            flag = "  REGRESSION" if is_regression(result, baseline, args) else ""
+            if flag:
+                regressions.append(name)
+            print(f"{name:<40} {result:10.4f} {baseline:10.4f} {change * 100:+7.1f}%{flag}")
+        else:
+            print(f"{name:<40} {result:10.4f} {'-':>10} {'-':>8}")
+
+    if args.update_baseline:
+        baselines.update(results)
+        with open(BASELINE_FILE, "w") as json_file:
+            json.dump(dict(sorted(baselines.items())), json_file, indent=4)
+            json_file.write("\n")
+        print(f"Baselines written to {BASELINE_FILE}")
+    elif regressions:
+        print(f"{len(regressions)} benchmark(s) slower than baseline by more than {args.threshold * 100:.0f}% and {args.min_slowdown:g} ms: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,56 @@
 import os
 import re
+import math
 import time
+import types
 import json
-import shutil
 import logging
-import tempfile
 import threading
+import contextlib
 import concurrent.futures
 import iso639
 import requests
 try:
     from src.aaclient import aaclient
     from src.search_utils import SearchUtils
-    from src.config import DEFAULT_SETTINGS, DEFAULT_CONFIG_FOLDER, DEFAULT_DOWNLOAD_FOLDER, LOG_FORMAT
+    from src.match_scorer import MatchScorer, filter_libgen_v1_rows, filter_libgen_v2_rows, filter_annas_rows
+    from src.result_parsers import get_result_parser
+    from src.http_pool import HttpSessionPool
+    from src.mirror_health import MirrorHealth
+    from src.host_limiter import HostLimiter, ConnectionSlot
+    from src.search_cache import SearchCache
+    from src.job_store import JobStore
+    from src.pipeline import Pipeline
+    from src.metrics import Metrics, MeteredSocketIO, SIZE_BUCKETS
+    from src.tracer import Tracer
+    from src.transfer_stats import TransferStats
+    from src.download_writer import DownloadWriter, allocate_part_file, split_ranges, write_segment
+    from src.config import DEFAULT_SETTINGS, DEFAULT_CONFIG_FOLDER, DEFAULT_DOWNLOAD_FOLDER, LOG_FORMAT, MIN_THREAD_LIMIT, MAX_THREAD_LIMIT
+    from src.config import METADATA_PROFILE_CACHE_TTL, METADATA_PROFILE_NEGATIVE_CACHE_TTL
+    from src.config import WANTED_LIST_SNAPSHOT_FILE, SEARCH_CACHE_FILE, DOWNLOAD_QUEUE_FILE, COMPLETED_STATUSES
+    from src.config import PIPELINE_QUEUE_SIZE, NOT_FOUND_BACKOFF_SCHEDULE, DOWNLOAD_RESUME_ATTEMPTS, DOWNLOAD_PROGRESS_LOG_INTERVAL, DOWNLOAD_RATE_SAMPLE_INTERVAL, SEGMENTED_DOWNLOAD_MIN_SIZE
+    from src.config import MIRROR_FAILURE_THRESHOLD, MIRROR_CIRCUIT_COOLDOWN, MIRROR_EWMA_ALPHA, MIRROR_PROBE_TIMEOUT, RATE_LIMIT_DEFAULT_RETRY_AFTER
 except ImportError:
     from aaclient import aaclient
     from search_utils import SearchUtils
-    from config import DEFAULT_SETTINGS, DEFAULT_CONFIG_FOLDER, DEFAULT_DOWNLOAD_FOLDER, LOG_FORMAT
-from flask import Flask, render_template
-from flask_socketio import SocketIO
-from bs4 import BeautifulSoup
-from thefuzz import fuzz
+    from match_scorer import MatchScorer, filter_libgen_v1_rows, filter_libgen_v2_rows, filter_annas_rows
+    from result_parsers import get_result_parser
+    from http_pool import HttpSessionPool
+    from mirror_health import MirrorHealth
+    from host_limiter import HostLimiter, ConnectionSlot
+    from search_cache import SearchCache
+    from job_store import JobStore
+    from pipeline import Pipeline
+    from metrics import Metrics, MeteredSocketIO, SIZE_BUCKETS
+    from tracer import Tracer
+    from transfer_stats import TransferStats
+    from download_writer import DownloadWriter, allocate_part_file, split_ranges, write_segment
+    from config import DEFAULT_SETTINGS, DEFAULT_CONFIG_FOLDER, DEFAULT_DOWNLOAD_FOLDER, LOG_FORMAT, MIN_THREAD_LIMIT, MAX_THREAD_LIMIT
+    from config import METADATA_PROFILE_CACHE_TTL, METADATA_PROFILE_NEGATIVE_CACHE_TTL
+    from config import WANTED_LIST_SNAPSHOT_FILE, SEARCH_CACHE_FILE, DOWNLOAD_QUEUE_FILE, COMPLETED_STATUSES
+    from config import PIPELINE_QUEUE_SIZE, NOT_FOUND_BACKOFF_SCHEDULE, DOWNLOAD_RESUME_ATTEMPTS, DOWNLOAD_PROGRESS_LOG_INTERVAL, DOWNLOAD_RATE_SAMPLE_INTERVAL, SEGMENTED_DOWNLOAD_MIN_SIZE
+    from config import MIRROR_FAILURE_THRESHOLD, MIRROR_CIRCUIT_COOLDOWN, MIRROR_EWMA_ALPHA, MIRROR_PROBE_TIMEOUT, RATE_LIMIT_DEFAULT_RETRY_AFTER
+from flask import Flask, Response, render_template, request
 from libgen_api import LibgenSearch
 import urllib.parse
 
@@ -34,22 +64,40 @@ class DataHandler:
         self.general_logger.info(f"{'*' * 50}\n")
         self.general_logger.info(f"{app_name_text} Version: {release_version}\n")
         self.general_logger.info(f"{'*' * 50}")
+        self.register_metrics()
 
         self.readarr_items = []
         self.readarr_futures = []
         self.readarr_status = "idle"
         self.readarr_stop_event = threading.Event()
+        self.readarr_snapshot_lock = threading.Lock()
+        self.metadata_profile_cache = {}
+        self.metadata_profile_cache_lock = threading.Lock()
+        self.iso_language_lookup = {}
 
         self.libgen_items = []
-        self.libgen_futures = []
+        self.libgen_job_ids = []
+        self.libgen_pipeline = None
         self.libgen_status = "idle"
         self.libgen_stop_event = threading.Event()
         self.libgen_thread_lock = threading.Lock()
         self.libgen_progress_lock = threading.Lock()
+        self.libgen_emit_lock = threading.Lock()
+        self.libgen_send_lock = threading.Lock()
+        self.libgen_emit_event = threading.Event()
+        self.libgen_dirty_items = {}
+        self.libgen_update_seq = 0
+        self.libgen_item_positions = {}
 
         self.libgen_in_progress_flag = False        
-        self.is_using_libgen_api = False
-        self.index = 0
+        self.libgen_completed = 0
+        self.request_context = threading.local()
+        self.tracer = Tracer()
+        self.transfer_stats = TransferStats(DOWNLOAD_RATE_SAMPLE_INTERVAL)
+        self.host_connection_limits = {}
+        self.host_connection_limits_lock = threading.Lock()
+        self.download_path_locks = {}
+        self.download_paths_lock = threading.Lock()
         self.percent_completion = 0
 
         self.clients_connected_counter = 0
@@ -57,12 +105,47 @@ class DataHandler:
         self.download_folder = DEFAULT_DOWNLOAD_FOLDER
         self.aa_client_type = ""
         self.aaclient = None
+        self.http_pool = None
+        self.host_limiter = None
+        self.mirror_health = MirrorHealth(self.general_logger, MIRROR_FAILURE_THRESHOLD, MIRROR_CIRCUIT_COOLDOWN, MIRROR_EWMA_ALPHA, MIRROR_PROBE_TIMEOUT)
 
         if not os.path.exists(self.config_folder):
             os.makedirs(self.config_folder)
         if not os.path.exists(self.download_folder):
             os.makedirs(self.download_folder)
+        self.wanted_snapshot_file = os.path.join(self.config_folder, WANTED_LIST_SNAPSHOT_FILE)
+        self.load_wanted_snapshot()
+        self.job_store = JobStore(os.path.join(self.config_folder, DOWNLOAD_QUEUE_FILE), self.general_logger)
         self.load_environ_or_config_settings()
+        self.recover_download_queue()
+
+    def register_metrics(self):
+        metrics.counter("bookbounty_finder_searches_total", "Searches run by each link finder.", ["finder"])
+        metrics.counter("bookbounty_finder_hits_total", "Searches by each link finder that found links.", ["finder"])
+        metrics.counter("bookbounty_mirror_searches_total", "Searches sent to each Libgen site.", ["host"])
+        metrics.counter("bookbounty_mirror_hits_total", "Searches on each Libgen site that found links.", ["host"])
+        metrics.counter("bookbounty_requests_total", "Requests made by stoppable_request, by host and status code.", ["host", "code"])
+        metrics.histogram("bookbounty_request_duration_seconds", "Time taken by each stoppable_request attempt.", ["host"])
+        metrics.counter("bookbounty_request_retries_total", "stoppable_request attempts that were retried.", ["host", "reason"])
+        metrics.counter("bookbounty_download_bytes_total", "Bytes written by direct downloads.")
+        metrics.counter("bookbounty_downloads_total", "Finished download attempts by result.", ["result"])
+        metrics.histogram("bookbounty_download_throughput_bytes_per_second", "Average speed of each completed direct download.", buckets=[size * 16 for size in SIZE_BUCKETS])
+        metrics.gauge("bookbounty_download_rate_bytes_per_second", "Current combined speed of all downloads in progress.", collect=lambda: {(): self.transfer_stats.total_rate()})
+        metrics.gauge("bookbounty_downloads_active", "Downloads in progress, direct and torrent.", collect=lambda: {(): self.transfer_stats.count()})
+        metrics.counter("bookbounty_torrent_adds_total", "Books handed to the torrent client through aaclient.", ["client", "result"])
+        metrics.gauge("bookbounty_queue_depth", "Jobs waiting in each download pipeline stage.", ["stage"], self.collect_queue_depth)
+        metrics.gauge("bookbounty_queue_workers", "Workers in each download pipeline stage.", ["stage"], self.collect_queue_workers)
+        metrics.gauge("bookbounty_queue_in_flight", "Jobs submitted to the download pipeline and not finished yet.", collect=lambda: {(): self.libgen_pipeline.in_flight if self.libgen_pipeline else 0})
+        metrics.gauge("bookbounty_queue_items", "Items in the download queue.", collect=lambda: {(): len(self.libgen_items)})
+        metrics.gauge("bookbounty_queue_items_completed", "Items in the download queue that are finished.", collect=lambda: {(): self.libgen_completed})
+
+    def collect_queue_depth(self):
+        pipeline = self.libgen_pipeline
+        return {(stage.name,): stage.queue.qsize() + len(stage.retries) for stage in pipeline.stages} if pipeline else {}
+
+    def collect_queue_workers(self):
+        pipeline = self.libgen_pipeline
+        return {(stage.name,): len(stage.threads) for stage in pipeline.stages} if pipeline else {}
 
     def load_environ_or_config_settings(self):
         # Use default settings as base
@@ -117,12 +200,159 @@ class DataHandler:
         except ValueError:
             self.general_logger.warning(f"Invalid thread_limit value: {thread_limit}, using default")
             self.thread_limit = ""
+        search_threads = os.environ.get("search_threads", "")
+        try:
+            self.search_threads = int(search_threads) if search_threads else ""
+            if self.search_threads and self.search_threads <= 0:
+                self.general_logger.warning(f"Invalid search_threads value: {search_threads}, should be > 0")
+                self.search_threads = ""
+        except ValueError:
+            self.general_logger.warning(f"Invalid search_threads value: {search_threads}, using default")
+            self.search_threads = ""
+        resolve_threads = os.environ.get("resolve_threads", "")
+        try:
+            self.resolve_threads = int(resolve_threads) if resolve_threads else ""
+            if self.resolve_threads and self.resolve_threads <= 0:
+                self.general_logger.warning(f"Invalid resolve_threads value: {resolve_threads}, should be > 0")
+                self.resolve_threads = ""
+        except ValueError:
+            self.general_logger.warning(f"Invalid resolve_threads value: {resolve_threads}, using default")
+            self.resolve_threads = ""
+        readarr_page_size = os.environ.get("readarr_page_size", "")
+        try:
+            self.readarr_page_size = int(readarr_page_size) if readarr_page_size else ""
+            if self.readarr_page_size and self.readarr_page_size <= 0:
+                self.general_logger.warning(f"Invalid readarr_page_size value: {readarr_page_size}, should be > 0")
+                self.readarr_page_size = ""
+        except ValueError:
+            self.general_logger.warning(f"Invalid readarr_page_size value: {readarr_page_size}, using default")
+            self.readarr_page_size = ""
+
+        readarr_fetch_threads = os.environ.get("readarr_fetch_threads", "")
+        try:
+            self.readarr_fetch_threads = int(readarr_fetch_threads) if readarr_fetch_threads else ""
+            if self.readarr_fetch_threads and self.readarr_fetch_threads <= 0:
+                self.general_logger.warning(f"Invalid readarr_fetch_threads value: {readarr_fetch_threads}, should be > 0")
+                self.readarr_fetch_threads = ""
+        except ValueError:
+            self.general_logger.warning(f"Invalid readarr_fetch_threads value: {readarr_fetch_threads}, using default")
+            self.readarr_fetch_threads = ""
+        ui_update_rate = os.environ.get("ui_update_rate", "")
+        try:
+            self.ui_update_rate = float(ui_update_rate) if ui_update_rate else ""
+            if self.ui_update_rate and self.ui_update_rate <= 0:
+                self.general_logger.warning(f"Invalid ui_update_rate value: {ui_update_rate}, should be > 0")
+                self.ui_update_rate = ""
+        except ValueError:
+            self.general_logger.warning(f"Invalid ui_update_rate value: {ui_update_rate}, using default")
+            self.ui_update_rate = ""
+        http_pool_size = os.environ.get("http_pool_size", "")
+        try:
+            self.http_pool_size = int(http_pool_size) if http_pool_size else ""
+            if self.http_pool_size and self.http_pool_size < 0:
+                self.general_logger.warning(f"Invalid http_pool_size value: {http_pool_size}, should be >= 0")
+                self.http_pool_size = ""
+        except ValueError:
+            self.general_logger.warning(f"Invalid http_pool_size value: {http_pool_size}, using default")
+            self.http_pool_size = ""
+        race_link_finders = os.environ.get("race_link_finders", "")
+        self.race_link_finders = race_link_finders.lower() == "true" if race_link_finders != "" else ""
+        mirror_fan_out = os.environ.get("mirror_fan_out", "")
+        self.mirror_fan_out = mirror_fan_out.lower() == "true" if mirror_fan_out != "" else ""
+        mirror_hedge_delay = os.environ.get("mirror_hedge_delay", "")
+        try:
+            self.mirror_hedge_delay = float(mirror_hedge_delay) if mirror_hedge_delay else ""
+            if self.mirror_hedge_delay and self.mirror_hedge_delay < 0:
+                self.general_logger.warning(f"Invalid mirror_hedge_delay value: {mirror_hedge_delay}, should be >= 0")
+                self.mirror_hedge_delay = ""
+        except ValueError:
+            self.general_logger.warning(f"Invalid mirror_hedge_delay value: {mirror_hedge_delay}, using default")
+            self.mirror_hedge_delay = ""
+        search_cache_positive_ttl = os.environ.get("search_cache_positive_ttl", "")
+        try:
+            self.search_cache_positive_ttl = float(search_cache_positive_ttl) if search_cache_positive_ttl else ""
+            if self.search_cache_positive_ttl and self.search_cache_positive_ttl < 0:
+                self.general_logger.warning(f"Invalid search_cache_positive_ttl value: {search_cache_positive_ttl}, should be >= 0")
+                self.search_cache_positive_ttl = ""
+        except ValueError:
+            self.general_logger.warning(f"Invalid search_cache_positive_ttl value: {search_cache_positive_ttl}, using default")
+            self.search_cache_positive_ttl = ""
+        search_cache_negative_ttl = os.environ.get("search_cache_negative_ttl", "")
+        try:
+            self.search_cache_negative_ttl = float(search_cache_negative_ttl) if search_cache_negative_ttl else ""
+            if self.search_cache_negative_ttl and self.search_cache_negative_ttl < 0:
+                self.general_logger.warning(f"Invalid search_cache_negative_ttl value: {search_cache_negative_ttl}, should be >= 0")
+                self.search_cache_negative_ttl = ""
+        except ValueError:
+            self.general_logger.warning(f"Invalid search_cache_negative_ttl value: {search_cache_negative_ttl}, using default")
+            self.search_cache_negative_ttl = ""
+        search_cache_max_entries = os.environ.get("search_cache_max_entries", "")
+        try:
+            self.search_cache_max_entries = int(search_cache_max_entries) if search_cache_max_entries else ""
+            if self.search_cache_max_entries and self.search_cache_max_entries < 0:
+                self.general_logger.warning(f"Invalid search_cache_max_entries value: {search_cache_max_entries}, should be >= 0")
+                self.search_cache_max_entries = ""
+        except ValueError:
+            self.general_logger.warning(f"Invalid search_cache_max_entries value: {search_cache_max_entries}, using default")
+            self.search_cache_max_entries = ""
+        download_chunk_size = os.environ.get("download_chunk_size", "")
+        try:
+            self.download_chunk_size = int(download_chunk_size) if download_chunk_size else ""
+            if self.download_chunk_size and self.download_chunk_size <= 0:
+                self.general_logger.warning(f"Invalid download_chunk_size value: {download_chunk_size}, should be > 0")
+                self.download_chunk_size = ""
+        except ValueError:
+            self.general_logger.warning(f"Invalid download_chunk_size value: {download_chunk_size}, using default")
+            self.download_chunk_size = ""
+        download_segments = os.environ.get("download_segments", "")
+        try:
+            self.download_segments = int(download_segments) if download_segments else ""
+            if self.download_segments and self.download_segments <= 0:
+                self.general_logger.warning(f"Invalid download_segments value: {download_segments}, should be > 0")
+                self.download_segments = ""
+        except ValueError:
+            self.general_logger.warning(f"Invalid download_segments value: {download_segments}, using default")
+            self.download_segments = ""
+        download_host_connection_cap = os.environ.get("download_host_connection_cap", "")
+        try:
+            self.download_host_connection_cap = int(download_host_connection_cap) if download_host_connection_cap else ""
+            if self.download_host_connection_cap and self.download_host_connection_cap <= 0:
+                self.general_logger.warning(f"Invalid download_host_connection_cap value: {download_host_connection_cap}, should be > 0")
+                self.download_host_connection_cap = ""
+        except ValueError:
+            self.general_logger.warning(f"Invalid download_host_connection_cap value: {download_host_connection_cap}, using default")
+            self.download_host_connection_cap = ""
+        host_max_in_flight = os.environ.get("host_max_in_flight", "")
+        try:
+            self.host_max_in_flight = int(host_max_in_flight) if host_max_in_flight else ""
+            if self.host_max_in_flight and self.host_max_in_flight < 0:
+                self.general_logger.warning(f"Invalid host_max_in_flight value: {host_max_in_flight}, should be >= 0")
+                self.host_max_in_flight = ""
+        except ValueError:
+            self.general_logger.warning(f"Invalid host_max_in_flight value: {host_max_in_flight}, using default")
+            self.host_max_in_flight = ""
+        host_rate_limit = os.environ.get("host_rate_limit", "")
+        try:
+            self.host_rate_limit = float(host_rate_limit) if host_rate_limit else ""
+            if self.host_rate_limit and self.host_rate_limit < 0:
+                self.general_logger.warning(f"Invalid host_rate_limit value: {host_rate_limit}, should be >= 0")
+                self.host_rate_limit = ""
+        except ValueError:
+            self.general_logger.warning(f"Invalid host_rate_limit value: {host_rate_limit}, using default")
+            self.host_rate_limit = ""
+        download_preallocate = os.environ.get("download_preallocate", "")
+        self.download_preallocate = download_preallocate.lower() == "true" if download_preallocate != "" else ""
+        http_prewarm = os.environ.get("http_prewarm", "")
+        self.http_prewarm = http_prewarm.lower() == "true" if http_prewarm != "" else ""
         self.selected_language = os.environ.get("selected_language", "")
         preferred_extensions_fiction = os.environ.get("preferred_extensions_fiction", "")
         self.preferred_extensions_fiction = preferred_extensions_fiction.split(",") if preferred_extensions_fiction else ""
         preferred_extensions_non_fiction = os.environ.get("preferred_extensions_non_fiction", "")
         self.preferred_extensions_non_fiction = preferred_extensions_non_fiction.split(",") if preferred_extensions_non_fiction else ""
         self.aa_client_type = os.environ.get("aa_client_type", "")
+        link_finders = os.environ.get("link_finders", "")
+        self.link_finders = [name.strip() for name in link_finders.split(",") if name.strip()] if link_finders else ""
+        self.result_parser_type = os.environ.get("result_parser_type", "")
 
         # Load variables from the configuration file if not set by environmental variables.
         try:
@@ -145,13 +375,28 @@ class DataHandler:
 
         # Save config.
         self.save_config_to_file()
+        self.http_pool = HttpSessionPool(self.general_logger, self.get_http_pool_size())
+        self.host_limiter = HostLimiter(self.general_logger, self.host_max_in_flight, self.host_rate_limit, math.ceil(self.host_rate_limit))
+        self.search_cache = SearchCache(os.path.join(self.config_folder, SEARCH_CACHE_FILE), self.general_logger, self.search_cache_positive_ttl, self.search_cache_negative_ttl, self.search_cache_max_entries)
         self.update_aaclient_settings()
+        self.result_parser = get_result_parser(self.result_parser_type)
+
+        if self.http_prewarm:
+            prewarm_urls = [self.readarr_address] + self.libgen_address_v1_list + self.libgen_address_v2_list
+            thread = threading.Thread(target=self.http_pool.prewarm, args=(prewarm_urls, self.request_timeout), name="Prewarm_Thread")
+            thread.daemon = True
+            thread.start()
 
         # Start Scheduler
         thread = threading.Thread(target=self.schedule_checker, name="Schedule_Thread")
         thread.daemon = True
         thread.start()
 
+        # Start UI Emitter
+        thread = threading.Thread(target=self.libgen_emitter, name="Emitter_Thread")
+        thread.daemon = True
+        thread.start()
+
     def save_config_to_file(self):
         try:
             with open(self.settings_config_file, "w") as json_file:
@@ -168,12 +413,33 @@ class DataHandler:
                         "library_scan_on_completion": self.library_scan_on_completion,
                         "request_timeout": self.request_timeout,
                         "thread_limit": self.thread_limit,
+                        "search_threads": self.search_threads,
+                        "resolve_threads": self.resolve_threads,
+                        "readarr_page_size": self.readarr_page_size,
+                        "readarr_fetch_threads": self.readarr_fetch_threads,
+                        "ui_update_rate": self.ui_update_rate,
+                        "http_pool_size": self.http_pool_size,
+                        "http_prewarm": self.http_prewarm,
+                        "race_link_finders": self.race_link_finders,
+                        "mirror_fan_out": self.mirror_fan_out,
+                        "mirror_hedge_delay": self.mirror_hedge_delay,
+                        "search_cache_positive_ttl": self.search_cache_positive_ttl,
+                        "search_cache_negative_ttl": self.search_cache_negative_ttl,
+                        "search_cache_max_entries": self.search_cache_max_entries,
+                        "download_chunk_size": self.download_chunk_size,
+                        "download_preallocate": self.download_preallocate,
+                        "download_segments": self.download_segments,
+                        "download_host_connection_cap": self.download_host_connection_cap,
+                        "host_max_in_flight": self.host_max_in_flight,
+                        "host_rate_limit": self.host_rate_limit,
                         "selected_language": self.selected_language,
                         "preferred_extensions_fiction": self.preferred_extensions_fiction,
                         "preferred_extensions_non_fiction": self.preferred_extensions_non_fiction,
                         "search_last_name_only": self.search_last_name_only,
                         "search_shortened_title": self.search_shortened_title,
                         "aa_client_type": self.aa_client_type,
+                        "link_finders": self.link_finders,
+                        "result_parser_type": self.result_parser_type,
                     },
                     json_file,
                     indent=4,
@@ -182,11 +448,67 @@ class DataHandler:
         except Exception as e:
             self.general_logger.error(f"Error Saving Config: {str(e)}")
 
-    def connect(self):
-        socketio.emit("readarr_update", {"status": self.readarr_status, "data": self.readarr_items})
-        socketio.emit("libgen_update", {"status": self.libgen_status, "data": self.libgen_items, "percent_completion": self.percent_completion})
+    def get_http_pool_size(self):
+        # 0 means size the per-host pools from the pipeline workers (searches, mirror pages and downloads).
+        return self.http_pool_size if self.http_pool_size else max(4, self.thread_limit + self.search_threads + self.resolve_threads)
+
+    def connect(self, sid):
+        socketio.emit("readarr_update", {"status": self.readarr_status, "data": self.readarr_items}, to=sid)
+        self.emit_libgen_snapshot(sid)
         self.clients_connected_counter += 1
 
+    def emit_libgen_snapshot(self, sid=None):
+        # Without a sid the queue changed and every client gets the snapshot under a new sequence number.
+        # A single client (connecting or resyncing) gets it under the current number, so the broadcast patches that
+        # follow stay in sequence for everyone. Pending patches are kept for the other clients and simply reapply.
+        with self.libgen_send_lock:
+            if sid is None:
+                with self.libgen_emit_lock:
+                    self.libgen_dirty_items = {}
+                    self.libgen_emit_event.clear()
+                self.libgen_update_seq += 1
+                self.libgen_item_positions = {}
+                for position, item in enumerate(self.libgen_items):
+                    self.libgen_item_positions.setdefault(id(item), []).append(position)
+            socketio.emit("libgen_update", {"seq": self.libgen_update_seq, "status": self.libgen_status, "data": self.libgen_items, "finished": self.libgen_jobs_finished(), "percent_completion": self.percent_completion, "bandwidth": self.transfer_stats.total_rate()}, to=sid)
+
+    def emit_libgen_item_update(self, *items):
+        # Only marks the items dirty, the emitter thread sends the coalesced patch.
+        with self.libgen_emit_lock:
+            for item in items:
+                self.libgen_dirty_items[id(item)] = item
+            self.libgen_emit_event.set()
+
+    def libgen_emitter(self):
+        while True:
+            self.libgen_emit_event.wait()
+            time.sleep(1 / self.ui_update_rate)
+            try:
+                self.flush_libgen_updates()
+            except Exception as e:
+                self.general_logger.error(f"Error Sending UI Update: {str(e)}")
+
+    def flush_libgen_updates(self):
+        with self.libgen_send_lock:
+            with self.libgen_emit_lock:
+                dirty_items = list(self.libgen_dirty_items.values())
+                self.libgen_dirty_items = {}
+                self.libgen_emit_event.clear()
+            patches = []
+            finished = self.libgen_jobs_finished() if dirty_items else []
+            for item in dirty_items:
+                for position in self.libgen_item_positions.get(id(item), []):
+                    patches.append({"index": position, "status": item["status"], "progress": item.get("progress"), "finished": finished[position] if position < len(finished) else False})
+            self.libgen_update_seq += 1
+            socketio.emit("libgen_patch", {"seq": self.libgen_update_seq, "status": self.libgen_status, "items": patches, "percent_completion": self.percent_completion, "bandwidth": self.transfer_stats.total_rate()})
+
+    def libgen_jobs_finished(self):
+        # Per position in the download queue, whether its job is done. Nothing is running while the queue is idle.
+        if not self.libgen_in_progress_flag:
+            return [True] * len(self.libgen_items)
+        finished_ids = self.job_store.finished_ids()
+        return [job_id in finished_ids for job_id in list(self.libgen_job_ids)]
+
     def disconnect(self):
         self.clients_connected_counter = max(0, self.clients_connected_counter - 1)
 
@@ -200,8 +522,8 @@ class DataHandler:
                 if within_time_window:
                     self.general_logger.info(f"Time to Start - as in a time window: {self.sync_schedule}")
                     self.get_wanted_list_from_readarr()
-                    if self.readarr_items:
-                        x = list(range(len(self.readarr_items)))
+                    x = [i for i, item in enumerate(self.readarr_items) if item["status"] not in COMPLETED_STATUSES and not self.is_item_in_backoff(item)]
+                    if x:
                         self.add_items_to_download(x)
                     else:
                         self.general_logger.info("No Missing Items")
@@ -221,56 +543,44 @@ class DataHandler:
             self.general_logger.info(f"Accessing Readarr API")
             self.readarr_status = "busy"
             self.readarr_stop_event.clear()
-            self.readarr_items = []
-            page = 1
-            while True:
-                if self.readarr_stop_event.is_set():
-                    return
-                endpoint = f"{self.readarr_address}/api/v1/wanted/missing"
-                params = {"apikey": self.readarr_api_key, "page": page, "includeAuthor": True}
-                response = requests.get(endpoint, params=params, timeout=self.request_timeout)
-                if response.status_code == 200:
-                    wanted_missing_items = response.json()
-                    if not wanted_missing_items["records"]:
-                        break
-                    for item in wanted_missing_items["records"]:
-                        if self.readarr_stop_event.is_set():
-                            break
-
-                        title = item["title"]
-                        author_and_title = item["authorTitle"]
-                        series = item["seriesTitle"]
-                        author_reversed = author_and_title.replace(title, "")
-                        author_with_sep = author_reversed.split(", ")
-                        author = "".join(reversed(author_with_sep)).title()
-                        year = item["releaseDate"][:4]
-
-                        meta_profile_id = item["author"]["metadataProfileId"]
-                        endpoint = f"{self.readarr_address}/api/v1/metadataprofile/{meta_profile_id}"
-                        params = {"apikey": self.readarr_api_key}
-                        response = requests.get(endpoint, params=params, timeout=self.request_timeout)
-                        allowed_languages = []
-                        if response.status_code == 200:
-                            author_meta_profile = response.json()
-                            iso_langs = author_meta_profile.get("allowedLanguages", "")
-                            allowed_languages = [iso639.Lang(iso).name.lower() for iso in iso_langs.split(",") if iso639.is_language(iso)]
-
-                        if allowed_languages == []:
-                            self.general_logger.error(f"Readarr MetadataProfile API Error Code: {response.status_code}")
-                            self.general_logger.error(f"Unable to get language from metadata profile for author: {author}\nUsing default.")
-                            allowed_languages = [l.lower().strip() for l in self.selected_language.split(",")]
-
-                        new_item = {"author": author, "book_name": title, "series": series, "checked": True, "status": "", "year": year, "allowed_languages": allowed_languages}
-                        self.readarr_items.append(new_item)
-                    page += 1
-                else:
-                    self.general_logger.error(f"Readarr Wanted API Error Code: {response.status_code}")
-                    self.general_logger.error(f"Readarr Wanted API Error Text: {response.text}")
-                    socketio.emit("new_toast_msg", {"title": f"Readarr API Error: {response.status_code}", "message": response.text})
-                    break
+            fetched_items = []
+            fetch_complete = False
 
-            self.readarr_items.sort(key=lambda x: (x["author"], x["book_name"]))
-            self.readarr_status = "stopped" if self.readarr_stop_event.is_set() else "complete"
+            response = self.fetch_wanted_page(1)
+            if response.status_code != 200:
+                self.report_wanted_page_error(response)
+            else:
+                wanted_missing_items = response.json()
+                self.add_wanted_records(wanted_missing_items["records"], fetched_items)
+                fetch_complete = True
+
+                page_size = wanted_missing_items.get("pageSize") or self.readarr_page_size
+                total_records = wanted_missing_items.get("totalRecords", 0)
+                total_pages = math.ceil(total_records / page_size) if page_size else 1
+                remaining_pages = list(range(2, total_pages + 1))
+                self.general_logger.info(f"Readarr reports {total_records} missing books over {total_pages} pages")
+
+                if remaining_pages and not self.readarr_stop_event.is_set():
+                    max_workers = max(1, min(self.readarr_fetch_threads, len(remaining_pages)))
+                    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+                        self.readarr_futures = [executor.submit(self.fetch_wanted_page, page) for page in remaining_pages]
+                        for future in self.readarr_futures:
+                            if self.readarr_stop_event.is_set():
+                                break
+                            response = future.result()
+                            if response.status_code != 200:
+                                self.report_wanted_page_error(response)
+                                fetch_complete = False
+                                break
+                            self.add_wanted_records(response.json()["records"], fetched_items)
+                        for future in self.readarr_futures:
+                            future.cancel()
+
+            if self.readarr_stop_event.is_set():
+                self.readarr_status = "stopped"
+            else:
+                self.apply_wanted_list_diff(fetched_items, remove_missing=fetch_complete)
+                self.readarr_status = "complete"
 
         except Exception as e:
             self.general_logger.error(f"Error Getting Missing Books: {str(e)}")
@@ -280,12 +590,148 @@ class DataHandler:
         finally:
             socketio.emit("readarr_update", {"status": self.readarr_status, "data": self.readarr_items})
 
+    def fetch_wanted_page(self, page):
+        endpoint = f"{self.readarr_address}/api/v1/wanted/missing"
+        params = {"apikey": self.readarr_api_key, "page": page, "pageSize": self.readarr_page_size, "includeAuthor": True}
+        return self.http_pool.get(endpoint, params=params, timeout=self.request_timeout)
+
+    def report_wanted_page_error(self, response):
+        self.general_logger.error(f"Readarr Wanted API Error Code: {response.status_code}")
+        self.general_logger.error(f"Readarr Wanted API Error Text: {response.text}")
+        socketio.emit("new_toast_msg", {"title": f"Readarr API Error: {response.status_code}", "message": response.text})
+
+    def add_wanted_records(self, records, fetched_items):
+        for item in records:
+            if self.readarr_stop_event.is_set():
+                break
+
+            title = item["title"]
+            author_and_title = item["authorTitle"]
+            series = item["seriesTitle"]
+            author_reversed = author_and_title.replace(title, "")
+            author_with_sep = author_reversed.split(", ")
+            author = "".join(reversed(author_with_sep)).title()
+            year = item["releaseDate"][:4]
+
+            meta_profile_id = item["author"]["metadataProfileId"]
+            allowed_languages = self.get_metadata_profile_languages(meta_profile_id)
+
+            if allowed_languages == []:
+                self.general_logger.error(f"Unable to get language from metadata profile for author: {author}\nUsing default.")
+                allowed_languages = [l.lower().strip() for l in self.selected_language.split(",")]
+
+            new_item = {"readarr_id": item.get("id"), "author": author, "book_name": title, "series": series, "checked": True, "status": "", "year": year, "allowed_languages": allowed_languages}
+            fetched_items.append(new_item)
+
+    def wanted_item_key(self, item):
+        if item.get("readarr_id") is not None:
+            return item["readarr_id"]
+        return (item["author"], item["book_name"])
+
+    def apply_wanted_list_diff(self, fetched_items, remove_missing=True):
+        with self.readarr_snapshot_lock:
+            current_items = {self.wanted_item_key(item): item for item in self.readarr_items}
+            fetched_keys = set()
+            added = changed = 0
+            for new_item in fetched_items:
+                key = self.wanted_item_key(new_item)
+                fetched_keys.add(key)
+                existing_item = current_items.get(key)
+                if existing_item is None:
+                    current_items[key] = new_item
+                    added += 1
+                    continue
+                # Keep the existing dict (it may also be referenced by libgen_items) and its status.
+                updates = {field: new_item[field] for field in ("readarr_id", "author", "book_name", "series", "year", "allowed_languages") if existing_item.get(field) != new_item[field]}
+                if updates:
+                    existing_item.update(updates)
+                    changed += 1
+
+            removed = 0
+            if remove_missing:
+                for key in list(current_items):
+                    if key not in fetched_keys:
+                        del current_items[key]
+                        removed += 1
+
+            self.readarr_items = sorted(current_items.values(), key=lambda x: (x["author"], x["book_name"]))
+
+        self.general_logger.info(f"Wanted list synced: {added} added, {removed} removed, {changed} changed, {len(self.readarr_items)} total")
+        self.save_wanted_snapshot()
+
+    def load_wanted_snapshot(self):
+        try:
+            if os.path.exists(self.wanted_snapshot_file):
+                with open(self.wanted_snapshot_file, "r") as json_file:
+                    items = json.load(json_file)
+                for item in items:
+                    # Anything that was in flight when the app stopped starts again from scratch.
+                    # Items still backing off keep "Not Found", so it stays clear why the scheduler skips them.
+                    backing_off = item.get("status") == "Not Found" and self.is_item_in_backoff(item)
+                    if item.get("status") not in COMPLETED_STATUSES and not backing_off:
+                        item["status"] = ""
+                self.readarr_items = items
+                self.general_logger.info(f"Loaded {len(items)} wanted items from snapshot")
+
+        except Exception as e:
+            self.general_logger.error(f"Error Loading Wanted List Snapshot: {str(e)}")
+
+    def save_wanted_snapshot(self):
+        try:
+            with self.readarr_snapshot_lock:
+                temp_file = f"{self.wanted_snapshot_file}.tmp"
+                with open(temp_file, "w") as json_file:
+                    json.dump(self.readarr_items, json_file)
+                os.replace(temp_file, self.wanted_snapshot_file)
+
+        except Exception as e:
+            self.general_logger.error(f"Error Saving Wanted List Snapshot: {str(e)}")
+
+    def get_metadata_profile_languages(self, meta_profile_id):
+        now = time.time()
+        with self.metadata_profile_cache_lock:
+            cached = self.metadata_profile_cache.get(meta_profile_id)
+            if cached and cached["expires"] > now:
+                return list(cached["languages"])
+
+        allowed_languages = []
+        ttl = METADATA_PROFILE_NEGATIVE_CACHE_TTL
+        try:
+            endpoint = f"{self.readarr_address}/api/v1/metadataprofile/{meta_profile_id}"
+            params = {"apikey": self.readarr_api_key}
+            response = self.http_pool.get(endpoint, params=params, timeout=self.request_timeout)
+            if response.status_code == 200:
+                author_meta_profile = response.json()
+                iso_langs = author_meta_profile.get("allowedLanguages", "")
+                allowed_languages = [name for name in (self.resolve_iso_language(iso) for iso in iso_langs.split(",")) if name]
+                ttl = METADATA_PROFILE_CACHE_TTL
+            else:
+                self.general_logger.error(f"Readarr MetadataProfile API Error Code: {response.status_code}")
+
+        except Exception as e:
+            self.general_logger.error(f"Readarr MetadataProfile API Error: {str(e)}")
+
+        with self.metadata_profile_cache_lock:
+            self.metadata_profile_cache[meta_profile_id] = {"languages": allowed_languages, "expires": now + ttl}
+        return list(allowed_languages)
+
+    def resolve_iso_language(self, iso):
+        iso = iso.strip()
+        if iso not in self.iso_language_lookup:
+            self.iso_language_lookup[iso] = iso639.Lang(iso).name.lower() if iso639.is_language(iso) else None
+        return self.iso_language_lookup[iso]
+
+    def invalidate_metadata_profile_cache(self):
+        with self.metadata_profile_cache_lock:
+            self.metadata_profile_cache = {}
+        self.general_logger.info("Metadata profile cache cleared")
+
     def trigger_readarr_scan(self):
         try:
             endpoint = "/api/v1/rootfolder"
             headers = {"X-Api-Key": self.readarr_api_key}
             root_folder_list = []
-            response = requests.get(f"{self.readarr_address}{endpoint}", headers=headers)
+            response = self.http_pool.get(f"{self.readarr_address}{endpoint}", headers=headers)
             endpoint = "/api/v1/command"
             if response.status_code == 200:
                 root_folders = response.json()
@@ -297,7 +743,7 @@ class DataHandler:
             if root_folder_list:
                 data = {"name": "RescanFolders", "folders": root_folder_list}
                 headers = {"X-Api-Key": self.readarr_api_key, "Content-Type": "application/json"}
-                response = requests.post(f"{self.readarr_address}{endpoint}", json=data, headers=headers)
+                response = self.http_pool.post(f"{self.readarr_address}{endpoint}", json=data, headers=headers)
                 if response.status_code != 201:
                     self.general_logger.warning(f"Failed to start readarr library scan")
 
@@ -312,45 +758,92 @@ class DataHandler:
             self.libgen_stop_event.clear()
             if self.libgen_status == "complete" or self.libgen_status == "stopped":
                 self.libgen_items = []
-                self.percent_completion = 0
+                self.libgen_job_ids = []
+                self.job_store.clear()
+                self.tracer.clear()
+                self.libgen_completed = 0
             for i in range(len(self.readarr_items)):
                 if i in data:
                     self.readarr_items[i]["status"] = "Queued"
                     self.readarr_items[i]["checked"] = True
+                    self.libgen_job_ids.append(self.job_store.add(self.readarr_items[i]))
                     self.libgen_items.append(self.readarr_items[i])
                 else:
                     self.readarr_items[i]["checked"] = False
-
-            with self.libgen_progress_lock:
-                if self.libgen_in_progress_flag == False:
-                    self.index = 0
-                    self.libgen_in_progress_flag = True
-                    thread = threading.Thread(target=self.master_queue, name="Queue_Thread")
-                    thread.daemon = True
-                    thread.start()
+            self.update_libgen_progress()
+            self.start_master_queue()
 
         except Exception as e:
             self.general_logger.error(f"Error Adding Items to Download: {str(e)}")
             socketio.emit("new_toast_msg", {"title": "Error adding new items", "message": str(e)})
 
         finally:
-            socketio.emit("libgen_update", {"status": self.libgen_status, "data": self.libgen_items, "percent_completion": self.percent_completion})
+            self.emit_libgen_snapshot()
             socketio.emit("new_toast_msg", {"title": "Download Queue Updated", "message": "New Items added to Queue"})
 
+    def start_master_queue(self):
+        with self.libgen_progress_lock:
+            if self.libgen_in_progress_flag == False:
+                self.libgen_in_progress_flag = True
+                thread = threading.Thread(target=self.master_queue, name="Queue_Thread")
+                thread.daemon = True
+                thread.start()
+
+    def requeue_item(self, libgen_index):
+        # Runs one finished row again in place: the rest of the queue (finished or not) and the wanted list selection stay as they are.
+        item = self.libgen_items[libgen_index]
+        old_job_id = self.libgen_job_ids[libgen_index]
+        self.libgen_stop_event.clear()
+        item["status"] = "Queued"
+        self.libgen_job_ids[libgen_index] = self.job_store.add(item)
+        self.job_store.remove(old_job_id)
+        # A running queue counts the row as done already, an idle one recounts when it starts.
+        self.update_libgen_progress(-1)
+        self.start_master_queue()
+        self.emit_libgen_item_update(item)
+
     def master_queue(self):
+        pipeline = None
         try:
-            while not self.libgen_stop_event.is_set() and self.index < len(self.libgen_items):
-                self.libgen_status = "running"
-                with concurrent.futures.ThreadPoolExecutor(max_workers=self.thread_limit) as executor:
-                    self.libgen_futures = []
-                    start_position = self.index
-                    for req_item in self.libgen_items[start_position:]:
-                        if self.libgen_stop_event.is_set():
-                            break
-                        self.libgen_futures.append(executor.submit(self.find_link_and_download, req_item))
-                    concurrent.futures.wait(self.libgen_futures)
-
+            self.libgen_status = "running"
+            finished_ids = self.job_store.finished_ids()
+            with self.libgen_progress_lock:
+                self.libgen_completed = sum(1 for job_id in self.libgen_job_ids if job_id in finished_ids)
+            self.update_libgen_progress()
+
+            pipeline = Pipeline(self.general_logger, PIPELINE_QUEUE_SIZE)
+            pipeline.add_stage("search", self.traced_stage("search", self.pipeline_search), self.search_threads)
+            pipeline.add_stage("resolve", self.traced_stage("resolve", self.pipeline_resolve), self.resolve_threads)
+            pipeline.add_stage("download", self.traced_stage("download", self.pipeline_download), self.thread_limit)
+            pipeline.add_stage("finish", self.traced_stage("finish", self.pipeline_finish), 1)
+            pipeline.start()
+            self.libgen_pipeline = pipeline
+
+            submitted = set()
+            while not self.libgen_stop_event.is_set():
+                # Finished jobs (including ones recovered from a previous run) are skipped, items added mid-run are picked up here.
+                pending = [(job_id, req_item) for job_id, req_item in list(zip(self.libgen_job_ids, self.libgen_items)) if job_id not in submitted]
+                if not pending and pipeline.wait(timeout=0.5):
+                    pending = [(job_id, req_item) for job_id, req_item in list(zip(self.libgen_job_ids, self.libgen_items)) if job_id not in submitted]
+                    if not pending:
+                        break
+                for job_id, req_item in pending:
+                    if self.libgen_stop_event.is_set():
+                        break
+                    submitted.add(job_id)
+                    # Claiming in the job store guarantees a job runs once, even if it is listed again.
+                    if not self.job_store.claim(job_id):
+                        continue
+                    self.tracer.start_trace(job_id, f'{req_item["author"]} - {req_item["book_name"]}')
+                    pipeline.submit({"job_id": job_id, "item": req_item, "finder": 0, "handoff": time.time()})
+
+            # Jobs still in the pipeline after a stop drain straight through to the finish stage.
+            pipeline.wait()
+
+            self.http_pool.log_stats()
+            self.mirror_health.log_table()
             if self.libgen_stop_event.is_set():
+                self.job_store.stop_queued()
                 self.libgen_status = "stopped"
                 self.general_logger.info("Downloading Stopped")
                 with self.libgen_progress_lock:
@@ -369,75 +862,279 @@ class DataHandler:
             socketio.emit("new_toast_msg", {"title": "Error in Master Queue", "message": str(e)})
 
         finally:
-            socketio.emit("libgen_update", {"status": self.libgen_status, "data": self.libgen_items, "percent_completion": self.percent_completion})
+            self.libgen_pipeline = None
+            if pipeline is not None:
+                pipeline.close()
+            self.save_wanted_snapshot()
+            self.emit_libgen_snapshot()
             socketio.emit("new_toast_msg", {"title": "End of Session", "message": f"Downloading {self.libgen_status.capitalize()}"})
 
-    def find_link_and_download(self, req_item):
-        if self.libgen_stop_event.is_set():
-            return
-        finder_functions = [
-            self._link_finder_annas_archive,
-            self._link_finder_libgen_v2,
-            self._link_finder_libgen_api, 
-            self._link_finder_libgen_v1, 
-            ]
-        
+    def recover_download_queue(self):
+        try:
+            requeued = self.job_store.requeue_in_progress()
+            jobs = self.job_store.load()
+            if not jobs:
+                return
 
+            wanted_items = {self.wanted_item_key(item): item for item in self.readarr_items}
+            pending = 0
+            resumable = 0
+            for job in jobs:
+                # Share the dict with the wanted list when possible so status changes show up in both.
+                item = wanted_items.get(self.wanted_item_key(job["item"]), job["item"])
+                if job["state"] == "done":
+                    item["status"] = job["status"]
+                else:
+                    item["status"] = "Queued"
+                    pending += 1
+                    resumable += job["state"] == "queued"
+                self.libgen_job_ids.append(job["id"])
+                self.libgen_items.append(item)
+
+            self.libgen_completed = len(jobs) - pending
+            self.update_libgen_progress()
+            self.general_logger.info(f"Recovered download queue: {len(jobs)} jobs, {pending} pending, {requeued} interrupted")
+
+            # A run the user stopped stays stopped, only a run that was cut off by a crash or restart carries on.
+            if resumable:
+                self.libgen_status = "running"
+                with self.libgen_progress_lock:
+                    self.libgen_in_progress_flag = True
+                thread = threading.Thread(target=self.master_queue, name="Queue_Thread")
+                thread.daemon = True
+                thread.start()
+            elif pending:
+                self.libgen_status = "stopped"
+            else:
+                self.libgen_status = "complete"
 
-        original_status = req_item['status']
+        except Exception as e:
+            self.general_logger.error(f"Error Recovering Download Queue: {str(e)}")
 
-        for func in finder_functions:
-            if self.libgen_stop_event.is_set():
-                return
-            try:                
-                self.is_using_libgen_api = False
+    def traced_stage(self, stage, handler):
+        # Each stage run is a span, the time the job waited in front of the stage is recorded as a wait span.
+        def run(job):
+            now = time.time()
+            self.tracer.add_span(job["job_id"], f"wait {stage}", "queue", job.get("handoff", now), now)
+            try:
+                with self.tracer.span(stage, "stage", job["job_id"]):
+                    return handler(job)
+            finally:
+                job["handoff"] = time.time()
+
+        return run
+
+    def load_item_trace(self, libgen_index, sid):
+        try:
+            timeline = self.tracer.timeline(self.libgen_job_ids[libgen_index])
+        except (IndexError, TypeError):
+            timeline = {"label": "", "duration": 0, "spans": []}
+        # Only the browser that asked opens the trace modal.
+        socketio.emit("item_trace", dict(timeline, index=libgen_index), to=sid)
+
+    def export_trace(self, libgen_index=None):
+        if libgen_index is None:
+            return self.tracer.chrome_trace()
+        try:
+            return self.tracer.chrome_trace([self.libgen_job_ids[int(libgen_index)]])
+        except (IndexError, ValueError):
+            return self.tracer.chrome_trace([])
+
+    def get_link_finders(self):
+        finders = {
+            "annas_archive": self._link_finder_annas_archive,
+            "libgen_v2": self._link_finder_libgen_v2,
+            "libgen_api": self._link_finder_libgen_api,
+            "libgen_v1": self._link_finder_libgen_v1,
+        }
+        return [finders[name] for name in self.link_finders if name in finders]
+
+    def pipeline_search(self, job):
+        req_item = job["item"]
+        if self.libgen_stop_event.is_set():
+            return "finish"
+        finder_functions = self.get_link_finders()
+
+        if "original_status" not in job:
+            job["original_status"] = req_item["status"]
+            if self.race_link_finders:
                 req_item["status"] = "Searching..."
-                socketio.emit("libgen_update", {"status": self.libgen_status, "data": self.libgen_items, "percent_completion": self.percent_completion})
-                search_results = func(req_item)
+                self.emit_libgen_item_update(req_item)
+                # Each finder works on its own copy so concurrent status writes don't clobber the visible status.
+                job["race_items"] = [dict(req_item) for _ in finder_functions]
+                job["race_cancel"] = threading.Event()
+                job["race_executor"] = concurrent.futures.ThreadPoolExecutor(max_workers=len(finder_functions), thread_name_prefix="Finder")
+                job["race_futures"] = [job["race_executor"].submit(self.run_link_finder, func, item, job["race_cancel"], job["job_id"]) for func, item in zip(finder_functions, job["race_items"])]
+
+        # Finders are tried in priority order, a job whose links all fail comes back here for the next one.
+        while job["finder"] < len(finder_functions):
+            position = job["finder"]
+            job["finder"] += 1
+            func = finder_functions[position]
+            finder_name = func.__name__.replace("_link_finder_", "")
+            try:
+                req_item["status"] = "Searching..."
+                self.emit_libgen_item_update(req_item)
+                if "race_futures" in job:
+                    with self.tracer.span(f"{finder_name} (race result)", "finder"):
+                        search_results = job["race_futures"][position].result()
+                    req_item["status"] = job["race_items"][position]["status"]
+                else:
+                    with self.tracer.span(finder_name, "finder"):
+                        search_results = func(req_item)
 
                 if isinstance(search_results, tuple):
                     base_url, links = search_results
                 else:
                     base_url = None
                     links = search_results
+                metrics.inc("bookbounty_finder_searches_total", finder=finder_name)
+                if links:
+                    metrics.inc("bookbounty_finder_hits_total", finder=finder_name)
 
                 if self.libgen_stop_event.is_set():
-                    return
+                    return "finish"
 
                 if links:
                     req_item["status"] = f"Link Found ({base_url})" if base_url else "Link Found"
-                    socketio.emit("libgen_update", {"status": self.libgen_status, "data": self.libgen_items, "percent_completion": self.percent_completion})
-                    for link in links:
-                        if self.libgen_stop_event.is_set():
-                            return
-                        self.general_logger.info(f'Attempting Download from Link: {link}')
-                        ret = self.download_from_mirror(req_item, link, base_url=base_url)
-                        if ret == "Success":
-                            req_item["status"] = "Download Complete"
-                            break
-                        elif ret == "Already Exists":
-                            req_item["status"] = "File Already Exists"
-                            break
-                    else:
-                        req_item["status"] = ret
-            
-                if req_item["status"] == "Download Complete":
-                    break
-                elif req_item["status"] == "File Already Exists":
-                    break
+                    self.emit_libgen_item_update(req_item)
+                    job.update({"base_url": base_url, "links": links, "link": 0, "is_libgen_api": func == self._link_finder_libgen_api})
+                    return "resolve"
 
             except Exception as e:
                 self.general_logger.error(f"Error Downloading: {str(e)}")
                 req_item["status"] = "Download Error"
 
-        # After trying all finders, if status is still intermediate, set to Not Found
-        intermediate_statuses = ["Searching...", "No Link Found", "Queued", original_status]
-        if req_item["status"] in intermediate_statuses:
-            req_item["status"] = "Not Found"
+        return "finish"
+
+    def pipeline_resolve(self, job):
+        req_item = job["item"]
+        while job["link"] < len(job["links"]):
+            if self.libgen_stop_event.is_set():
+                return "finish"
+            link = job["links"][job["link"]]
+            job["link"] += 1
+            try:
+                self.general_logger.info(f'Attempting Download from Link: {link}')
+                with self.tracer.span("resolve link", "resolve", link=link):
+                    resolved = self.resolve_download_link(req_item, link, job["base_url"], job["is_libgen_api"])
+            except Exception as e:
+                self.general_logger.error(f"Error Downloading: {str(e)}")
+                resolved = "Download Error"
+            if isinstance(resolved, dict):
+                job["download"] = resolved
+                return "download"
+            req_item["status"] = resolved
 
-        self.index += 1
-        self.percent_completion = 100 * (self.index / len(self.libgen_items)) if self.libgen_items else 0
-        socketio.emit("libgen_update", {"status": self.libgen_status, "data": self.libgen_items, "percent_completion": self.percent_completion})
+        return "search"
+
+    def pipeline_download(self, job):
+        req_item = job["item"]
+        if self.libgen_stop_event.is_set():
+            return "finish"
+        # Direct downloads hold a slot of the host's connection cap from the first request until the body is written.
+        connection_slot = ConnectionSlot(self.get_host_connection_limit(job["download"]["link_url"]), self.libgen_stop_event.is_set)
+        try:
+            if not job["download"]["is_anna"]:
+                connection_slot.acquire()
+            ret = self.download_resolved_link(req_item, job["download"], connection_slot)
+        except Exception as e:
+            self.general_logger.error(f"Error Downloading: {str(e)}")
+            ret = "Download Error"
+        finally:
+            connection_slot.release()
+            self.transfer_stats.finish(id(req_item))
+            req_item.pop("progress", None)
+
+        if ret == "Success":
+            metrics.inc("bookbounty_downloads_total", result="complete")
+            req_item["status"] = "Download Complete"
+            return "finish"
+        elif ret == "Already Exists":
+            metrics.inc("bookbounty_downloads_total", result="exists")
+            req_item["status"] = "File Already Exists"
+            return "finish"
+
+        metrics.inc("bookbounty_downloads_total", result="failed")
+        req_item["status"] = ret
+        if self.libgen_stop_event.is_set():
+            return "finish"
+        return "resolve" if job["link"] < len(job["links"]) else "search"
+
+    def pipeline_finish(self, job):
+        req_item = job["item"]
+        if "race_executor" in job:
+            job["race_cancel"].set()
+            job["race_executor"].shutdown(wait=False, cancel_futures=True)
+
+        if not self.libgen_stop_event.is_set():
+            # After trying all finders, if status is still intermediate, set to Not Found
+            intermediate_statuses = ["Searching...", "No Link Found", "Queued", job.get("original_status")]
+            if req_item["status"] in intermediate_statuses:
+                req_item["status"] = "Not Found"
+            # Saved straight away, so a crash mid-run does not lose the backoff.
+            if self.update_item_backoff(req_item):
+                self.save_wanted_snapshot()
+
+        # A job cut short by Stop is recorded as stopped, only jobs interrupted by a crash are resumed on restart.
+        finished = not self.libgen_stop_event.is_set() or req_item["status"] in COMPLETED_STATUSES + ["Not Found"]
+        self.job_store.mark_finished(job["job_id"], "done" if finished else "stopped", req_item["status"])
+        if finished:
+            req_item.pop("force_search", None)
+            self.update_libgen_progress(1)
+        self.emit_libgen_item_update(req_item)
+
+    def update_libgen_progress(self, completed=0):
+        with self.libgen_progress_lock:
+            self.libgen_completed += completed
+            total = len(self.libgen_items)
+            self.percent_completion = 100 * (self.libgen_completed / total) if total else 0
+
+    def update_item_backoff(self, req_item):
+        # Returns True when the item's backoff changed.
+        if req_item["status"] == "Not Found":
+            req_item["not_found_count"] = req_item.get("not_found_count", 0) + 1
+            delay = NOT_FOUND_BACKOFF_SCHEDULE[min(req_item["not_found_count"], len(NOT_FOUND_BACKOFF_SCHEDULE)) - 1]
+            req_item["retry_after"] = time.time() + delay
+            self.general_logger.info(f'Book: {req_item["author"]} - {req_item["book_name"]} not found {req_item["not_found_count"]} times, next scheduled retry in {delay / 3600:g}h')
+            return True
+        elif req_item["status"] in COMPLETED_STATUSES and (req_item.get("not_found_count") or req_item.get("retry_after")):
+            req_item["not_found_count"] = 0
+            req_item["retry_after"] = 0
+            return True
+        return False
+
+    def is_item_in_backoff(self, item):
+        return item.get("retry_after", 0) > time.time()
+
+    def force_retry_item(self, libgen_index):
+        try:
+            item = self.libgen_items[libgen_index]
+            item["not_found_count"] = 0
+            item["retry_after"] = 0
+            item["force_search"] = True
+            # A second job for an item that is still being worked on would download into the same partial file.
+            finished = self.libgen_jobs_finished()
+            if any(queued_item is item and not finished[position] for position, queued_item in enumerate(list(self.libgen_items)[:len(finished)])):
+                self.general_logger.info(f'Force retry ignored, Book still in progress: {item["author"]} - {item["book_name"]}')
+                socketio.emit("new_toast_msg", {"title": "Item still in progress", "message": "Backoff cleared, the item is already in the download queue"})
+                return
+            self.general_logger.info(f'Force retry requested for Book: {item["author"]} - {item["book_name"]}')
+            self.requeue_item(libgen_index)
+
+        except Exception as e:
+            self.general_logger.error(f"Error Retrying Item: {str(e)}")
+            socketio.emit("new_toast_msg", {"title": "Error retrying item", "message": str(e)})
+
+    def run_link_finder(self, func, req_item, cancel_event, trace_id=None):
+        self.request_context.cancel_events = (cancel_event,)
+        try:
+            if cancel_event.is_set():
+                return []
+            with self.tracer.span(func.__name__.replace("_link_finder_", ""), "finder", trace_id):
+                return func(req_item)
+        finally:
+            self.request_context.cancel_events = ()
 
     def _link_finder_libgen_api(self, req_item):
         try:
@@ -447,6 +1144,11 @@ class DataHandler:
             book_search_text = book_name.split(":")[0] if self.search_shortened_title else book_name
 
             found_links = []
+            cache_query = self.search_cache_query(req_item, book_search_text)
+            cached_links = self.get_cached_search("libgen_api", "libgen_api", cache_query, req_item)
+            if cached_links is not None:
+                found_links = cached_links
+                return found_links
 
             try:
                 with self.libgen_thread_lock:
@@ -458,9 +1160,9 @@ class DataHandler:
                 self.general_logger.error(f"Error with libgen_api search library: {str(e)}")
                 results = None
 
+            scorer = MatchScorer([author], book_name, self.minimum_match_ratio)
             for item in results:
-                author_name_match_ratio = self.compare_author_names(item["Author"], author)
-                book_name_match_ratio = fuzz.ratio(item["Title"], book_name)
+                author_name_match_ratio, book_name_match_ratio = scorer.ratios(item["Author"], item["Title"])
                 average_match_ratio = (author_name_match_ratio + book_name_match_ratio) / 2
                 language_check = item["Language"].lower() in req_item["allowed_languages"] or self.selected_language.lower() == "all"
                 if average_match_ratio > self.minimum_match_ratio and language_check:
@@ -470,12 +1172,13 @@ class DataHandler:
             else:
                 req_item["status"] = "No Link Found"
 
+            self.search_cache.put("libgen_api", "libgen_api", cache_query, found_links)
+
         except Exception as e:
             self.general_logger.error(f"Error Searching libgen API: {str(e)}")
             raise Exception(f"Error Searching libgen API: {str(e)}")
 
         finally:
-            self.is_using_libgen_api = True
             return found_links
 
     def _link_finder_libgen_v1(self, req_item):
@@ -490,69 +1193,10 @@ class DataHandler:
             query_text = f"{author_search_text} - {book_search_text}"
             search_item = query_text.replace(" ", "+")
 
-            for address in self.libgen_address_v1_list:
-                if self.libgen_stop_event.is_set():
-                    return found_base_url, found_links
-                try:
-                    self.general_logger.info(
-                        f'Searching {address} for Book: {req_item["author"]} - {req_item["book_name"]} '
-                        f'- Allowed Languages: {",".join(req_item["allowed_languages"])}'
-                    )
-                    url = f"{address}/fiction/?q={search_item}"
-                    response = self.stoppable_request('get', url, timeout=self.request_timeout)
-                    if response and response.status_code == 200:
-                        soup = BeautifulSoup(response.text, "html.parser")
-                        table = soup.find("tbody")
-                        rows = table.find_all("tr") if table else []
-                        for row in rows:
-                            try:
-                                cells = row.find_all("td")
-                                author_string = SearchUtils.extract_cell_text(cells, 0)
-                                
-                                raw_title = SearchUtils.extract_cell_text(cells, 2)
-                                if "\nISBN" in raw_title:
-                                    title_string = raw_title.split("\nISBN")[0]
-                                elif "\nASIN" in raw_title:
-                                    title_string = raw_title.split("\nASIN")[0]
-                                else:
-                                    title_string = raw_title
-                                    
-                                language = SearchUtils.extract_cell_text(cells, 3, "english")
-                                file_type = SearchUtils.extract_cell_text(cells, 4, ".epub").lower()
-                                
-                                file_type_check = SearchUtils.check_file_type_match(file_type, self.preferred_extensions_fiction)
-                                language_check = SearchUtils.check_language_match(language, req_item["allowed_languages"], self.selected_language)
-
-                                if file_type_check and language_check:
-                                    author_name_match_ratio = self.compare_author_names(author, author_string)
-                                    book_name_match_ratio = fuzz.ratio(title_string, book_search_text)
-                                    if author_name_match_ratio >= self.minimum_match_ratio and book_name_match_ratio >= self.minimum_match_ratio:
-                                        mirrors = row.find("ul", class_="record_mirrors_compact")
-                                        if mirrors:
-                                            links = mirrors.find_all("a", href=True)
-                                            for link in links:
-                                                href = link["href"]
-                                                if href.startswith("http://") or href.startswith("https://"):
-                                                    found_links.append(href)
-                            except (AttributeError, IndexError, ValueError):
-                                pass
-
-                        if found_links:
-                            found_base_url = address 
-                            break  
-
-                        if not found_links:
-                            req_item["status"] = "No Link Found"
-                            self.general_logger.info(f'Book:{req_item["author"]} - {req_item["book_name"]} not found on {address}')
-                        socketio.emit("libgen_update", {"status": "Success", "data": self.libgen_items, "percent_completion": self.percent_completion})
-                    elif response:
-                        self.general_logger.warning(f"Libgen mirror connection error for {address}: {response.status_code}")
-                        req_item["status"] = "Libgen Error"
-                        socketio.emit("libgen_update", {"status": "Error", "data": self.libgen_items, "percent_completion": self.percent_completion})
-
-                except Exception as e:
-                    self.general_logger.warning(f"Failed with {address}: {e}")
-                    continue
+            found_base_url, found_links = self.query_mirrors(
+                self.libgen_address_v1_list,
+                lambda address: self._search_libgen_v1_mirror(req_item, address, search_item, book_search_text),
+            )
 
         except Exception as e:
             self.general_logger.error(f"Error Searching libgen: {str(e)}")
@@ -562,6 +1206,41 @@ class DataHandler:
             self.general_logger.info(f'Links Found for Book: {req_item["author"]} - {req_item["book_name"]} on {found_base_url}')
             return found_base_url, found_links
 
+    def _search_libgen_v1_mirror(self, req_item, address, search_item, book_search_text):
+        found_links = []
+        try:
+            cache_query = self.search_cache_query(req_item, search_item)
+            cached_links = self.get_cached_search("libgen_v1", address, cache_query, req_item)
+            if cached_links is not None:
+                return cached_links
+
+            self.general_logger.info(
+                f'Searching {address} for Book: {req_item["author"]} - {req_item["book_name"]} '
+                f'- Allowed Languages: {",".join(req_item["allowed_languages"])}'
+            )
+            url = f"{address}/fiction/?q={search_item}"
+            response = self.stoppable_request('get', url, timeout=self.request_timeout)
+            if response and response.status_code == 200:
+                rows = self.result_parser.libgen_v1_rows(response.text)
+                matches = filter_libgen_v1_rows(rows, req_item, book_search_text, self.preferred_extensions_fiction, self.selected_language, self.minimum_match_ratio)
+                for links, author_name_match_ratio, book_name_match_ratio in matches:
+                    found_links.extend(links)
+
+                self.search_cache.put("libgen_v1", address, cache_query, found_links)
+                if not found_links:
+                    req_item["status"] = "No Link Found"
+                    self.general_logger.info(f'Book:{req_item["author"]} - {req_item["book_name"]} not found on {address}')
+                self.emit_libgen_item_update(req_item)
+            elif response:
+                self.general_logger.warning(f"Libgen mirror connection error for {address}: {response.status_code}")
+                req_item["status"] = "Libgen Error"
+                self.emit_libgen_item_update(req_item)
+
+        except Exception as e:
+            self.general_logger.warning(f"Failed with {address}: {e}")
+
+        return found_links
+
     def _link_finder_libgen_v2(self, req_item):
         found_base_url = None
         found_links = []
@@ -575,112 +1254,10 @@ class DataHandler:
 
             search_item = urllib.parse.quote(query_text)
 
-            for base_url in self.libgen_address_v2_list:
-                if self.libgen_stop_event.is_set():
-                    return found_base_url, found_links
-                try:
-                    self.general_logger.info(
-                        f'Searching {base_url} for Book: {req_item["author"]} - {req_item["book_name"]} - Allowed Languages: {",".join(req_item["allowed_languages"])}'
-                    )
-
-                    url = f"{base_url}/index.php?req={search_item}"
-                    self.general_logger.info(f'Search Url: {url} ')
-
-                    response = self.stoppable_request('get', url, timeout=self.request_timeout)
-                    if response and response.status_code == 200:
-                        soup = BeautifulSoup(response.text, "html.parser")
-                        table = soup.find("tbody")
-                        if table:
-                            rows = table.find_all("tr")
-                        else:
-                            rows = []
-
-                        for row in rows:
-                            try:
-                                cells = row.find_all("td")
-                                try:
-                                    author_string = cells[1].get_text().strip()
-                                except (AttributeError, IndexError):
-                                    author_string = ""
-                                try:
-                                    a_tags = cells[0].find_all("a")
-                                    raw_title = ""
-                                    for a in a_tags:
-                                        text = a.get_text().strip()
-                                        if text:
-                                            raw_title = text
-                                            break
-
-                                    if "\nISBN" in raw_title:
-                                        title_string = raw_title.split("\nISBN")[0]
-                                    elif "\nASIN" in raw_title:
-                                        title_string = raw_title.split("\nASIN")[0]
-                                    else:
-                                        title_string = raw_title
-                                except (AttributeError, IndexError):
-                                    title_string = ""
-
-                                try:
-                                    language = cells[4].get_text().strip()
-                                except (AttributeError, IndexError):
-                                    language = "english"
-                                try:
-                                    file_type = cells[7].get_text().strip().lower()
-                                except (AttributeError, IndexError):
-                                    file_type = ".epub"
-
-                                file_type_check = any(ft.replace(".", "").lower() in file_type for ft in self.preferred_extensions_fiction)
-                                language_check = language.lower() in req_item["allowed_languages"] or self.selected_language.lower() == "all"
-
-                                if file_type_check and language_check:
-                                    author_name = author.strip()
-
-                                    author_format1 = author_name
-
-                                    parts = author_name.split()
-                                    if len(parts) >= 2:
-                                        firstname = " ".join(parts[:-1])
-                                        lastname = parts[-1]
-                                        author_format2 = f"{lastname}, {firstname}"
-                                    else:
-                                        author_format2 = author_name
-
-                                    ratio1 = self.compare_author_names(author_format1, author_string)
-                                    ratio2 = self.compare_author_names(author_format2, author_string)
-                                    author_name_match_ratio = max(ratio1, ratio2)
-
-                                    book_name_match_ratio = fuzz.ratio(title_string, book_search_text)
-
-                                    if author_name_match_ratio >= self.minimum_match_ratio and book_name_match_ratio >= self.minimum_match_ratio:
-                                        mirrors = cells[8]
-                                        links = mirrors.find_all("a", href=True)
-                                        for link in links:
-                                            href = link["href"]
-                                            if href.startswith("http://") or href.startswith("https://"):
-                                                found_links.append(href)
-                                            elif href.startswith("/"):
-                                                found_links.append(f"{base_url}" + href)
-
-                            except (AttributeError, IndexError, ValueError):
-                                pass
-
-                        if found_links:
-                            found_base_url = base_url
-                            break  
-
-                        if not found_links:
-                            req_item["status"] = "No Link Found"
-                            self.general_logger.info(f'Book:{req_item["author"]} - {req_item["book_name"]} not found on {base_url}')
-                        socketio.emit("libgen_update", {"status": "Success", "data": self.libgen_items, "percent_completion": self.percent_completion})
-
-                    elif response:
-                        self.general_logger.warning(f"Libgen mirror connection error for {base_url}: {response.status_code}")
-                        req_item["status"] = "Libgen Error"
-                        socketio.emit("libgen_update", {"status": self.libgen_status, "data": self.libgen_items, "percent_completion": self.percent_completion})
-
-                except Exception as e:
-                    self.general_logger.warning(f"Failed with {base_url}: {e}")
-                    continue
+            found_base_url, found_links = self.query_mirrors(
+                self.libgen_address_v2_list,
+                lambda base_url: self._search_libgen_v2_mirror(req_item, base_url, search_item, book_search_text),
+            )
  
         except Exception as e:
             self.general_logger.error(f"Error Searching libgen v2 list: {str(e)}")
@@ -690,77 +1267,165 @@ class DataHandler:
             self.general_logger.info(f'Links Found for Book: {req_item["author"]} - {req_item["book_name"]} on {found_base_url}')
             return found_base_url, found_links
 
-    def _link_finder_annas_archive(self, req_item):
-        if (self.aaclient is None):
-            return []
+    def _search_libgen_v2_mirror(self, req_item, base_url, search_item, book_search_text):
         found_links = []
-
         try:
-            self.general_logger.warning(f'Searching annas-archive for Book: {req_item["author"]} - {req_item["book_name"]} - Allowed Languages: {",".join(req_item["allowed_languages"])}')
-            author = req_item["author"]
-            book_name = req_item["book_name"]
+            cache_query = self.search_cache_query(req_item, search_item)
+            cached_links = self.get_cached_search("libgen_v2", base_url, cache_query, req_item)
+            if cached_links is not None:
+                return cached_links
 
-            author_search_text = SearchUtils.get_author_search_text(author, self.search_last_name_only)
-            book_search_text = SearchUtils.get_search_text(book_name, self.search_shortened_title)
-            query_text = f"{author_search_text} - {book_search_text}"
+            self.general_logger.info(
+                f'Searching {base_url} for Book: {req_item["author"]} - {req_item["book_name"]} - Allowed Languages: {",".join(req_item["allowed_languages"])}'
+            )
 
-            search_item = query_text.replace(" ", "+")
-            url = f"http://annas-archive.org/search?index=&q={search_item}"
+            url = f"{base_url}/index.php?req={search_item}"
             self.general_logger.info(f'Search Url: {url} ')
 
             response = self.stoppable_request('get', url, timeout=self.request_timeout)
             if response and response.status_code == 200:
-                parsetext = response.text.replace(("<!--"), '').replace("-->", '')
-                soup = BeautifulSoup(parsetext, "html.parser")
+                rows = self.result_parser.libgen_v2_rows(response.text, base_url)
+                matches = filter_libgen_v2_rows(rows, req_item, book_search_text, self.preferred_extensions_fiction, self.selected_language, self.minimum_match_ratio)
+                for links, author_name_match_ratio, book_name_match_ratio in matches:
+                    found_links.extend(links)
 
-                books = soup.find("div", {"class": "js-aarecord-list-outer"})
-                if books:
-                    rows = books.select("div.flex")
-                    for potential_book in rows:
-                        try:
-                            # Title
-                            title_elem = potential_book.find("a", {"class": lambda v: v and "text-lg" in v})
-                            title_string = title_elem.get_text(strip=True) if title_elem else ""
-                            self.general_logger.info(f'Title String: {title_string} ')
-
-                            # Author (look for user-edit icon link)
-                            author_elem = potential_book.find("a", {"href": lambda v: v and v.startswith("/search?q=")})
-                            author_string = author_elem.get_text(strip=True) if author_elem else ""
-                            self.general_logger.info(f'Author String: {author_string} ')
-
-                            # Info (language + file type)
-                            info_elem = potential_book.find("div", {"class": lambda v: v and "text-gray-800" in v})
-                            info_raw = info_elem.get_text(strip=True) if info_elem else "english"
-                            self.general_logger.info(f'Raw Info String: {info_raw} ')
+                self.search_cache.put("libgen_v2", base_url, cache_query, found_links)
+                if not found_links:
+                    req_item["status"] = "No Link Found"
+                    self.general_logger.info(f'Book:{req_item["author"]} - {req_item["book_name"]} not found on {base_url}')
+                self.emit_libgen_item_update(req_item)
 
-                            info_parts = [p.strip() for p in info_raw.split("·")]
+            elif response:
+                self.general_logger.warning(f"Libgen mirror connection error for {base_url}: {response.status_code}")
+                req_item["status"] = "Libgen Error"
+                self.emit_libgen_item_update(req_item)
 
-                            language_part = info_parts[0].split()[0].lower() if info_parts else "english"   
-                            filetype_part = info_parts[1].upper() if len(info_parts) > 1 else ""            
+        except Exception as e:
+            self.general_logger.warning(f"Failed with {base_url}: {e}")
+
+        return found_links
+
+    def search_cache_query(self, req_item, query_text):
+        # Everything that changes which rows are accepted is part of the cache key.
+        return " | ".join([
+            query_text.replace("+", " "),
+            ",".join(sorted(req_item["allowed_languages"])),
+            ",".join(self.preferred_extensions_fiction),
+            ",".join(self.preferred_extensions_non_fiction),
+            str(self.minimum_match_ratio),
+            self.selected_language,
+        ])
+
+    def get_cached_search(self, finder, mirror, cache_query, req_item):
+        cached_links = self.search_cache.get(finder, mirror, cache_query)
+        if cached_links == [] and (req_item.get("not_found_count") or req_item.get("force_search")):
+            # Retries of a book that ended Not Found (scheduled after its backoff, or forced) must search again, replaying
+            # the cached misses would only count as another Not Found.
+            return None
+        if cached_links is not None:
+            self.general_logger.info(f'Using cached {finder} result from {mirror} for Book: {req_item["author"]} - {req_item["book_name"]}')
+            if not cached_links:
+                req_item["status"] = "No Link Found"
+        return cached_links
+
+    def query_mirrors(self, addresses, search_func):
+        # Returns (address, links) for the first mirror in the list that yields links.
+        addresses = self.mirror_health.order(addresses, HttpSessionPool.host_key)
+        if not self.mirror_fan_out or len(addresses) < 2:
+            for address in addresses:
+                if self.libgen_stop_event.is_set() or self.is_request_cancelled():
+                    break
+                with self.tracer.span(HttpSessionPool.host_key(address), "mirror"):
+                    found_links = search_func(address)
+                self.count_mirror_search(address, found_links)
+                if found_links:
+                    return address, found_links
+            return None, []
+
+        mirror_cancel_event = threading.Event()
+        parent_cancel_events = getattr(self.request_context, "cancel_events", ())
+        trace_id = self.tracer.current()
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(addresses), thread_name_prefix="Mirror")
+        try:
+            waiting = list(addresses)
+            pending = {}
+            while waiting or pending:
+                if self.libgen_stop_event.is_set() or self.is_request_cancelled():
+                    break
+                # Hedge delay 0 starts every mirror at once, otherwise the next mirror starts when the current ones are slow.
+                if waiting and (not pending or self.mirror_hedge_delay == 0):
+                    address = waiting.pop(0)
+                    pending[executor.submit(self.run_mirror_search, search_func, address, parent_cancel_events + (mirror_cancel_event,), trace_id)] = address
+                    continue
+                timeout = self.mirror_hedge_delay if waiting else None
+                done, _ = concurrent.futures.wait(pending, timeout=timeout, return_when=concurrent.futures.FIRST_COMPLETED)
+                if not done and waiting:
+                    self.general_logger.info(f"No mirror answered within {self.mirror_hedge_delay}s, also trying {waiting[0]}")
+                    address = waiting.pop(0)
+                    pending[executor.submit(self.run_mirror_search, search_func, address, parent_cancel_events + (mirror_cancel_event,), trace_id)] = address
+                for future in done:
+                    address = pending.pop(future)
+                    found_links = future.result()
+                    self.count_mirror_search(address, found_links)
+                    if found_links:
+                        return address, found_links
+            return None, []
 
-                            self.general_logger.info(f'Parsed Language: {language_part} | Parsed Filetype: {filetype_part}')
+        finally:
+            mirror_cancel_event.set()
+            executor.shutdown(wait=False, cancel_futures=True)
 
+    def count_mirror_search(self, address, found_links):
+        host = HttpSessionPool.host_key(address)
+        metrics.inc("bookbounty_mirror_searches_total", host=host)
+        if found_links:
+            metrics.inc("bookbounty_mirror_hits_total", host=host)
 
+    def run_mirror_search(self, search_func, address, cancel_events, trace_id=None):
+        self.request_context.cancel_events = cancel_events
+        try:
+            with self.tracer.span(HttpSessionPool.host_key(address), "mirror", trace_id):
+                return search_func(address)
+        finally:
+            self.request_context.cancel_events = ()
 
-                            file_type_check = SearchUtils.check_file_type_match(filetype_part, self.preferred_extensions_fiction)
-                            language_check = SearchUtils.check_language_match(language_part, req_item["allowed_languages"], self.selected_language)
+    def _link_finder_annas_archive(self, req_item):
+        if (self.aaclient is None):
+            return []
+        found_links = []
 
+        try:
+            self.general_logger.warning(f'Searching annas-archive for Book: {req_item["author"]} - {req_item["book_name"]} - Allowed Languages: {",".join(req_item["allowed_languages"])}')
+            author = req_item["author"]
+            book_name = req_item["book_name"]
 
-                            if file_type_check and language_check:
-                                author_name_match_ratio = self.compare_author_names(author, author_string)
-                                book_name_match_ratio = fuzz.ratio(title_string, book_search_text)
-                                self.general_logger.info(f'Author Match: {author_name_match_ratio} - Book Match: {book_name_match_ratio} ')
+            author_search_text = SearchUtils.get_author_search_text(author, self.search_last_name_only)
+            book_search_text = SearchUtils.get_search_text(book_name, self.search_shortened_title)
+            query_text = f"{author_search_text} - {book_search_text}"
 
-                                if author_name_match_ratio >= self.minimum_match_ratio and book_name_match_ratio >= self.minimum_match_ratio:
-                                    href_elem = potential_book.find("a", href=True)
-                                    self.general_logger.info(f'Href Element: {href_elem} ')
+            search_item = query_text.replace(" ", "+")
+            cache_query = self.search_cache_query(req_item, search_item)
+            cached_links = self.get_cached_search("annas_archive", "annas-archive.org", cache_query, req_item)
+            if cached_links is not None:
+                found_links = cached_links
+                return found_links
 
-                                    if href_elem and href_elem["href"].startswith("/md5"):
-                                        found_links.append(f"https://annas-archive.org{href_elem['href']}")
-                                        self.general_logger.info(f'Found Link: {found_links[-1]} ')
+            url = f"http://annas-archive.org/search?index=&q={search_item}"
+            self.general_logger.info(f'Search Url: {url} ')
 
-                        except Exception as e:
-                            self.general_logger.debug(f"Skipping result due to parse error: {e}")
+            response = self.stoppable_request('get', url, timeout=self.request_timeout)
+            if response and response.status_code == 200:
+                rows = self.result_parser.annas_rows(response.text)
+                if rows is not None:
+                    self.general_logger.info(f"Anna's Archive returned {len(rows)} results")
+                    matches = filter_annas_rows(rows, req_item, book_search_text, self.preferred_extensions_fiction, self.selected_language, self.minimum_match_ratio)
+                    for href, author_name_match_ratio, book_name_match_ratio in matches:
+                        self.general_logger.info(f'Author Match: {author_name_match_ratio} - Book Match: {book_name_match_ratio} ')
+                        if href.startswith("/md5"):
+                            found_links.append(f"https://annas-archive.org{href}")
+                            self.general_logger.info(f'Found Link: {found_links[-1]} ')
+
+                    self.search_cache.put("annas_archive", "annas-archive.org", cache_query, found_links)
 
                 else:
                     self.general_logger.warning("Could not find 'results' div in Anna's Archive response. Page layout may have changed.")
@@ -770,13 +1435,12 @@ class DataHandler:
                 if not found_links:
                     req_item["status"] = "No Link Found"
 
-                socketio.emit("libgen_update", {"status": "Success", "data": self.libgen_items, "percent_completion": self.percent_completion})
+                self.emit_libgen_item_update(req_item)
 
             elif response:
-                socketio.emit("libgen_update", {"status": "Error", "data": self.libgen_items, "percent_completion": self.percent_completion})
                 self.general_logger.warning(f"Annas Archive connection error: {response.status_code}")
                 req_item["status"] = "Libgen Error"
-                socketio.emit("libgen_update", {"status": self.libgen_status, "data": self.libgen_items, "percent_completion": self.percent_completion})
+                self.emit_libgen_item_update(req_item)
         
         except Exception as e:
             self.general_logger.error(f"Error Searching annas-archive: {str(e)}")
@@ -786,52 +1450,91 @@ class DataHandler:
             return found_links
     
     def stoppable_request(self, method, url, timeout, **kwargs):
+        host = HttpSessionPool.host_key(url)
         start_time = time.time()
         while time.time() - start_time < timeout:
-            if self.libgen_stop_event.is_set():
+            if self.libgen_stop_event.is_set() or self.is_request_cancelled():
                 self.general_logger.info(f"Request to {url} cancelled by stop event.")
                 return None
+            # Checked before asking for a slot, a half-open circuit grants only one probe.
+            remaining_timeout = timeout - (time.time() - start_time)
+            if remaining_timeout <= 0:
+                break
+            if not self.mirror_health.allow_request(host):
+                self.general_logger.info(f"Request to {url} skipped, circuit open for {host}")
+                return None
             try:
-                # Use a short, dynamic timeout for the actual request attempt
-                remaining_timeout = timeout - (time.time() - start_time)
-                if remaining_timeout <= 0:
-                    break
-                
-                # The timeout for each individual attempt is the smaller of 5s or the remaining time
+                # The timeout for each individual attempt is the smaller of 10s or the remaining time
                 attempt_timeout = min(10.0, remaining_timeout)
-                
-                response = requests.request(method, url, timeout=attempt_timeout, **kwargs)
+
+                with self.tracer.span(f"wait {host}", "limiter"):
+                    acquired = self.host_limiter.acquire(host, lambda: self.libgen_stop_event.is_set() or self.is_request_cancelled(), remaining_timeout)
+                if not acquired:
+                    if self.libgen_stop_event.is_set() or self.is_request_cancelled():
+                        self.general_logger.info(f"Request to {url} cancelled by stop event.")
+                    else:
+                        self.general_logger.info(f"Request to {url} skipped, {host} is unavailable within the timeout")
+                    return None
+                try:
+                    attempt_start = time.time()
+                    with self.tracer.span(f"{method.upper()} {host}", "http", url=url) as span_args:
+                        response = self.http_pool.request(method, url, timeout=attempt_timeout, **kwargs)
+                        span_args["status"] = response.status_code
+                finally:
+                    self.host_limiter.release(host)
+                metrics.observe("bookbounty_request_duration_seconds", time.time() - attempt_start, host=host)
+                metrics.inc("bookbounty_requests_total", host=host, code=response.status_code)
+                if response.status_code == 429 or (response.status_code == 503 and "Retry-After" in response.headers):
+                    # Rate limited, not broken: pause the whole host rather than counting it against the mirror's health.
+                    retry_after = HostLimiter.parse_retry_after(response.headers.get("Retry-After"), RATE_LIMIT_DEFAULT_RETRY_AFTER)
+                    self.host_limiter.defer(host, retry_after)
+                    if time.time() - start_time + retry_after < timeout:
+                        metrics.inc("bookbounty_request_retries_total", host=host, reason="rate_limited")
+                        response.close()
+                        continue
+                    return response
+                if response.status_code >= 500:
+                    self.mirror_health.record_failure(host, f"HTTP {response.status_code}")
+                else:
+                    self.mirror_health.record_success(host, time.time() - attempt_start)
                 return response
             except requests.exceptions.Timeout:
                 # This is expected if the server is slow, we'll loop and try again
+                metrics.inc("bookbounty_requests_total", host=host, code="timeout")
+                metrics.inc("bookbounty_request_retries_total", host=host, reason="timeout")
+                self.mirror_health.record_failure(host, "Timeout")
                 self.general_logger.info(f"Request to {url} timed out, retrying...")
                 continue
             except requests.exceptions.RequestException as e:
                 # For other request errors, log it and stop trying
+                metrics.inc("bookbounty_requests_total", host=host, code="error")
+                self.mirror_health.record_failure(host, e)
                 self.general_logger.error(f"Request to {url} failed: {e}")
                 return None
+            finally:
+                # Every way out of an attempt that took a probe gives it back, otherwise the host stays blocked.
+                self.mirror_health.release_probe(host)
         # If we exit the loop, the total timeout has been exceeded
         self.general_logger.warning(f"Request to {url} failed after multiple retries within the total timeout.")
         return None
 
-    def compare_author_names(self, author, author_string):
-        return SearchUtils.compare_author_names(author, author_string)
+    def is_request_cancelled(self):
+        return any(event.is_set() for event in getattr(self.request_context, "cancel_events", ()))
 
-    def preprocess(self, name):
-        return SearchUtils.preprocess_name(name)
-
-    def download_from_mirror(self, req_item, link, base_url):
+    def resolve_download_link(self, req_item, link, base_url, is_libgen_api=False):
+        # Turns a search result link into the direct file link, fetching the mirror page when needed.
         if self.libgen_stop_event.is_set():
             return "Cancelled"
         req_item["status"] = "Checking Link"
-        socketio.emit("libgen_update", {"status": self.libgen_status, "data": self.libgen_items, "percent_completion": self.percent_completion})
+        self.emit_libgen_item_update(req_item)
         
         isAnna = False
-        download_response = None
+        valid_book_extensions = []
+        link_url = link
         if "annas-archive" in link:
             isAnna = True
             file_type = "" # determined in aaclient.py  
-        elif self.is_using_libgen_api:
+        elif is_libgen_api:
             valid_book_extensions = self.preferred_extensions_non_fiction
             link_url = link
             try:
@@ -843,33 +1546,9 @@ class DataHandler:
                 valid_book_extensions = self.preferred_extensions_fiction
                 response = self.stoppable_request('get', link, timeout=self.request_timeout)
                 if response and response.status_code == 200:
-                    soup = BeautifulSoup(response.text, "html.parser")
-                    download_div = soup.find("div", id="download")
-
-                    if download_div:
-                        download_link = download_div.find("a")
-                        if download_link:
-                            link_url = download_link.get("href")
-                        else:
-                            return "Dead Link"
-                    else:
-                        table = soup.find("table")
-                        if table:
-                            rows = table.find_all("tr")
-                            for row in rows:
-                                if "GET" in row.get_text():
-                                    download_link = row.find("a")
-                                    if download_link:
-                                        link_text = download_link.get("href")
-                                        if "http" not in link_text:
-                                            link_url = f"{base_url}/{link_text}"
-                                        else:
-                                            link_url = link_text
-                                        break
-                            else:
-                                return "Dead Link"
-                        else:
-                            return "No Link Available"
+                    link_url, link_status = self.result_parser.mirror_download_link(response.text, base_url)
+                    if link_status:
+                        return link_status
 
                 elif response:
                     return str(response.status_code) + " : " + response.text
@@ -886,13 +1565,23 @@ class DataHandler:
                 file_type = None
                 self.general_logger.info("File extension not in url or invalid, checking link content...")
 
+        return {"link": link, "link_url": link_url, "file_type": file_type, "valid_book_extensions": valid_book_extensions, "is_anna": isAnna}
+
+    def download_resolved_link(self, req_item, resolved, connection_slot):
+        link = resolved["link"]
+        link_url = resolved["link_url"]
+        file_type = resolved["file_type"]
+        valid_book_extensions = resolved["valid_book_extensions"]
+        isAnna = resolved["is_anna"]
+        download_response = None
+
         if not isAnna:
             try:
                 download_response = self.stoppable_request('get', link_url, stream=True, timeout=self.request_timeout)
 
             except Exception as e:
                 req_item["status"] = "Link Failed"
-                socketio.emit("libgen_update", {"status": self.libgen_status, "data": self.libgen_items, "percent_completion": self.percent_completion})
+                self.emit_libgen_item_update(req_item)
                 self.general_logger.error(f"Exception {str(e)} thrown by: {link_url}")
                 return "Link Failed"
 
@@ -912,39 +1601,37 @@ class DataHandler:
             if not file_type or file_type not in valid_book_extensions:
                 return "Wrong File Type"
 
-        # Sanitize author and book names for file system safety using utility functions
-        cleaned_author_name = SearchUtils.clean_filename(req_item["author"])
-        cleaned_book_name = SearchUtils.clean_filename(req_item["book_name"])
+        file_path = SearchUtils.build_book_path(self.download_folder, self.selected_path_type, req_item, file_type)
 
-        if self.selected_path_type == "file":
-            file_path = os.path.join(self.download_folder, f"{cleaned_author_name} - {cleaned_book_name} ({req_item['year']}){file_type}")
+        # Jobs for the same book share one deterministic .part file, so only one of them works on a path at a time.
+        with self.claim_download_path(file_path, connection_slot):
+            return self.download_to_path(req_item, link, link_url, isAnna, download_response, file_path, connection_slot)
 
-        elif self.selected_path_type == "folder":
-            path_elements = [self.download_folder, req_item["author"]]
-
-            if req_item["series"]:
-                raw_series_string = req_item["series"].split(";")[0] if ";" in req_item["series"] else req_item["series"]
-
-                if " #" in raw_series_string:
-                    series_name, series_number = raw_series_string.split(" #", maxsplit=1)
-                    cleaned_series_name = re.sub(r"\s{2,}", " ", re.sub(r'[\\/*?:"<>|]', " - ", series_name.replace("/", "+")))
-                    path_elements.append(cleaned_series_name)
-                    path_elements.append(f"{series_number} - {cleaned_book_name} ({req_item['year']})")
-                    path_elements.append(f"{series_number} - {cleaned_series_name} - {cleaned_author_name} - {cleaned_book_name} ({req_item['year']}){file_type}")
-
-                else:
-                    series_name = raw_series_string.replace("/", "+")
-                    cleaned_series_name = re.sub(r"\s{2,}", " ", re.sub(r'[\\/*?:"<>|]', " - ", series_name))
-                    path_elements.append(cleaned_series_name)
-                    path_elements.append(f"{cleaned_book_name} ({req_item['year']})")
-                    path_elements.append(f"{series_name} - {cleaned_author_name} - {cleaned_book_name} ({req_item['year']}){file_type}")
-
-            else:
-                path_elements.append(f"{cleaned_book_name} ({req_item['year']})")
-                path_elements.append(f"{cleaned_author_name} - {cleaned_book_name} ({req_item['year']}){file_type}")
-
-            file_path = os.path.join(*path_elements)
+    @contextlib.contextmanager
+    def claim_download_path(self, file_path, connection_slot):
+        with self.download_paths_lock:
+            entry = self.download_path_locks.setdefault(file_path, {"lock": threading.Lock(), "users": 0})
+            entry["users"] += 1
+        try:
+            # Waits for the other job, which leaves the finished file behind (Already Exists) or a partial one to resume.
+            # The connection slot is given up meanwhile, the other job may need it for its own connections.
+            # download_to_path takes it again before it streams a body.
+            if not entry["lock"].acquire(blocking=False):
+                connection_slot.release()
+                while not entry["lock"].acquire(timeout=1):
+                    if self.libgen_stop_event.is_set():
+                        raise Exception("Cancelled")
+            try:
+                yield
+            finally:
+                entry["lock"].release()
+        finally:
+            with self.download_paths_lock:
+                entry["users"] -= 1
+                if not entry["users"]:
+                    del self.download_path_locks[file_path]
 
+    def download_to_path(self, req_item, link, link_url, isAnna, download_response, file_path, connection_slot):
         if os.path.exists(file_path):
             self.general_logger.info("File already exists: " + file_path)
             req_item["status"] = "File Already Exists"
@@ -958,49 +1645,103 @@ class DataHandler:
 
         if not isAnna and download_response.status_code != 200:
             req_item["status"] = "Download Error"
-            socketio.emit("libgen_update", {"status": self.libgen_status, "data": self.libgen_items, "percent_completion": self.percent_completion})
+            self.emit_libgen_item_update(req_item)
             error_string = f"{download_response.status_code} : {download_response.text}"
             self.general_logger.error(f"Error downloading: {os.path.basename(file_path)} - {error_string}")
             return error_string
         
-        socketio.emit("libgen_update", {"status": self.libgen_status, "data": self.libgen_items, "percent_completion": self.percent_completion})
+        self.emit_libgen_item_update(req_item)
         
         if isAnna and self.aaclient is not None:
+            torrent_client = "qbittorrent" if self.aaclient.qbitt_client is not None else "hnr"
             try:
                 req_item["status"] = "Torrenting"                
-                if self.aaclient.torrent_from_bookbounty(link, os.path.basename(file_path), os.path.dirname(file_path)):
+                with self.tracer.span("torrent", "torrent", client=torrent_client):
+                    torrent_added = self.aaclient.torrent_from_bookbounty(link, os.path.basename(file_path), os.path.dirname(file_path), self.transfer_progress_reporter(req_item))
+                if torrent_added:
+                    metrics.inc("bookbounty_torrent_adds_total", client=torrent_client, result="added")
                     return "Success"
+                metrics.inc("bookbounty_torrent_adds_total", client=torrent_client, result="failed")
             except Exception as e:
+                metrics.inc("bookbounty_torrent_adds_total", client=torrent_client, result="error")
                 self.general_logger.error(f"Error downloading from Anna: {str(e)}")
                 
         elif download_response and download_response.status_code == 200:
             req_item["status"] = "Downloading"
+            download_start = time.time()
             total_size = int(download_response.headers.get("content-length", 0))
-            downloaded_size = 0
-            chunk_counter = 0
+            etag = download_response.headers.get("ETag", "")
+            supports_ranges = download_response.headers.get("Accept-Ranges", "").lower() != "none"
+
+            # Partial downloads are kept next to the final file so an interrupted download can be resumed later.
+            part_file = f"{file_path}.part"
+            meta_file = f"{part_file}.json"
+            resume_from, preallocated = self.get_resume_offset(part_file, meta_file, link_url, etag, total_size) if supports_ranges else (0, False)
+            self.save_partial_metadata(meta_file, link_url, etag, total_size, preallocated, resume_from)
 
             self.general_logger.info(f"Downloading: {os.path.basename(file_path)} - Size: {total_size/1048576:.2f} MB")
 
-            try:
-                with tempfile.NamedTemporaryFile(delete=False) as f:
-                    for chunk in download_response.iter_content(chunk_size=1024):
-                        if self.libgen_stop_event.is_set():
-                            raise Exception("Cancelled")
-                        f.write(chunk)
-                        downloaded_size += len(chunk)
-                        chunk_counter += 1
-                        if chunk_counter % 100 == 0:
-                            percent_completion = (downloaded_size / total_size) * 100 if total_size > 0 else 0
-                            self.general_logger.info(f"Downloading: {os.path.basename(file_path)} - Progress: {percent_completion:.2f}%")
-
-                self.general_logger.info(f"Moving temp file: {f.name} to final location: {file_path}")
-                shutil.move(f.name, file_path)
+            response = download_response
+            if self.should_segment_download(download_response, total_size, resume_from):
+                response.close()
+                response = None
+                # Every segment takes its own slot of the host's connection cap.
+                connection_slot.release()
+                with self.tracer.span("segmented download", "download", segments=self.download_segments):
+                    segmented = self.download_segmented(req_item, link_url, part_file, total_size, os.path.basename(file_path))
+                if segmented:
+                    self.general_logger.info(f"Moving partial file: {part_file} to final location: {file_path}")
+                    with self.tracer.span("finalize", "download"):
+                        os.replace(part_file, file_path)
+                    if os.path.exists(meta_file):
+                        os.remove(meta_file)
+                elif os.path.exists(part_file):
+                    os.remove(part_file)
+
+            for attempt in range(0 if os.path.exists(file_path) else DOWNLOAD_RESUME_ATTEMPTS):
+                writer = None
+                try:
+                    connection_slot.acquire()
+                    if response is None or resume_from or attempt > 0:
+                        if response is not None:
+                            response.close()
+                        response, resume_from = self.open_resumed_download(link_url, resume_from, etag)
+                        if resume_from:
+                            self.general_logger.info(f"Resuming: {os.path.basename(file_path)} from {resume_from/1048576:.2f} MB")
+
+                    # A resumed part file keeps the preallocation it was created with, its size then says nothing about progress.
+                    writer = DownloadWriter(part_file, total_size, resume_from, preallocated if resume_from else self.download_preallocate)
+                    writer.open()
+                    preallocated = writer.preallocate
+                    self.save_partial_metadata(meta_file, link_url, etag, total_size, writer.preallocate, writer.downloaded)
+                    progress_logger = self.download_progress_logger(req_item, os.path.basename(file_path), total_size, writer.downloaded)
+                    with self.tracer.span("write file", "download", attempt=attempt, resume_from=resume_from):
+                        writer.write(response.iter_content(chunk_size=self.download_chunk_size), self.libgen_stop_event, progress_logger)
+
+                    self.general_logger.info(f"Moving partial file: {part_file} to final location: {file_path}")
+                    with self.tracer.span("finalize", "download"):
+                        writer.finalize(file_path)
+                    if os.path.exists(meta_file):
+                        os.remove(meta_file)
+                    break
 
-            except Exception as e:
-                self.general_logger.error(f"Error downloading to temp file: {str(e)}")
-                if os.path.exists(f.name):
-                    os.remove(f.name)
-                    self.general_logger.info(f"Removed temp file: {f.name}")
+                except Exception as e:
+                    self.general_logger.error(f"Error downloading to partial file: {str(e)}")
+                    if writer is not None:
+                        resume_from = writer.downloaded
+                        self.save_partial_metadata(meta_file, link_url, etag, total_size, writer.preallocate, writer.downloaded)
+                    if self.libgen_stop_event.is_set() or not supports_ranges:
+                        break
+                    if attempt + 1 < DOWNLOAD_RESUME_ATTEMPTS:
+                        self.general_logger.info(f"Retrying: {os.path.basename(file_path)} from byte {resume_from}")
+
+            if not supports_ranges and not os.path.exists(file_path):
+                for leftover in (part_file, meta_file):
+                    if os.path.exists(leftover):
+                        os.remove(leftover)
+                self.general_logger.info(f"Removed partial file: {part_file}")
+            elif os.path.exists(file_path) and time.time() > download_start:
+                metrics.observe("bookbounty_download_throughput_bytes_per_second", os.path.getsize(file_path) / (time.time() - download_start))
 
         if os.path.exists(file_path):
             self.general_logger.info(f"Downloaded: {link_url} to {file_path}")
@@ -1009,36 +1750,180 @@ class DataHandler:
             self.general_logger.info("Downloaded file not found in Directory")
             return "Failed"
 
+    def get_resume_offset(self, part_file, meta_file, link_url, etag, total_size):
+        # Only resume a partial file that came from the same source (same ETag when the server sends one).
+        # Returns the offset to resume from and whether the part file was preallocated to its full size.
+        try:
+            if not os.path.exists(part_file) or not os.path.exists(meta_file):
+                return 0, False
+            with open(meta_file, "r") as json_file:
+                meta = json.load(json_file)
+            same_source = meta.get("url") == link_url or (etag and meta.get("etag") == etag)
+            same_version = meta.get("etag", "") == etag and meta.get("total_size", 0) == total_size
+            # A preallocated part file is already full size, so the written byte count comes from the metadata.
+            offset = meta.get("downloaded", 0) if meta.get("preallocated") else os.path.getsize(part_file)
+            if same_source and same_version and (not total_size or offset < total_size):
+                return offset, bool(meta.get("preallocated"))
+            os.remove(part_file)
+
+        except Exception as e:
+            self.general_logger.warning(f"Ignoring partial download {part_file}: {str(e)}")
+
+        return 0, False
+
+    def save_partial_metadata(self, meta_file, link_url, etag, total_size, preallocated=False, downloaded=0):
+        try:
+            with open(meta_file, "w") as json_file:
+                json.dump({"url": link_url, "etag": etag, "total_size": total_size, "preallocated": preallocated, "downloaded": downloaded}, json_file)
+
+        except Exception as e:
+            self.general_logger.warning(f"Unable to save partial download metadata: {str(e)}")
+
+    def download_progress_logger(self, req_item, file_name, total_size, start_size=0):
+        last_logged = [time.time()]
+        last_size = [start_size]
+        report_progress = self.transfer_progress_reporter(req_item, total_size, start_size)
+
+        def log_progress(downloaded_size):
+            metrics.inc("bookbounty_download_bytes_total", downloaded_size - last_size[0])
+            last_size[0] = downloaded_size
+            progress = report_progress(downloaded_size)
+            now = time.time()
+            if now - last_logged[0] >= DOWNLOAD_PROGRESS_LOG_INTERVAL:
+                last_logged[0] = now
+                percent_completion = (downloaded_size / total_size) * 100 if total_size > 0 else 0
+                self.general_logger.info(f"Downloading: {file_name} - Progress: {percent_completion:.2f}% - {progress.rate/1048576:.2f} MB/s")
+
+        return log_progress
+
+    def transfer_progress_reporter(self, req_item, total_size=0, start_size=0):
+        # Called with the byte count after every chunk, but the item only changes (and goes to the UI) once per rate sample.
+        progress = self.transfer_stats.start(id(req_item), total_size, start_size)
+        req_item["progress"] = progress.snapshot()
+
+        def report_progress(downloaded_size, total_size=None):
+            if progress.update(downloaded_size, total_size):
+                req_item["progress"] = progress.snapshot()
+                self.emit_libgen_item_update(req_item)
+            return progress
+
+        return report_progress
+
+    def should_segment_download(self, response, total_size, resume_from):
+        return (
+            self.download_segments > 1
+            and not resume_from
+            and total_size >= SEGMENTED_DOWNLOAD_MIN_SIZE
+            and response.headers.get("Accept-Ranges", "").lower() == "bytes"
+        )
+
+    def get_host_connection_limit(self, url):
+        host = HttpSessionPool.host_key(url)
+        with self.host_connection_limits_lock:
+            if host not in self.host_connection_limits:
+                self.host_connection_limits[host] = threading.BoundedSemaphore(self.download_host_connection_cap)
+            return self.host_connection_limits[host]
+
+    def download_segmented(self, req_item, link_url, part_file, total_size, file_name):
+        ranges = split_ranges(total_size, self.download_segments)
+        self.general_logger.info(f"Downloading: {file_name} in {len(ranges)} segments")
+        allocate_part_file(part_file, total_size)
+
+        progress_logger = self.download_progress_logger(req_item, file_name, total_size)
+        progress_lock = threading.Lock()
+        trace_id = self.tracer.current()
+        downloaded = [0]
+        segment_failed = threading.Event()
+        segment_stop = types.SimpleNamespace(is_set=lambda: self.libgen_stop_event.is_set() or segment_failed.is_set())
+
+        def add_progress(length):
+            with progress_lock:
+                downloaded[0] += length
+                progress_logger(downloaded[0])
+
+        def fetch_segment(start, end):
+            with self.get_host_connection_limit(link_url), self.tracer.span(f"segment {start}-{end}", "download", trace_id):
+                response = self.stoppable_request('get', link_url, stream=True, timeout=self.request_timeout, headers={"Range": f"bytes={start}-{end}"})
+                if not response or response.status_code != 206:
+                    raise Exception(f"Segment {start}-{end} not served as a range: {response.status_code if response else 'no response'}")
+                written = write_segment(part_file, start, response.iter_content(chunk_size=self.download_chunk_size), segment_stop, add_progress)
+                if written != end - start + 1:
+                    raise Exception(f"Segment {start}-{end} incomplete: {written} bytes")
+
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=len(ranges), thread_name_prefix="Segment") as executor:
+                futures = [executor.submit(fetch_segment, start, end) for start, end in ranges]
+                try:
+                    for future in concurrent.futures.as_completed(futures):
+                        future.result()
+                except Exception:
+                    # Stop the remaining segments before the executor waits for them.
+                    segment_failed.set()
+                    raise
+            return True
+
+        except Exception as e:
+            self.general_logger.warning(f"Segmented download of {file_name} failed, falling back to a single connection: {str(e)}")
+            return False
+
+    def open_resumed_download(self, link_url, resume_from, etag):
+        if not resume_from:
+            response = self.stoppable_request('get', link_url, stream=True, timeout=self.request_timeout)
+            if response and response.status_code == 200:
+                return response, 0
+            raise Exception(f"Unable to restart download: {response.status_code if response else 'no response'}")
+
+        headers = {"Range": f"bytes={resume_from}-"}
+        if etag:
+            headers["If-Range"] = etag
+        response = self.stoppable_request('get', link_url, stream=True, timeout=self.request_timeout, headers=headers)
+        if not response:
+            raise Exception("No response to resume request")
+        if response.status_code == 206:
+            return response, resume_from
+        if response.status_code == 200:
+            # Range ignored or the file changed (If-Range mismatch), start again from the beginning.
+            self.general_logger.info(f"Server did not resume {link_url}, downloading from the start")
+            return response, 0
+        if response.status_code == 416:
+            response.close()
+            response = self.stoppable_request('get', link_url, stream=True, timeout=self.request_timeout)
+            if response and response.status_code == 200:
+                return response, 0
+        raise Exception(f"Unable to resume download: {response.status_code if response else 'no response'}")
+
     def reset_readarr(self):
         self.readarr_stop_event.set()
         for future in self.readarr_futures:
             if not future.done():
                 future.cancel()
         self.readarr_items = []
+        self.save_wanted_snapshot()
+        self.invalidate_metadata_profile_cache()
 
     def stop_libgen(self):
         try:
             self.libgen_stop_event.set()
-            for future in self.libgen_futures:
-                if not future.done():
-                    future.cancel()
-            for x in self.libgen_items[self.index :]:
-                x["status"] = "Download Stopped"
+            finished_ids = self.job_store.finished_ids()
+            for job_id, item in zip(self.libgen_job_ids, self.libgen_items):
+                if job_id not in finished_ids:
+                    item["status"] = "Download Stopped"
 
         except Exception as e:
             self.general_logger.error(f"Error Stopping libgen: {str(e)}")
 
         finally:
             self.libgen_status = "stopped"
-            socketio.emit("libgen_update", {"status": self.libgen_status, "data": self.libgen_items, "percent_completion": self.percent_completion})
+            self.emit_libgen_snapshot()
 
     def reset_libgen(self):
         try:
             self.libgen_stop_event.set()
-            for future in self.libgen_futures:
-                if not future.done():
-                    future.cancel()
             self.libgen_items = []
+            self.libgen_job_ids = []
+            self.job_store.clear()
+            self.tracer.clear()
+            self.libgen_completed = 0
             self.percent_completion = 0
 
         except Exception as e:
@@ -1048,10 +1933,12 @@ class DataHandler:
             self.general_logger.info("Reset Complete")
 
         finally:
-            socketio.emit("libgen_update", {"status": self.libgen_status, "data": self.libgen_items, "percent_completion": self.percent_completion})
+            self.emit_libgen_snapshot()
 
     def update_settings(self, data):
         try:
+            if data.get("readarr_address", "") != self.readarr_address or data.get("readarr_api_key", "") != self.readarr_api_key:
+                self.invalidate_metadata_profile_cache()
             self.readarr_address = data.get("readarr_address", "")
             self.readarr_api_key = data.get("readarr_api_key", "")
             
@@ -1073,6 +1960,16 @@ class DataHandler:
                     self.minimum_match_ratio = 90
             except (ValueError, TypeError):
                 self.general_logger.error(f"Invalid minimum_match_ratio: {data.get('minimum_match_ratio')}")
+
+            try:
+                thread_limit = int(data.get("thread_limit", self.thread_limit))
+                if not (MIN_THREAD_LIMIT <= thread_limit <= MAX_THREAD_LIMIT):
+                    self.general_logger.warning(f"Thread limit must be between {MIN_THREAD_LIMIT}-{MAX_THREAD_LIMIT}, keeping {self.thread_limit}")
+                elif thread_limit != self.thread_limit:
+                    self.thread_limit = thread_limit
+                    self.apply_thread_limit()
+            except (ValueError, TypeError):
+                self.general_logger.error(f"Invalid thread_limit: {data.get('thread_limit')}")
                 
             self.sync_schedule = self.parse_sync_schedule(data.get("sync_schedule", ""))
 
@@ -1081,10 +1978,17 @@ class DataHandler:
         except Exception as e:
             self.general_logger.error(f"Failed to update settings: {str(e)}")
 
+    def apply_thread_limit(self):
+        # Takes effect in a running session too: the download stage grows or shrinks between jobs.
+        pipeline = self.libgen_pipeline
+        if pipeline is not None:
+            pipeline.resize("download", self.thread_limit)
+        self.http_pool.resize(self.get_http_pool_size())
+
     def update_aaclient_settings(self):
         try:
             if self.aa_client_type.lower() == "hnr":
-                self.aaclient = aaclient(self.general_logger)
+                self.aaclient = aaclient(self.general_logger, http_pool=self.http_pool)
                 return
             
             if "qbittorrent" != self.aa_client_type.lower():
@@ -1093,7 +1997,7 @@ class DataHandler:
 
             endpoint = f"{self.readarr_address}/api/v1/downloadclient/"
             params = {"apikey": self.readarr_api_key}
-            response = requests.get(endpoint, params=params, timeout=self.request_timeout)
+            response = self.http_pool.get(endpoint, params=params, timeout=self.request_timeout)
             if response.status_code == 200:
                 downloadclients = response.json()
                 current_priority = 51 # readarr max is 50
@@ -1106,7 +2010,7 @@ class DataHandler:
                         for fields in dc["fields"]:
                             if "name" in fields and "value" in fields:
                                 download_client[fields["name"]] = fields["value"]                
-                        self.aaclient = aaclient(self.general_logger, download_client)
+                        self.aaclient = aaclient(self.general_logger, download_client, http_pool=self.http_pool)
                 
         except Exception as e:
             self.general_logger.error(f"Failed to update aaclient_settings: {str(e)}")
@@ -1136,13 +2040,18 @@ class DataHandler:
             "sleep_interval": self.sleep_interval,
             "sync_schedule": self.sync_schedule,
             "minimum_match_ratio": self.minimum_match_ratio,
+            "thread_limit": self.thread_limit,
         }
         socketio.emit("settings_loaded", data)
 
+    def load_mirror_health(self, sid):
+        socketio.emit("mirror_health", {"data": self.mirror_health.table()}, to=sid)
+
 
 app = Flask(__name__)
 app.secret_key = "secret_key"
-socketio = SocketIO(app)
+metrics = Metrics()
+socketio = MeteredSocketIO(app, metrics)
 data_handler = DataHandler()
 
 
@@ -1151,6 +2060,18 @@ def home():
     return render_template("base.html")
 
 
+@app.route("/metrics")
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/trace.json")
+def trace_export():
+    # Chrome trace event format, opens in chrome://tracing or ui.perfetto.dev.
+    trace = data_handler.export_trace(request.args.get("index"))
+    return Response(json.dumps(trace), mimetype="application/json", headers={"Content-Disposition": "attachment; filename=bookbounty_trace.json"})
+
+
 @socketio.on("readarr_get_wanted")
 def readarr():
     thread = threading.Thread(target=data_handler.get_wanted_list_from_readarr, name="Readarr_Thread")
@@ -1183,9 +2104,19 @@ def add_to_download_list(data):
     data_handler.add_items_to_download(data)
 
 
+@socketio.on("libgen_resync")
+def libgen_resync():
+    data_handler.emit_libgen_snapshot(request.sid)
+
+
+@socketio.on("force_retry")
+def force_retry(index):
+    data_handler.force_retry_item(index)
+
+
 @socketio.on("connect")
 def connection():
-    data_handler.connect()
+    data_handler.connect(request.sid)
 
 
 @socketio.on("disconnect")
@@ -1198,6 +2129,16 @@ def load_settings():
     data_handler.load_settings()
 
 
+@socketio.on("load_mirror_health")
+def load_mirror_health():
+    data_handler.load_mirror_health(request.sid)
+
+
+@socketio.on("load_item_trace")
+def load_item_trace(index):
+    data_handler.load_item_trace(index, request.sid)
+
+
 @socketio.on("update_settings")
 def update_settings(data):
     data_handler.update_settings(data)
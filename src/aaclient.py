@@ -50,8 +50,8 @@ def check_torrent_completion(ses, idx):
 
     return False
 
-def get_torrent_from_listing(url, save_as, guess_extension):
-    page = re.get(url)
+def get_torrent_from_listing(url, save_as, guess_extension, http=re):
+    page = http.get(url)
     tree = html.fromstring(page.content)
 
     fname = tree.xpath(book_xpaths["filename_within_torrent"])[0].split('“', 1)[1][:-1]
@@ -74,11 +74,12 @@ def qbitt_file_search(torrent_files, desired_file):
 
 
 class aaclient:
-    def __init__(self, logger, qbitt_client = None):
+    def __init__(self, logger, qbitt_client = None, http_pool = None):
         self.logger = logger 
         self.qbitt_client = qbitt_client    
+        self.http = http_pool if http_pool is not None else re
     
-    def hnr_download_torrent(self, t_path, desired_file, save_filename, save_path):
+    def hnr_download_torrent(self, t_path, desired_file, save_filename, save_path, progress_callback=None):
         info = lt.torrent_info(t_path)
         ses = lt.session({'listen_interfaces': '0.0.0.0:6881'})
 
@@ -94,22 +95,28 @@ class aaclient:
         
         self.logger.info(f"Downloading: {save_filename} - Size: {size/1048576:.2f} MB")
         os.remove(t_path)
+        last_logged = 0
         while True:
             s = h.status()
             prog = h.file_progress()[idx]
-            self.logger.info(f"{prog} - {state_str[s.state]} ({s.num_peers} {'peer' if s.num_peers == 1 else 'peers'})")
+            if progress_callback is not None:
+                progress_callback(prog, size)
+            # Progress is polled every second for the UI, the log only gets a line every 10 seconds.
+            if time.time() - last_logged >= 10:
+                last_logged = time.time()
+                self.logger.info(f"{prog} - {state_str[s.state]} ({s.num_peers} {'peer' if s.num_peers == 1 else 'peers'})")
 
             if check_torrent_completion(ses, idx):
                 os.rename(save_path + "/" + path, save_path + "/" + save_filename)
                 return True
 
-            time.sleep(10)
+            time.sleep(1)
 
 
     def dl_torrent_from_listing(self, url, save_as):
         self.logger.info(f"Getting torrent listing from: {url}")
-        t_url, torrent, fname, save_as = get_torrent_from_listing(url, save_as, True)
-        t = re.get(t_url, allow_redirects=True, stream=True)
+        t_url, torrent, fname, save_as = get_torrent_from_listing(url, save_as, True, self.http)
+        t = self.http.get(t_url, allow_redirects=True, stream=True)
         path = f"./{torrent}"
 
         with open(path, "wb") as fout:
@@ -170,11 +177,11 @@ class aaclient:
         
         return is_succes
         
-    def torrent_from_bookbounty(self, link, save_as, save_path):    
+    def torrent_from_bookbounty(self, link, save_as, save_path, progress_callback=None):    
         path, fname, save_as = self.dl_torrent_from_listing(link, save_as)
         
         if self.qbitt_client != None:            
             return self.qb_download_torrent(path, fname, save_as)
         else:
-            return self.hnr_download_torrent(path, fname, save_as, save_path)
+            return self.hnr_download_torrent(path, fname, save_as, save_path, progress_callback)
             
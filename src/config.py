@@ -8,6 +8,25 @@ DEFAULT_SETTINGS = {
     "libgen_address_v1_list": ["http://libgen.is", "http://libgen.rs"],
     "libgen_address_v2_list": ["http://libgen.li", "http://libgen.la"],
     "thread_limit": 1,
+    "search_threads": 2,
+    "resolve_threads": 2,
+    "readarr_page_size": 500,
+    "readarr_fetch_threads": 4,
+    "ui_update_rate": 4.0,
+    "http_pool_size": 0,
+    "http_prewarm": False,
+    "race_link_finders": False,
+    "mirror_fan_out": False,
+    "mirror_hedge_delay": 0.0,
+    "search_cache_positive_ttl": 86400.0,
+    "search_cache_negative_ttl": 21600.0,
+    "search_cache_max_entries": 10000,
+    "download_chunk_size": 1048576,
+    "download_preallocate": False,
+    "download_segments": 1,
+    "download_host_connection_cap": 4,
+    "host_max_in_flight": 4,
+    "host_rate_limit": 0.0,
     "sleep_interval": 0,
     "library_scan_on_completion": True,
     "sync_schedule": [],
@@ -18,12 +37,23 @@ DEFAULT_SETTINGS = {
     "preferred_extensions_non_fiction": [".pdf", ".epub", ".mobi", ".azw3", ".djvu"],
     "search_last_name_only": False,
     "search_shortened_title": False,
+    "result_parser_type": "bs4",
+    "link_finders": ["annas_archive", "libgen_v2", "libgen_api", "libgen_v1"],
 }
 
 # File paths
 DEFAULT_CONFIG_FOLDER = "config"
 DEFAULT_DOWNLOAD_FOLDER = "downloads"
 SETTINGS_CONFIG_FILE = "settings_config.json"
+WANTED_LIST_SNAPSHOT_FILE = "wanted_list.json"
+SEARCH_CACHE_FILE = "search_cache.db"
+DOWNLOAD_QUEUE_FILE = "download_queue.db"
+
+# Jobs waiting between two download pipeline stages
+PIPELINE_QUEUE_SIZE = 16
+
+# Item statuses that are kept across wanted-list syncs and skipped by the scheduler
+COMPLETED_STATUSES = ["Download Complete", "File Already Exists"]
 
 # Validation ranges
 MIN_THREAD_LIMIT = 1
@@ -38,6 +68,28 @@ MIN_SLEEP_INTERVAL = 0
 SCHEDULER_CHECK_INTERVAL = 600  # 10 minutes
 SCHEDULER_SLEEP_AFTER_SYNC = 3600  # 1 hour
 
+# Readarr metadata profile cache (seconds)
+METADATA_PROFILE_CACHE_TTL = 3600
+METADATA_PROFILE_NEGATIVE_CACHE_TTL = 60
+
+# Delay (seconds) before the scheduler retries a book after its 1st, 2nd, ... "Not Found" result
+NOT_FOUND_BACKOFF_SCHEDULE = [3600, 21600, 86400, 604800]
+
+# Attempts per link at finishing a direct download, later attempts resume with HTTP Range requests
+DOWNLOAD_RESUME_ATTEMPTS = 3
+DOWNLOAD_PROGRESS_LOG_INTERVAL = 5  # seconds between download progress log lines
+DOWNLOAD_RATE_SAMPLE_INTERVAL = 1  # seconds between rate samples, and progress updates sent to the UI, of a download
+SEGMENTED_DOWNLOAD_MIN_SIZE = 16 * 1048576  # smaller files always use a single connection
+
+# Mirror health tracking
+MIRROR_FAILURE_THRESHOLD = 3  # consecutive failures before a host's circuit opens
+MIRROR_CIRCUIT_COOLDOWN = 300  # seconds before a half-open probe is allowed
+MIRROR_PROBE_TIMEOUT = 120  # seconds after which a probe without an outcome no longer blocks the next one
+MIRROR_EWMA_ALPHA = 0.3
+
+# Seconds to pause a host that answers 429 without a usable Retry-After header
+RATE_LIMIT_DEFAULT_RETRY_AFTER = 60
+
 # HTTP settings
 DEFAULT_REQUEST_HEADERS = {
     'User-Agent': 'BookBounty/1.0'
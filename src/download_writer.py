@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+
+import os
+
+
+class DownloadWriter:
+
+    def __init__(self, part_file, total_size=0, resume_from=0, preallocate=False):
+        self.part_file = part_file
+        self.total_size = total_size
+        self.downloaded = resume_from
+        self.preallocate = preallocate
+        self.file = None
+
+    def _open(self):
+        if self.downloaded:
+            f = open(self.part_file, "r+b")
+            f.seek(self.downloaded)
+            return f
+
+        f = open(self.part_file, "wb")
+        if self.preallocate and self.total_size and hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(f.fileno(), 0, self.total_size)
+            except OSError:
+                # Not supported by every filesystem, the download just grows the file instead.
+                self.preallocate = False
+        else:
+            self.preallocate = False
+        return f
+
+    def open(self):
+        # Creates (and preallocates) or reopens the part file ahead of write(), so callers can record how it was created.
+        if self.file is None:
+            self.file = self._open()
+
+    def write(self, chunks, stop_event=None, progress_callback=None):
+        self.open()
+        f, self.file = self.file, None
+        with f:
+            for chunk in chunks:
+                if stop_event is not None and stop_event.is_set():
+                    raise Exception("Cancelled")
+                f.write(chunk)
+                self.downloaded += len(chunk)
+                if progress_callback is not None:
+                    progress_callback(self.downloaded)
+
+        if self.total_size and self.downloaded < self.total_size:
+            raise Exception(f"Connection closed at {self.downloaded} of {self.total_size} bytes")
+
+    def finalize(self, file_path):
+        # The part file lives in the destination directory, so this is an atomic rename rather than a copy.
+        os.replace(self.part_file, file_path)
+
+
+def allocate_part_file(part_file, total_size):
+    # Sparse file of the final size so every segment can write at its own offset.
+    with open(part_file, "wb") as f:
+        f.truncate(total_size)
+
+
+def split_ranges(total_size, segments):
+    segment_size = -(-total_size // segments)
+    return [(start, min(start + segment_size, total_size) - 1) for start in range(0, total_size, segment_size)]
+
+
+def write_segment(part_file, start, chunks, stop_event=None, progress_callback=None):
+    written = 0
+    with open(part_file, "r+b") as f:
+        f.seek(start)
+        for chunk in chunks:
+            if stop_event is not None and stop_event.is_set():
+                raise Exception("Cancelled")
+            f.write(chunk)
+            written += len(chunk)
+            if progress_callback is not None:
+                progress_callback(len(chunk))
+    return written
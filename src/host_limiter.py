@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+
+import time
+import threading
+import email.utils
+
+
+class HostLimiter:
+
+    def __init__(self, logger, max_in_flight=0, rate=0, burst=1):
+        self.logger = logger
+        self.max_in_flight = max_in_flight
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+    def _state(self, host):
+        state = self.hosts.get(host)
+        if state is None:
+            state = {"in_flight": 0, "tokens": float(self.burst), "refilled_at": time.monotonic(), "blocked_until": 0}
+            self.hosts[host] = state
+        return state
+
+    def acquire(self, host, should_stop, timeout=None):
+        # Blocks until the host has a free slot, a token and no Retry-After in force. False if stopped while waiting, or at
+        # once if the host cannot be used within timeout seconds (a long Retry-After), so the caller can try another mirror.
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if should_stop():
+                return False
+            with self.lock:
+                state = self._state(host)
+                now = time.monotonic()
+                wait = state["blocked_until"] - now
+                if wait <= 0:
+                    if self.rate > 0:
+                        state["tokens"] = min(self.burst, state["tokens"] + (now - state["refilled_at"]) * self.rate)
+                        state["refilled_at"] = now
+                    if self.rate > 0 and state["tokens"] < 1:
+                        wait = (1 - state["tokens"]) / self.rate
+                    elif self.max_in_flight and state["in_flight"] >= self.max_in_flight:
+                        wait = 0.1
+                    else:
+                        if self.rate > 0:
+                            state["tokens"] -= 1
+                        state["in_flight"] += 1
+                        return True
+                if deadline is not None and now + wait > deadline:
+                    return False
+            time.sleep(min(wait, 0.5))
+
+    def release(self, host):
+        with self.lock:
+            state = self._state(host)
+            state["in_flight"] = max(0, state["in_flight"] - 1)
+
+    def defer(self, host, seconds):
+        with self.lock:
+            state = self._state(host)
+            state["blocked_until"] = max(state["blocked_until"], time.monotonic() + seconds)
+        self.logger.warning(f"Host {host} asked us to back off, pausing requests for {seconds:.0f}s")
+
+    @staticmethod
+    def parse_retry_after(value, default):
+        if not value:
+            return default
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = email.utils.parsedate_to_datetime(value)
+            return max(0.0, retry_at.timestamp() - time.time())
+        except (TypeError, ValueError):
+            return default
+
+
+class ConnectionSlot:
+    # One download's share of a host's connection cap, held while a response body streams. A download hands it back
+    # while its segments (which take slots of their own) or another job's download of the same file run.
+
+    def __init__(self, semaphore, should_stop):
+        self.semaphore = semaphore
+        self.should_stop = should_stop
+        self.held = False
+
+    def acquire(self):
+        while not self.held:
+            if self.should_stop():
+                raise Exception("Cancelled")
+            self.held = self.semaphore.acquire(timeout=1)
+
+    def release(self):
+        if self.held:
+            self.held = False
+            self.semaphore.release()
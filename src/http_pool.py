@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+
+import threading
+import urllib.parse
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class HttpSessionPool:
+
+    def __init__(self, logger, pool_size=10):
+        self.logger = logger
+        self.pool_size = pool_size
+        self.sessions = {}
+        self.stats = {}
+        self.in_flight = {}
+        # Sessions replaced by resize(), closed once their last in-flight request returns.
+        self.retired = []
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def host_key(url):
+        parsed = urllib.parse.urlsplit(url)
+        return f"{parsed.scheme}://{parsed.netloc}".lower()
+
+    def _new_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def session_for(self, url):
+        host = self.host_key(url)
+        with self.lock:
+            session = self.sessions.get(host)
+            if session is None:
+                session = self._new_session()
+                self.sessions[host] = session
+                self.stats[host] = {"requests": 0, "errors": 0}
+            self.in_flight[session] = self.in_flight.get(session, 0) + 1
+            return session
+
+    def _release(self, session):
+        with self.lock:
+            self.in_flight[session] -= 1
+            if self.in_flight[session]:
+                return
+            del self.in_flight[session]
+            if session not in self.retired:
+                return
+            self.retired.remove(session)
+        # A streamed body still reading from a connection keeps working, the connection is closed when it is released.
+        session.close()
+
+    def request(self, method, url, **kwargs):
+        session = self.session_for(url)
+        host = self.host_key(url)
+        try:
+            response = session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            with self.lock:
+                self.stats[host]["errors"] += 1
+            raise
+        finally:
+            self._release(session)
+        with self.lock:
+            self.stats[host]["requests"] += 1
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("get", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("post", url, **kwargs)
+
+    def resize(self, pool_size):
+        if pool_size == self.pool_size:
+            return
+        with self.lock:
+            self.pool_size = pool_size
+            idle = [session for session in self.sessions.values() if session not in self.in_flight]
+            self.retired.extend(session for session in self.sessions.values() if session in self.in_flight)
+            self.sessions = {host: self._new_session() for host in self.sessions}
+        for session in idle:
+            session.close()
+        self.logger.info(f"HTTP connection pools resized to {pool_size} connections per host")
+
+    def prewarm(self, urls, timeout):
+        for url in urls:
+            try:
+                self.request("head", url, timeout=timeout, allow_redirects=True)
+                self.logger.info(f"Pre-warmed connection to {self.host_key(url)}")
+            except Exception as e:
+                self.logger.warning(f"Failed to pre-warm connection to {self.host_key(url)}: {str(e)}")
+
+    def connection_counts(self, session):
+        opened = 0
+        for adapter in set(session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                opened += getattr(pools.get(key), "num_connections", 0)
+        return opened
+
+    def log_stats(self):
+        with self.lock:
+            snapshot = [(host, dict(stats), self.sessions.get(host)) for host, stats in self.stats.items()]
+        for host, stats, session in snapshot:
+            opened = self.connection_counts(session) if session else 0
+            self.logger.info(f"HTTP pool {host}: {stats['requests']} requests, {stats['errors']} errors, {opened} connections opened")
+
+    def close(self):
+        with self.lock:
+            sessions = list(self.sessions.values())
+            self.sessions = {}
+        for session in sessions:
+            session.close()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+
+import json
+import time
+import sqlite3
+import threading
+
+
+class JobStore:
+
+    def __init__(self, db_path, logger):
+        self.logger = logger
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, item TEXT, state TEXT, status TEXT, "
+                "attempts INTEGER DEFAULT 0, created REAL, updated REAL)"
+            )
+
+    def add(self, item):
+        now = time.time()
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO jobs (item, state, status, attempts, created, updated) VALUES (?, 'queued', ?, 0, ?, ?)",
+                (json.dumps(item), item.get("status", ""), now, now),
+            )
+            return cursor.lastrowid
+
+    def claim(self, job_id):
+        # Moves a queued job to in_progress in one statement, False when it is already running or done.
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET state = 'in_progress', attempts = attempts + 1, updated = ? WHERE id = ? AND state = 'queued'",
+                (time.time(), job_id),
+            )
+            return cursor.rowcount == 1
+
+    def mark_finished(self, job_id, state, status):
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE jobs SET state = ?, status = ?, updated = ? WHERE id = ?", (state, status, time.time(), job_id))
+
+    def remove(self, job_id):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def finished_ids(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT id FROM jobs WHERE state = 'done'").fetchall()
+        return {row[0] for row in rows}
+
+    def requeue_in_progress(self):
+        # Jobs that were running when the process died go back to the queue.
+        with self.lock, self.conn:
+            cursor = self.conn.execute("UPDATE jobs SET state = 'queued', updated = ? WHERE state = 'in_progress'", (time.time(),))
+            return cursor.rowcount
+
+    def stop_queued(self):
+        # Jobs a Stop left unstarted are kept apart from crash leftovers, so a restart does not resume them.
+        with self.lock, self.conn:
+            cursor = self.conn.execute("UPDATE jobs SET state = 'stopped', updated = ? WHERE state = 'queued'", (time.time(),))
+            return cursor.rowcount
+
+    def load(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT id, item, state, status, attempts FROM jobs ORDER BY id").fetchall()
+        return [{"id": row[0], "item": json.loads(row[1]), "state": row[2], "status": row[3], "attempts": row[4]} for row in rows]
+
+    def clear(self):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM jobs")
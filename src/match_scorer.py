@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+
+import functools
+from thefuzz import fuzz, process
+from unidecode import unidecode
+
+try:
+    from src.search_utils import SearchUtils
+except ImportError:
+    from search_utils import SearchUtils
+
+
+@functools.lru_cache(maxsize=4096)
+def normalize_author(name):
+    # Same rules as SearchUtils.preprocess_name, after folding accents so "Lem" matches "Lém".
+    return SearchUtils.preprocess_name(unidecode(name)) if name else ""
+
+
+class MatchScorer:
+
+    def __init__(self, authors, title, minimum_match_ratio):
+        # The wanted item is normalized once, every result row is compared against these.
+        self.author_keys = list(dict.fromkeys(normalize_author(author) for author in authors))
+        self.title = title
+        self.minimum_match_ratio = minimum_match_ratio
+        # fuzz.ratio rounds its result, so anything that rounds up to the minimum must survive the cutoff.
+        self.score_cutoff = max(0, minimum_match_ratio - 0.5)
+
+    @classmethod
+    def with_author_formats(cls, author, title, minimum_match_ratio):
+        # Some mirrors list authors as "Lastname, Firstname", so both forms are scored and the best one kept.
+        author = author.strip()
+        parts = author.split()
+        formats = [author]
+        if len(parts) >= 2:
+            formats.append(f"{parts[-1]}, {' '.join(parts[:-1])}")
+        return cls(formats, title, minimum_match_ratio)
+
+    def _scores(self, query, choices):
+        if not query or not choices:
+            return {}
+        matches = process.extractWithoutOrder(query, choices, processor=None, scorer=fuzz.ratio, score_cutoff=self.score_cutoff)
+        return {key: score for _, score, key in matches if score >= self.minimum_match_ratio}
+
+    def ratios(self, author_string, title_string):
+        author_key = normalize_author(author_string)
+        author_ratio = max((fuzz.ratio(key, author_key) for key in self.author_keys), default=0)
+        return author_ratio, fuzz.ratio(title_string, self.title)
+
+    def filter(self, candidates):
+        # candidates is a list of (author_string, title_string, payload) for one result page.
+        # Returns (payload, author_ratio, title_ratio) for rows where both ratios reach the minimum, in page order.
+        title_scores = self._scores(self.title, {index: candidate[1] for index, candidate in enumerate(candidates)})
+        if not title_scores:
+            return []
+
+        authors = {index: normalize_author(candidates[index][0]) for index in title_scores}
+        author_scores = {}
+        for author_key in self.author_keys:
+            for index, score in self._scores(author_key, authors).items():
+                author_scores[index] = max(score, author_scores.get(index, 0))
+
+        return [(candidates[index][2], author_scores[index], title_scores[index]) for index in sorted(author_scores)]
+
+
+# Row filters of the link finders: rows in an accepted file type and language are scored against the wanted item.
+# Each returns (payload, author_ratio, title_ratio) like MatchScorer.filter.
+
+def filter_libgen_v1_rows(rows, req_item, title, preferred_extensions, selected_language, minimum_match_ratio):
+    candidates = []
+    for row in rows:
+        file_type_check = SearchUtils.check_file_type_match(row["file_type"], preferred_extensions)
+        language_check = SearchUtils.check_language_match(row["language"], req_item["allowed_languages"], selected_language)
+        if file_type_check and language_check:
+            candidates.append((row["author"], row["title"], row["links"]))
+    return MatchScorer([req_item["author"]], title, minimum_match_ratio).filter(candidates)
+
+
+def filter_libgen_v2_rows(rows, req_item, title, preferred_extensions, selected_language, minimum_match_ratio):
+    candidates = []
+    for row in rows:
+        file_type_check = any(ft.replace(".", "").lower() in row["file_type"] for ft in preferred_extensions)
+        language_check = row["language"].lower() in req_item["allowed_languages"] or selected_language.lower() == "all"
+        if file_type_check and language_check:
+            candidates.append((row["author"], row["title"], row["links"]))
+    return MatchScorer.with_author_formats(req_item["author"], title, minimum_match_ratio).filter(candidates)
+
+
+def filter_annas_rows(rows, req_item, title, preferred_extensions, selected_language, minimum_match_ratio):
+    candidates = []
+    for row in rows:
+        try:
+            # Info is "language · file type · ...", rows where it cannot be read are skipped.
+            info_parts = [part.strip() for part in row["info"].split("·")]
+            language_part = info_parts[0].split()[0].lower() if info_parts else "english"
+            filetype_part = info_parts[1].upper() if len(info_parts) > 1 else ""
+        except Exception:
+            continue
+        file_type_check = SearchUtils.check_file_type_match(filetype_part, preferred_extensions)
+        language_check = SearchUtils.check_language_match(language_part, req_item["allowed_languages"], selected_language)
+        if file_type_check and language_check:
+            candidates.append((row["author"], row["title"], row["href"]))
+    return MatchScorer([req_item["author"]], title, minimum_match_ratio).filter(candidates)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+
+import copy
+import threading
+from flask_socketio import SocketIO
+from socketio import packet
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+class MetricFamily:
+
+    def __init__(self, name, metric_type, help_text, labels, buckets=(), collect=None):
+        self.name = name
+        self.metric_type = metric_type
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.collect = collect
+        self.samples = {}
+
+
+class Metrics:
+    # In-memory counters, gauges and histograms, rendered in the Prometheus text format for the /metrics route.
+
+    def __init__(self):
+        self.families = {}
+        self.lock = threading.Lock()
+
+    def _register(self, family):
+        with self.lock:
+            self.families.setdefault(family.name, family)
+
+    def counter(self, name, help_text, labels=()):
+        self._register(MetricFamily(name, "counter", help_text, labels))
+
+    def gauge(self, name, help_text, labels=(), collect=None):
+        # collect() is called on every scrape and returns {label_values: value}, for values read from live state.
+        self._register(MetricFamily(name, "gauge", help_text, labels, collect=collect))
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self._register(MetricFamily(name, "histogram", help_text, labels, buckets=sorted(buckets)))
+
+    def _key(self, family, labels):
+        return tuple(str(labels.get(label, "")) for label in family.labels)
+
+    def inc(self, name, value=1, **labels):
+        family = self.families[name]
+        key = self._key(family, labels)
+        with self.lock:
+            family.samples[key] = family.samples.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        family = self.families[name]
+        key = self._key(family, labels)
+        with self.lock:
+            family.samples[key] = value
+
+    def observe(self, name, value, **labels):
+        family = self.families[name]
+        key = self._key(family, labels)
+        with self.lock:
+            sample = family.samples.get(key)
+            if sample is None:
+                sample = family.samples[key] = {"buckets": [0] * len(family.buckets), "sum": 0, "count": 0}
+            # Buckets are stored cumulative, the way they are exposed.
+            for index, bound in enumerate(family.buckets):
+                if value <= bound:
+                    sample["buckets"][index] += 1
+            sample["sum"] += value
+            sample["count"] += 1
+
+    def render(self):
+        with self.lock:
+            families = list(self.families.values())
+            snapshot = {family.name: copy.deepcopy(family.samples) for family in families}
+
+        lines = []
+        for family in families:
+            samples = family.collect() if family.collect is not None else snapshot[family.name]
+            lines.append(f"# HELP {family.name} {family.help_text}")
+            lines.append(f"# TYPE {family.name} {family.metric_type}")
+            for key, value in sorted(samples.items()):
+                labels = list(zip(family.labels, key))
+                if family.metric_type == "histogram":
+                    for bound, count in zip(family.buckets, value["buckets"]):
+                        lines.append(f"{family.name}_bucket{self._format_labels(labels + [('le', self._format_value(bound))])} {count}")
+                    lines.append(f"{family.name}_bucket{self._format_labels(labels + [('le', '+Inf')])} {value['count']}")
+                    lines.append(f"{family.name}_sum{self._format_labels(labels)} {self._format_value(value['sum'])}")
+                    lines.append(f"{family.name}_count{self._format_labels(labels)} {value['count']}")
+                else:
+                    lines.append(f"{family.name}{self._format_labels(labels)} {self._format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _format_labels(labels):
+        if not labels:
+            return ""
+        pairs = []
+        for name, value in labels:
+            value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+            pairs.append(f'{name}="{value}"')
+        return "{" + ",".join(pairs) + "}"
+
+    @staticmethod
+    def _format_value(value):
+        if isinstance(value, bool):
+            return str(int(value))
+        if isinstance(value, float):
+            return repr(round(value, 6))
+        return str(value)
+
+
+def metered_packet_class(metrics):
+    # Socket.IO packets that record their size when encoded. An emit is encoded once for all its recipients,
+    # so measuring here costs no extra serialization.
+    class MeteredPacket(packet.Packet):
+
+        def encode(self):
+            encoded = super().encode()
+            if self.packet_type in (packet.EVENT, packet.BINARY_EVENT) and self.data:
+                size = sum(len(part) for part in encoded) if isinstance(encoded, list) else len(encoded)
+                metrics.observe("bookbounty_socket_emit_payload_bytes", size, event=self.data[0])
+            return encoded
+
+    return MeteredPacket
+
+
+class MeteredSocketIO(SocketIO):
+    # SocketIO that counts every emit and the encoded size of those sent to connected clients.
+
+    def __init__(self, app, metrics, **kwargs):
+        self.metrics = metrics
+        self.metrics.counter("bookbounty_socket_emits_total", "Socket.IO emits by event.", ["event"])
+        self.metrics.histogram("bookbounty_socket_emit_payload_bytes", "Encoded size of each Socket.IO event sent to connected clients.", ["event"], SIZE_BUCKETS)
+        kwargs.setdefault("serializer", metered_packet_class(metrics))
+        super().__init__(app, **kwargs)
+
+    def emit(self, event, *args, **kwargs):
+        self.metrics.inc("bookbounty_socket_emits_total", event=event)
+        return super().emit(event, *args, **kwargs)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+
+
+import time
+import threading
+
+
+class MirrorHealth:
+
+    def __init__(self, logger, failure_threshold=3, cooldown=300, ewma_alpha=0.3, probe_timeout=120):
+        self.logger = logger
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.probe_timeout = probe_timeout
+        self.ewma_alpha = ewma_alpha
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+    def _entry(self, host):
+        entry = self.hosts.get(host)
+        if entry is None:
+            entry = {
+                "host": host,
+                "ewma_latency": None,
+                "successes": 0,
+                "failures": 0,
+                "consecutive_failures": 0,
+                "last_error": "",
+                "state": "closed",
+                "opened_at": 0,
+                "probe_in_flight": False,
+                "probe_owner": None,
+                "probe_started": 0,
+            }
+            self.hosts[host] = entry
+        return entry
+
+    def allow_request(self, host):
+        with self.lock:
+            entry = self._entry(host)
+            if entry["state"] == "closed":
+                return True
+            if entry["state"] == "open" and time.time() - entry["opened_at"] >= self.cooldown:
+                entry["state"] = "half_open"
+                entry["probe_in_flight"] = False
+            if entry["state"] == "half_open" and entry["probe_in_flight"] and time.time() - entry["probe_started"] >= self.probe_timeout:
+                # A probe that never reported back must not block the host for good.
+                self.logger.warning(f"Mirror {host} probe gave no outcome within {self.probe_timeout}s, allowing another")
+                entry["probe_in_flight"] = False
+            if entry["state"] == "half_open" and not entry["probe_in_flight"]:
+                # Let a single probe through, its outcome closes or re-opens the circuit.
+                entry["probe_in_flight"] = True
+                entry["probe_owner"] = threading.get_ident()
+                entry["probe_started"] = time.time()
+                self.logger.info(f"Mirror {host} circuit half-open, sending probe request")
+                return True
+            return False
+
+    def release_probe(self, host):
+        # Called once a request is finished with, a probe that ended without an outcome lets the next request probe instead.
+        # Only the thread that was sent as the probe gives it back.
+        with self.lock:
+            entry = self.hosts.get(host)
+            if entry is not None and entry["probe_in_flight"] and entry["probe_owner"] == threading.get_ident():
+                entry["probe_in_flight"] = False
+                entry["probe_owner"] = None
+
+    def record_success(self, host, latency):
+        with self.lock:
+            entry = self._entry(host)
+            entry["successes"] += 1
+            entry["consecutive_failures"] = 0
+            if entry["ewma_latency"] is None:
+                entry["ewma_latency"] = latency
+            else:
+                entry["ewma_latency"] = self.ewma_alpha * latency + (1 - self.ewma_alpha) * entry["ewma_latency"]
+            if entry["state"] != "closed":
+                self.logger.info(f"Mirror {host} recovered, circuit closed")
+            entry["state"] = "closed"
+            entry["probe_in_flight"] = False
+
+    def record_failure(self, host, error):
+        with self.lock:
+            entry = self._entry(host)
+            entry["failures"] += 1
+            entry["consecutive_failures"] += 1
+            entry["last_error"] = str(error)
+            entry["probe_in_flight"] = False
+            if entry["state"] == "half_open" or (entry["state"] == "closed" and entry["consecutive_failures"] >= self.failure_threshold):
+                entry["state"] = "open"
+                entry["opened_at"] = time.time()
+                self.logger.warning(f"Mirror {host} circuit opened for {self.cooldown}s after {entry['consecutive_failures']} consecutive failures: {error}")
+
+    def failure_rate(self, entry):
+        total = entry["successes"] + entry["failures"]
+        return entry["failures"] / total if total else 0
+
+    def order(self, addresses, host_key):
+        # Healthy hosts first (lowest failure rate, then lowest latency), open circuits last, otherwise keep list order.
+        with self.lock:
+            def score(indexed_address):
+                position, address = indexed_address
+                entry = self.hosts.get(host_key(address))
+                if entry is None:
+                    return (0, 0, 0, position)
+                latency = entry["ewma_latency"] if entry["ewma_latency"] is not None else 0
+                return (entry["state"] != "closed", round(self.failure_rate(entry), 1), latency, position)
+
+            return [address for _, address in sorted(enumerate(addresses), key=score)]
+
+    def table(self):
+        with self.lock:
+            rows = []
+            for entry in self.hosts.values():
+                rows.append({
+                    "host": entry["host"],
+                    "state": entry["state"],
+                    "ewma_latency": round(entry["ewma_latency"], 3) if entry["ewma_latency"] is not None else None,
+                    "failure_rate": round(self.failure_rate(entry), 3),
+                    "requests": entry["successes"] + entry["failures"],
+                    "last_error": entry["last_error"],
+                })
+            return sorted(rows, key=lambda row: row["host"])
+
+    def log_table(self):
+        for row in self.table():
+            latency = f"{row['ewma_latency']:.2f}s" if row["ewma_latency"] is not None else "n/a"
+            self.logger.info(f"Mirror {row['host']}: {row['state']}, latency {latency}, failure rate {row['failure_rate'] * 100:.0f}% over {row['requests']} requests, last error: {row['last_error'] or 'none'}")
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+
+import queue
+import threading
+import collections
+
+
+class PipelineStage:
+
+    def __init__(self, name, handler, workers, queue_size):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.queue = queue.Queue(maxsize=queue_size)
+        # Jobs sent back to an earlier stage skip the bound, otherwise two full stages could wait on each other forever.
+        self.retries = collections.deque()
+        self.threads = []
+        self.started = 0
+        self.lock = threading.Lock()
+
+    def take(self, timeout):
+        try:
+            return self.retries.popleft()
+        except IndexError:
+            pass
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class Pipeline:
+
+    def __init__(self, logger, queue_size):
+        self.logger = logger
+        self.queue_size = queue_size
+        self.stages = []
+        self.in_flight = 0
+        self.condition = threading.Condition()
+        self.closed = threading.Event()
+
+    def add_stage(self, name, handler, workers):
+        self.stages.append(PipelineStage(name, handler, max(1, workers), self.queue_size))
+
+    def stage(self, name):
+        for stage in self.stages:
+            if stage.name == name:
+                return stage
+        raise KeyError(f"Unknown pipeline stage: {name}")
+
+    def start(self):
+        for stage in self.stages:
+            with stage.lock:
+                self._add_workers(stage)
+
+    def _add_workers(self, stage):
+        while len(stage.threads) < stage.workers:
+            thread = threading.Thread(target=self._worker, args=(stage,), name=f"{stage.name.capitalize()}_{stage.started}")
+            thread.daemon = True
+            stage.started += 1
+            stage.threads.append(thread)
+            thread.start()
+
+    def resize(self, name, workers):
+        # Extra workers start straight away, surplus ones exit after finishing their current job.
+        stage = self.stage(name)
+        with stage.lock:
+            stage.workers = max(1, workers)
+            self._add_workers(stage)
+        self.logger.info(f"Pipeline {name} stage resized to {stage.workers} workers")
+
+    def _retire(self, stage):
+        with stage.lock:
+            if len(stage.threads) > stage.workers:
+                stage.threads.remove(threading.current_thread())
+                return True
+        return False
+
+    def submit(self, job):
+        with self.condition:
+            self.in_flight += 1
+        self._put(self.stages[0], job)
+
+    def _put(self, stage, job):
+        while not self.closed.is_set():
+            try:
+                stage.queue.put(job, timeout=0.2)
+                return
+            except queue.Full:
+                continue
+
+    def _forward(self, current, destination, job):
+        stage = self.stage(destination)
+        if self.stages.index(stage) <= self.stages.index(current):
+            stage.retries.append(job)
+        else:
+            self._put(stage, job)
+
+    def _worker(self, stage):
+        while not self.closed.is_set():
+            if self._retire(stage):
+                return
+            job = stage.take(timeout=0.2)
+            if job is None:
+                continue
+            try:
+                # Each handler returns the name of the stage the job moves to next, or None once it is done.
+                destination = stage.handler(job)
+            except Exception as e:
+                self.logger.error(f"Error in {stage.name} stage: {str(e)}")
+                destination = self.stages[-1].name if stage is not self.stages[-1] else None
+
+            if destination:
+                self._forward(stage, destination, job)
+            else:
+                with self.condition:
+                    self.in_flight -= 1
+                    self.condition.notify_all()
+
+    def wait(self, timeout=None):
+        # Returns True once every submitted job has left the last stage.
+        with self.condition:
+            return self.condition.wait_for(lambda: self.in_flight == 0, timeout)
+
+    def close(self):
+        self.closed.set()
+        for stage in self.stages:
+            with stage.lock:
+                threads = list(stage.threads)
+            for thread in threads:
+                thread.join()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+
+
+from bs4 import BeautifulSoup
+from lxml import html
+
+
+def split_title(raw_title):
+    if "\nISBN" in raw_title:
+        return raw_title.split("\nISBN")[0]
+    if "\nASIN" in raw_title:
+        return raw_title.split("\nASIN")[0]
+    return raw_title
+
+
+def mirror_href(href, base_url):
+    if href.startswith("http://") or href.startswith("https://"):
+        return href
+    if base_url is not None and href.startswith("/"):
+        return f"{base_url}{href}"
+    return None
+
+
+class SoupResultParser:
+    # BeautifulSoup with the pure-Python html.parser, the original parsing path.
+
+    name = "bs4"
+
+    def libgen_v1_rows(self, text):
+        soup = BeautifulSoup(text, "html.parser")
+        table = soup.find("tbody")
+        rows = []
+        for row in table.find_all("tr") if table else []:
+            try:
+                cells = row.find_all("td")
+                mirrors = row.find("ul", class_="record_mirrors_compact")
+                rows.append({
+                    "author": self._cell_text(cells, 0, ""),
+                    "title": split_title(self._cell_text(cells, 2, "")),
+                    "language": self._cell_text(cells, 3, "english"),
+                    "file_type": self._cell_text(cells, 4, ".epub").lower(),
+                    "links": [href for href in (mirror_href(a["href"], None) for a in mirrors.find_all("a", href=True)) if href] if mirrors else [],
+                })
+            except (AttributeError, IndexError, ValueError):
+                pass
+        return rows
+
+    def libgen_v2_rows(self, text, base_url):
+        soup = BeautifulSoup(text, "html.parser")
+        table = soup.find("tbody")
+        rows = []
+        for row in table.find_all("tr") if table else []:
+            try:
+                cells = row.find_all("td")
+                raw_title = ""
+                if cells:
+                    for a in cells[0].find_all("a"):
+                        a_text = a.get_text().strip()
+                        if a_text:
+                            raw_title = a_text
+                            break
+                links = []
+                if len(cells) > 8:
+                    links = [href for href in (mirror_href(a["href"], base_url) for a in cells[8].find_all("a", href=True)) if href]
+                rows.append({
+                    "author": self._cell_text(cells, 1, ""),
+                    "title": split_title(raw_title),
+                    "language": self._cell_text(cells, 4, "english"),
+                    "file_type": self._cell_text(cells, 7, ".epub").lower(),
+                    "links": links,
+                })
+            except (AttributeError, IndexError, ValueError):
+                pass
+        return rows
+
+    def annas_rows(self, text):
+        # Results below the fold are sent inside HTML comments, uncommenting them makes them parseable.
+        soup = BeautifulSoup(text.replace("<!--", "").replace("-->", ""), "html.parser")
+        books = soup.find("div", {"class": "js-aarecord-list-outer"})
+        if not books:
+            return None
+        rows = []
+        for potential_book in books.select("div.flex"):
+            title_elem = potential_book.find("a", {"class": lambda v: v and "text-lg" in v})
+            author_elem = potential_book.find("a", {"href": lambda v: v and v.startswith("/search?q=")})
+            info_elem = potential_book.find("div", {"class": lambda v: v and "text-gray-800" in v})
+            href_elem = potential_book.find("a", href=True)
+            rows.append({
+                "author": author_elem.get_text(strip=True) if author_elem else "",
+                "title": title_elem.get_text(strip=True) if title_elem else "",
+                "info": info_elem.get_text(strip=True) if info_elem else "english",
+                "href": href_elem["href"] if href_elem else "",
+            })
+        return rows
+
+    def mirror_download_link(self, text, base_url):
+        # Returns (link, None) or (None, status) when the mirror page has no usable link.
+        soup = BeautifulSoup(text, "html.parser")
+        download_div = soup.find("div", id="download")
+        if download_div:
+            download_link = download_div.find("a")
+            return (download_link.get("href"), None) if download_link else (None, "Dead Link")
+
+        table = soup.find("table")
+        if not table:
+            return None, "No Link Available"
+        for row in table.find_all("tr"):
+            if "GET" in row.get_text():
+                download_link = row.find("a")
+                if download_link:
+                    link_text = download_link.get("href") or ""
+                    return (link_text if "http" in link_text else f"{base_url}/{link_text}"), None
+        return None, "Dead Link"
+
+    @staticmethod
+    def _cell_text(cells, index, default):
+        try:
+            return cells[index].get_text().strip()
+        except (AttributeError, IndexError):
+            return default
+
+
+class LxmlResultParser:
+    # libxml2 parser, XPath pulls out just the result rows and cells that are used.
+
+    name = "lxml"
+
+    def _parse(self, text):
+        if not text or not text.strip():
+            return None
+        try:
+            return html.fromstring(text)
+        except ValueError:
+            # lxml refuses str input that carries an XML encoding declaration.
+            return html.fromstring(text.encode("utf-8"))
+
+    def libgen_v1_rows(self, text):
+        root = self._parse(text)
+        table = root.xpath("(//tbody)[1]") if root is not None else []
+        rows = []
+        for row in table[0].xpath(".//tr") if table else []:
+            cells = row.xpath(".//td")
+            mirrors = row.xpath(".//ul[contains(concat(' ', normalize-space(@class), ' '), ' record_mirrors_compact ')][1]")
+            rows.append({
+                "author": self._cell_text(cells, 0, ""),
+                "title": split_title(self._cell_text(cells, 2, "")),
+                "language": self._cell_text(cells, 3, "english"),
+                "file_type": self._cell_text(cells, 4, ".epub").lower(),
+                "links": [href for href in (mirror_href(value, None) for value in mirrors[0].xpath(".//a/@href")) if href] if mirrors else [],
+            })
+        return rows
+
+    def libgen_v2_rows(self, text, base_url):
+        root = self._parse(text)
+        table = root.xpath("(//tbody)[1]") if root is not None else []
+        rows = []
+        for row in table[0].xpath(".//tr") if table else []:
+            cells = row.xpath(".//td")
+            raw_title = ""
+            if cells:
+                for a in cells[0].xpath(".//a"):
+                    a_text = a.text_content().strip()
+                    if a_text:
+                        raw_title = a_text
+                        break
+            links = []
+            if len(cells) > 8:
+                links = [href for href in (mirror_href(value, base_url) for value in cells[8].xpath(".//a/@href")) if href]
+            rows.append({
+                "author": self._cell_text(cells, 1, ""),
+                "title": split_title(raw_title),
+                "language": self._cell_text(cells, 4, "english"),
+                "file_type": self._cell_text(cells, 7, ".epub").lower(),
+                "links": links,
+            })
+        return rows
+
+    def annas_rows(self, text):
+        root = self._parse(text)
+        books = root.xpath("//div[contains(concat(' ', normalize-space(@class), ' '), ' js-aarecord-list-outer ')][1]") if root is not None else []
+        if not books:
+            return None
+        books = books[0]
+        # Only the comments inside the result list are expanded, instead of copying the whole page twice.
+        for comment in books.xpath(".//comment()"):
+            parent = comment.getparent()
+            position = parent.index(comment)
+            fragments = html.fragments_fromstring(comment.text) if comment.text and comment.text.strip() else []
+            for fragment in fragments:
+                if not isinstance(fragment, str):
+                    position += 1
+                    parent.insert(position, fragment)
+            parent.remove(comment)
+
+        rows = []
+        for potential_book in books.xpath(".//div[contains(concat(' ', normalize-space(@class), ' '), ' flex ')]"):
+            title_elem = potential_book.xpath(".//a[contains(@class, 'text-lg')][1]")
+            author_elem = potential_book.xpath(".//a[starts-with(@href, '/search?q=')][1]")
+            info_elem = potential_book.xpath(".//div[contains(@class, 'text-gray-800')][1]")
+            href_elem = potential_book.xpath("(.//a[@href])[1]/@href")
+            rows.append({
+                "author": self._stripped_text(author_elem[0]) if author_elem else "",
+                "title": self._stripped_text(title_elem[0]) if title_elem else "",
+                "info": self._stripped_text(info_elem[0]) if info_elem else "english",
+                "href": href_elem[0] if href_elem else "",
+            })
+        return rows
+
+    def mirror_download_link(self, text, base_url):
+        root = self._parse(text)
+        if root is None:
+            return None, "No Link Available"
+        download_div = root.xpath("//div[@id='download'][1]")
+        if download_div:
+            download_link = download_div[0].xpath("(.//a)[1]")
+            return (download_link[0].get("href"), None) if download_link else (None, "Dead Link")
+
+        table = root.xpath("(//table)[1]")
+        if not table:
+            return None, "No Link Available"
+        for row in table[0].xpath(".//tr"):
+            if "GET" in row.text_content():
+                download_link = row.xpath("(.//a)[1]")
+                if download_link:
+                    link_text = download_link[0].get("href") or ""
+                    return (link_text if "http" in link_text else f"{base_url}/{link_text}"), None
+        return None, "Dead Link"
+
+    @staticmethod
+    def _cell_text(cells, index, default):
+        return cells[index].text_content().strip() if index < len(cells) else default
+
+    @staticmethod
+    def _stripped_text(element):
+        # Same result as BeautifulSoup's get_text(strip=True).
+        return "".join(text.strip() for text in element.itertext())
+
+
+RESULT_PARSERS = {parser.name: parser for parser in (SoupResultParser, LxmlResultParser)}
+
+
+def get_result_parser(name):
+    return RESULT_PARSERS.get(name, SoupResultParser)()
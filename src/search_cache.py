@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+
+import json
+import time
+import sqlite3
+import threading
+
+
+class SearchCache:
+
+    def __init__(self, db_path, logger, positive_ttl=86400, negative_ttl=21600, max_entries=10000):
+        self.logger = logger
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS search_results ("
+                "key TEXT PRIMARY KEY, finder TEXT, mirror TEXT, query TEXT, "
+                "result TEXT, found INTEGER, created REAL, expires REAL, last_used REAL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_search_results_last_used ON search_results (last_used)")
+            self.conn.execute("DELETE FROM search_results WHERE expires <= ?", (time.time(),))
+
+    @staticmethod
+    def normalize_query(query):
+        return " ".join(query.lower().split())
+
+    @staticmethod
+    def make_key(finder, mirror, query):
+        return f"{finder}|{mirror}|{SearchCache.normalize_query(query)}"
+
+    def get(self, finder, mirror, query):
+        # Returns the cached list of links, or None on a miss or expired entry.
+        key = self.make_key(finder, mirror, query)
+        now = time.time()
+        with self.lock, self.conn:
+            row = self.conn.execute("SELECT result, expires FROM search_results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self.conn.execute("DELETE FROM search_results WHERE key = ?", (key,))
+                return None
+            self.conn.execute("UPDATE search_results SET last_used = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def put(self, finder, mirror, query, links):
+        found = bool(links)
+        ttl = self.positive_ttl if found else self.negative_ttl
+        if ttl <= 0:
+            return
+        key = self.make_key(finder, mirror, query)
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO search_results (key, finder, mirror, query, result, found, created, expires, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, finder, mirror, self.normalize_query(query), json.dumps(links), int(found), now, now + ttl, now),
+            )
+            count = self.conn.execute("SELECT COUNT(*) FROM search_results").fetchone()[0]
+            if count > self.max_entries:
+                self.conn.execute("DELETE FROM search_results WHERE expires <= ?", (now,))
+                count = self.conn.execute("SELECT COUNT(*) FROM search_results").fetchone()[0]
+                self.conn.execute(
+                    "DELETE FROM search_results WHERE key IN (SELECT key FROM search_results ORDER BY last_used ASC LIMIT ?)",
+                    (max(0, count - self.max_entries),),
+                )
+
+    def clear(self):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM search_results")
+        self.logger.info("Search cache cleared")
@@ -2,6 +2,7 @@
 
 
 from thefuzz import fuzz
+import os
 import re
 
 
@@ -40,6 +41,40 @@ class SearchUtils:
         
         return cleaned if cleaned else "Unknown"
     
+    @staticmethod
+    def build_book_path(download_folder, path_type, req_item, file_type):
+        # Sanitize author and book names for file system safety
+        cleaned_author_name = SearchUtils.clean_filename(req_item["author"])
+        cleaned_book_name = SearchUtils.clean_filename(req_item["book_name"])
+
+        if path_type == "file":
+            return os.path.join(download_folder, f"{cleaned_author_name} - {cleaned_book_name} ({req_item['year']}){file_type}")
+
+        path_elements = [download_folder, req_item["author"]]
+
+        if req_item["series"]:
+            raw_series_string = req_item["series"].split(";")[0] if ";" in req_item["series"] else req_item["series"]
+
+            if " #" in raw_series_string:
+                series_name, series_number = raw_series_string.split(" #", maxsplit=1)
+                cleaned_series_name = re.sub(r"\s{2,}", " ", re.sub(r'[\\/*?:"<>|]', " - ", series_name.replace("/", "+")))
+                path_elements.append(cleaned_series_name)
+                path_elements.append(f"{series_number} - {cleaned_book_name} ({req_item['year']})")
+                path_elements.append(f"{series_number} - {cleaned_series_name} - {cleaned_author_name} - {cleaned_book_name} ({req_item['year']}){file_type}")
+
+            else:
+                series_name = raw_series_string.replace("/", "+")
+                cleaned_series_name = re.sub(r"\s{2,}", " ", re.sub(r'[\\/*?:"<>|]', " - ", series_name))
+                path_elements.append(cleaned_series_name)
+                path_elements.append(f"{cleaned_book_name} ({req_item['year']})")
+                path_elements.append(f"{series_name} - {cleaned_author_name} - {cleaned_book_name} ({req_item['year']}){file_type}")
+
+        else:
+            path_elements.append(f"{cleaned_book_name} ({req_item['year']})")
+            path_elements.append(f"{cleaned_author_name} - {cleaned_book_name} ({req_item['year']}){file_type}")
+
+        return os.path.join(*path_elements)
+
     @staticmethod
     def extract_cell_text(cells, index, default=""):
         try:
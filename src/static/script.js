@@ -11,8 +11,28 @@ var stop_libgen = document.getElementById('stop-libgen-btn');
 var reset_libgen = document.getElementById('reset-libgen-btn');
 var libgen_progress_bar = document.getElementById('libgen-progress-status-bar');
 var libgen_table = document.getElementById('libgen-table').getElementsByTagName('tbody')[0];
+var libgen_bandwidth = document.getElementById('libgen-bandwidth');
+var libgen_update_seq = null;
 
 var config_modal = document.getElementById('config-modal');
+var mirror_health_modal = document.getElementById('mirror-health-modal');
+var mirror_health_table = document.getElementById('mirror-health-table').getElementsByTagName('tbody')[0];
+var item_trace_modal = new bootstrap.Modal(document.getElementById('item-trace-modal'));
+var item_trace_label = document.getElementById('item-trace-label');
+var item_trace_summary = document.getElementById('item-trace-summary');
+var item_trace_timeline = document.getElementById('item-trace-timeline');
+var item_trace_export = document.getElementById('item-trace-export');
+const trace_colors = {
+    "stage": "bg-primary",
+    "queue": "bg-secondary",
+    "finder": "bg-info",
+    "mirror": "bg-info",
+    "resolve": "bg-info",
+    "limiter": "bg-dark",
+    "http": "bg-warning",
+    "download": "bg-success",
+    "torrent": "bg-danger"
+};
 var save_message = document.getElementById("save-message");
 var save_changes_button = document.getElementById("save-changes-btn");
 const readarr_address = document.getElementById("readarr-address");
@@ -20,6 +40,7 @@ const readarr_api_key = document.getElementById("readarr-api-key");
 const sleep_interval = document.getElementById("sleep-interval");
 const sync_schedule = document.getElementById("sync-schedule");
 const minimum_match_ratio = document.getElementById("minimum-match-ratio");
+const thread_limit = document.getElementById("thread-limit");
 var socket = io();
 
 readarr_progress_bar.style.width = "0%";
@@ -36,6 +57,41 @@ function check_if_all_true() {
     select_all_checkbox.checked = all_checked;
 }
 
+function format_bytes(size) {
+    var units = ["B", "KB", "MB", "GB"];
+    var unit = 0;
+    while (size >= 1024 && unit < units.length - 1) {
+        size /= 1024;
+        unit++;
+    }
+    return `${size.toFixed(unit ? 1 : 0)} ${units[unit]}`;
+}
+
+function format_eta(seconds) {
+    var minutes = Math.floor(seconds / 60);
+    var hours = Math.floor(minutes / 60);
+    var pad = (value) => String(value).padStart(2, "0");
+    return hours ? `${hours}:${pad(minutes % 60)}:${pad(seconds % 60)}` : `${minutes}:${pad(seconds % 60)}`;
+}
+
+function render_item_status(cell, status, progress) {
+    cell.innerHTML = status;
+    if (!progress) {
+        return;
+    }
+    var details = document.createElement("div");
+    details.className = "item-progress text-muted";
+    var size = progress.total_size ? `${format_bytes(progress.downloaded)} of ${format_bytes(progress.total_size)}` : format_bytes(progress.downloaded);
+    var eta = progress.eta !== null ? ` - ETA ${format_eta(progress.eta)}` : "";
+    details.textContent = `${size} - ${format_bytes(progress.rate)}/s${eta}`;
+    details.title = `Average ${format_bytes(progress.average_rate)}/s`;
+    cell.appendChild(details);
+}
+
+function update_bandwidth(bandwidth) {
+    libgen_bandwidth.textContent = bandwidth ? `Downloading at ${format_bytes(bandwidth)}/s` : "";
+}
+
 function update_progress_bar(percentage, status) {
     libgen_progress_bar.style.width = percentage + "%";
     libgen_progress_bar.setAttribute("aria-valuenow", percentage);
@@ -102,18 +158,45 @@ config_modal.addEventListener('show.bs.modal', function (event) {
         sleep_interval.value = settings.sleep_interval;
         sync_schedule.value = settings.sync_schedule.join(', ');
         minimum_match_ratio.value = settings.minimum_match_ratio;
+        thread_limit.value = settings.thread_limit;
         socket.off("settings_loaded", handle_settings_loaded);
     }
     socket.on("settings_loaded", handle_settings_loaded);
 });
 
+mirror_health_modal.addEventListener('show.bs.modal', function (event) {
+    socket.emit("load_mirror_health");
+});
+
+socket.on("mirror_health", (response) => {
+    mirror_health_table.innerHTML = '';
+    response.data.forEach(function (entry) {
+        var row = mirror_health_table.insertRow();
+        row.insertCell(0).textContent = entry.host;
+        var cell_state = row.insertCell(1);
+        cell_state.textContent = entry.state;
+        cell_state.classList.add("text-center");
+        var cell_latency = row.insertCell(2);
+        cell_latency.textContent = entry.ewma_latency === null ? "-" : entry.ewma_latency.toFixed(2);
+        cell_latency.classList.add("text-center");
+        var cell_failure_rate = row.insertCell(3);
+        cell_failure_rate.textContent = (entry.failure_rate * 100).toFixed(0) + "%";
+        cell_failure_rate.classList.add("text-center");
+        var cell_requests = row.insertCell(4);
+        cell_requests.textContent = entry.requests;
+        cell_requests.classList.add("text-center");
+        row.insertCell(5).textContent = entry.last_error;
+    });
+});
+
 save_changes_button.addEventListener("click", () => {
     socket.emit("update_settings", {
         "readarr_address": readarr_address.value,
         "readarr_api_key": readarr_api_key.value,
         "sleep_interval": sleep_interval.value,
         "sync_schedule": sync_schedule.value,
-        "minimum_match_ratio": minimum_match_ratio.value
+        "minimum_match_ratio": minimum_match_ratio.value,
+        "thread_limit": thread_limit.value
     });
     save_message.style.display = "block";
     setTimeout(function () {
@@ -190,19 +273,93 @@ socket.on("readarr_update", (response) => {
 });
 
 socket.on("libgen_update", (response) => {
+    libgen_update_seq = response.seq;
     libgen_table.innerHTML = '';
-    response.data.forEach(function (entry) {
+    response.data.forEach(function (entry, index) {
         var row = libgen_table.insertRow();
         var cell_item = row.insertCell(0);
         var cell_item_status = row.insertCell(1);
+        var cell_item_retry = row.insertCell(2);
 
         cell_item.innerHTML = `${entry.author} - ${entry.book_name}`;
-        cell_item_status.innerHTML = entry.status;
+        render_item_status(cell_item_status, entry.status, entry.progress);
         cell_item_status.classList.add("text-center");
+
+        var retry_button = document.createElement("button");
+        retry_button.className = "btn btn-sm btn-link p-0";
+        retry_button.classList.toggle("d-none", !response.finished[index]);
+        retry_button.title = "Retry now";
+        retry_button.innerHTML = '<i class="fa fa-rotate-right"></i>';
+        retry_button.addEventListener("click", function () {
+            socket.emit("force_retry", index);
+        });
+        cell_item_retry.appendChild(retry_button);
+        cell_item_retry.classList.add("text-center");
+
+        var cell_item_trace = row.insertCell(3);
+        var trace_button = document.createElement("button");
+        trace_button.className = "btn btn-sm btn-link p-0";
+        trace_button.title = "Show trace";
+        trace_button.innerHTML = '<i class="fa fa-bars-progress"></i>';
+        trace_button.addEventListener("click", function () {
+            socket.emit("load_item_trace", index);
+        });
+        cell_item_trace.appendChild(trace_button);
+        cell_item_trace.classList.add("text-center");
     });
     var percent_completion = response.percent_completion;
     var actual_status = response.status;
     update_progress_bar(percent_completion, actual_status);
+    update_bandwidth(response.bandwidth);
+});
+
+socket.on("libgen_patch", (response) => {
+    if (libgen_update_seq === null) {
+        return;
+    }
+    if (response.seq !== libgen_update_seq + 1) {
+        libgen_update_seq = null;
+        socket.emit("libgen_resync");
+        return;
+    }
+    libgen_update_seq = response.seq;
+    response.items.forEach(function (patch) {
+        var row = libgen_table.rows[patch.index];
+        if (row) {
+            render_item_status(row.cells[1], patch.status, patch.progress);
+            row.cells[2].firstChild.classList.toggle("d-none", !patch.finished);
+        }
+    });
+    update_progress_bar(response.percent_completion, response.status);
+    update_bandwidth(response.bandwidth);
+});
+
+socket.on("item_trace", (response) => {
+    item_trace_label.textContent = response.label || "Trace";
+    item_trace_summary.textContent = response.spans.length ? `${response.spans.length} spans over ${response.duration.toFixed(2)}s` : "No trace recorded for this item yet.";
+    item_trace_export.href = `/trace.json?index=${response.index}`;
+    item_trace_timeline.innerHTML = '';
+    var duration = response.duration || 1;
+    response.spans.forEach(function (span) {
+        var row = document.createElement("div");
+        row.className = "trace-row";
+        var label = document.createElement("div");
+        label.className = "trace-label";
+        label.textContent = `${span.name} (${span.duration.toFixed(3)}s)`;
+        label.title = `${span.name} - ${span.thread}`;
+        var track = document.createElement("div");
+        track.className = "trace-track";
+        var bar = document.createElement("div");
+        bar.className = "trace-bar " + (trace_colors[span.category] || "bg-secondary");
+        bar.style.left = (100 * span.start / duration) + "%";
+        bar.style.width = (100 * span.duration / duration) + "%";
+        bar.title = `${span.category}: ${span.name}\nstart ${span.start.toFixed(3)}s, ${span.duration.toFixed(3)}s on ${span.thread}\n${JSON.stringify(span.args)}`;
+        track.appendChild(bar);
+        row.appendChild(label);
+        row.appendChild(track);
+        item_trace_timeline.appendChild(row);
+    });
+    item_trace_modal.show();
 });
 
 socket.on("new_toast_msg", function (data) {
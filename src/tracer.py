@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+
+import time
+import threading
+import contextlib
+
+
+class Tracer:
+    # Timed spans recorded per download job, viewable per item and exportable in the Chrome trace event format.
+
+    def __init__(self, max_spans_per_trace=500):
+        self.max_spans_per_trace = max_spans_per_trace
+        self.traces = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def start_trace(self, trace_id, label):
+        with self.lock:
+            self.traces.setdefault(trace_id, {"label": label, "spans": []})["label"] = label
+
+    def clear(self):
+        with self.lock:
+            self.traces = {}
+
+    def current(self):
+        return getattr(self.local, "trace_id", None)
+
+    @contextlib.contextmanager
+    def span(self, name, category, trace_id=None, **args):
+        # Spans nest through the thread's current trace, so code running inside a stage needs no trace id of its own.
+        # The args dict is yielded, values added to it before the span ends are stored with it.
+        trace_id = self.current() if trace_id is None else trace_id
+        if trace_id is None:
+            yield args
+            return
+        previous = self.current()
+        self.local.trace_id = trace_id
+        start = time.time()
+        try:
+            yield args
+        finally:
+            self.local.trace_id = previous
+            self.add_span(trace_id, name, category, start, time.time(), args)
+
+    def add_span(self, trace_id, name, category, start, end, args=None):
+        with self.lock:
+            trace = self.traces.get(trace_id)
+            if trace is None or len(trace["spans"]) >= self.max_spans_per_trace:
+                return
+            trace["spans"].append({"name": name, "category": category, "start": start, "end": end, "thread": threading.current_thread().name, "thread_id": threading.get_ident(), "args": dict(args or {})})
+
+    def get_trace(self, trace_id):
+        with self.lock:
+            trace = self.traces.get(trace_id)
+            return {"label": trace["label"], "spans": [dict(span) for span in trace["spans"]]} if trace else None
+
+    def timeline(self, trace_id):
+        # Spans relative to the start of the trace, in seconds, for the UI.
+        trace = self.get_trace(trace_id)
+        if not trace or not trace["spans"]:
+            return {"label": trace["label"] if trace else "", "duration": 0, "spans": []}
+        origin = min(span["start"] for span in trace["spans"])
+        spans = sorted(trace["spans"], key=lambda span: (span["start"], -span["end"]))
+        return {
+            "label": trace["label"],
+            "duration": max(span["end"] for span in spans) - origin,
+            "spans": [{"name": span["name"], "category": span["category"], "thread": span["thread"], "start": span["start"] - origin, "duration": span["end"] - span["start"], "args": span["args"]} for span in spans],
+        }
+
+    def chrome_trace(self, trace_ids=None):
+        # One process per item, one thread per worker that handled it. Spans on a thread always nest, which the trace viewers need.
+        with self.lock:
+            trace_ids = list(self.traces) if trace_ids is None else [trace_id for trace_id in trace_ids if trace_id in self.traces]
+            traces = [(trace_id, self.traces[trace_id]["label"], list(self.traces[trace_id]["spans"])) for trace_id in trace_ids]
+
+        events = []
+        for pid, (trace_id, label, spans) in enumerate(traces, start=1):
+            events.append({"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": label}})
+            # Worker pools reuse thread names, so tracks are keyed by the thread itself and only labelled with the name.
+            threads = {}
+            for span in spans:
+                if span["thread_id"] not in threads:
+                    threads[span["thread_id"]] = len(threads) + 1
+                    events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": threads[span["thread_id"]], "args": {"name": span["thread"]}})
+                events.append({
+                    "name": span["name"],
+                    "cat": span["category"],
+                    "ph": "X",
+                    "ts": round(span["start"] * 1000000),
+                    "dur": round((span["end"] - span["start"]) * 1000000),
+                    "pid": pid,
+                    "tid": threads[span["thread_id"]],
+                    "args": dict(span["args"], job_id=trace_id),
+                })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+
+import time
+import threading
+
+
+class TransferProgress:
+    # Bytes, rates and ETA of one download. The rate is sampled at most every sample_interval seconds and smoothed
+    # over recent samples, so a single slow chunk does not swing the ETA.
+
+    def __init__(self, total_size=0, start_size=0, sample_interval=1.0, smoothing=0.3):
+        self.total_size = total_size
+        self.start_size = start_size
+        self.downloaded = start_size
+        self.sample_interval = sample_interval
+        self.smoothing = smoothing
+        self.started = self.last_sample_time = time.monotonic()
+        self.last_sample_size = start_size
+        self.rate = 0.0
+
+    def update(self, downloaded_size, total_size=None):
+        # Returns True when a new rate sample was taken, the caller only reports progress then.
+        self.downloaded = downloaded_size
+        if total_size is not None:
+            self.total_size = total_size
+        now = time.monotonic()
+        elapsed = now - self.last_sample_time
+        if elapsed < self.sample_interval:
+            return False
+        sample = max(0.0, (downloaded_size - self.last_sample_size) / elapsed)
+        self.rate = sample if not self.rate else self.smoothing * sample + (1 - self.smoothing) * self.rate
+        self.last_sample_time = now
+        self.last_sample_size = downloaded_size
+        return True
+
+    def average_rate(self):
+        elapsed = time.monotonic() - self.started
+        return (self.downloaded - self.start_size) / elapsed if elapsed > 0 else 0.0
+
+    def eta(self):
+        if not self.total_size or not self.rate:
+            return None
+        return max(0.0, (self.total_size - self.downloaded) / self.rate)
+
+    def snapshot(self):
+        eta = self.eta()
+        return {
+            "downloaded": self.downloaded,
+            "total_size": self.total_size,
+            "rate": round(self.rate),
+            "average_rate": round(self.average_rate()),
+            "eta": round(eta) if eta is not None else None,
+        }
+
+
+class TransferStats:
+    # Downloads in progress by key, for the aggregate bandwidth of the whole queue.
+
+    def __init__(self, sample_interval=1.0):
+        self.sample_interval = sample_interval
+        self.active = {}
+        self.lock = threading.Lock()
+
+    def start(self, key, total_size=0, start_size=0):
+        # A later attempt of the same download (resume or fallback) replaces the earlier one.
+        progress = TransferProgress(total_size, start_size, self.sample_interval)
+        with self.lock:
+            self.active[key] = progress
+        return progress
+
+    def finish(self, key):
+        with self.lock:
+            self.active.pop(key, None)
+
+    def total_rate(self):
+        with self.lock:
+            return round(sum(progress.rate for progress in self.active.values()))
+
+    def count(self):
+        with self.lock:
+            return len(self.active)
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+
+
+import os
+import sys
+import time
+import logging
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from host_limiter import HostLimiter
+
+HOST = "libgen.example"
+
+
+class HostLimiterTimeoutTest(unittest.TestCase):
+
+    def setUp(self):
+        self.limiter = HostLimiter(logging.getLogger("test"), max_in_flight=1)
+
+    def test_long_retry_after_fails_at_once(self):
+        self.limiter.defer(HOST, 3600)
+        start = time.monotonic()
+        self.assertFalse(self.limiter.acquire(HOST, lambda: False, timeout=30))
+        self.assertLess(time.monotonic() - start, 0.1)
+
+    def test_short_retry_after_is_waited_out(self):
+        self.limiter.defer(HOST, 0.2)
+        self.assertTrue(self.limiter.acquire(HOST, lambda: False, timeout=5))
+
+    def test_full_host_gives_up_at_timeout(self):
+        self.assertTrue(self.limiter.acquire(HOST, lambda: False))
+        start = time.monotonic()
+        self.assertFalse(self.limiter.acquire(HOST, lambda: False, timeout=0.3))
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_stop_while_waiting(self):
+        self.limiter.defer(HOST, 3600)
+        self.assertFalse(self.limiter.acquire(HOST, lambda: True))
+
+
+if __name__ == "__main__":
+    unittest.main()
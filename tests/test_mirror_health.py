@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+
+import os
+import sys
+import logging
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from mirror_health import MirrorHealth
+
+HOST = "libgen.example"
+
+
+class MirrorHealthProbeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.health = MirrorHealth(logging.getLogger("test"), failure_threshold=1, cooldown=0, probe_timeout=60)
+        self.health.record_failure(HOST, "HTTP 503")
+
+    def test_probe_is_exclusive(self):
+        self.assertTrue(self.health.allow_request(HOST))
+        self.assertFalse(self.health.allow_request(HOST))
+
+    def test_released_probe_allows_next_probe(self):
+        # A probe that ends without an outcome (cancelled in the limiter, rate limited, ...) must not block the host.
+        self.assertTrue(self.health.allow_request(HOST))
+        self.health.release_probe(HOST)
+        self.assertTrue(self.health.allow_request(HOST))
+
+    def test_release_from_other_thread_keeps_probe(self):
+        self.assertTrue(self.health.allow_request(HOST))
+        thread = threading.Thread(target=self.health.release_probe, args=(HOST,))
+        thread.start()
+        thread.join()
+        self.assertFalse(self.health.allow_request(HOST))
+
+    def test_release_after_outcome_keeps_state(self):
+        self.assertTrue(self.health.allow_request(HOST))
+        self.health.record_success(HOST, 0.1)
+        self.health.release_probe(HOST)
+        self.assertEqual(self.health.table()[0]["state"], "closed")
+
+    def test_stale_probe_expires(self):
+        self.assertTrue(self.health.allow_request(HOST))
+        self.health.hosts[HOST]["probe_started"] -= 61
+        self.assertTrue(self.health.allow_request(HOST))
+
+
+if __name__ == "__main__":
+    unittest.main()